@@ -0,0 +1,115 @@
+"""
+Alert log queries: indexed segments (`hw-alerts query`) vs scanning one NDJSON file.
+
+Writes `--days` of synthetic alerts (`--per-day` each, 4 cameras, 3 rules) once as daily
+segments and once as a flat file, then times "one camera, one severity, 10 minutes" queries.
+
+    python benchmarks/bench_alert_query.py --days 90 --per-day 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from hoistwaywatch.alerts.segments import IndexEntry, SegmentedLog, query
+
+T0 = datetime(2026, 1, 1, tzinfo=UTC)
+SEVERITIES = ("info", "warning", "critical")
+
+
+def _write(directory: Path, days: int, per_day: int) -> tuple[Path, Path]:
+    log_path = directory / "alerts.ndjson"
+    flat_path = directory / "flat.ndjson"
+    step = timedelta(days=1) / per_day
+    log = SegmentedLog(log_path, max_bytes=1 << 40, max_age_sec=float("inf"))
+    log.open()
+    with open(flat_path, "w", encoding="utf-8") as flat:
+        for day in range(days):
+            for i in range(per_day):
+                ts = T0 + timedelta(days=day) + i * step
+                alert = {
+                    "alert_id": f"al_{day}_{i}",
+                    "ts": ts.isoformat(),
+                    "camera_id": f"cam{i % 4 + 1}",
+                    "severity": SEVERITIES[i % 3],
+                    "hazard_score": 60,
+                    "summary": "Motion detected in car path",
+                    "explanation": {"rule_id": f"R00{i % 3 + 1}", "why": "x" * 120},
+                }
+                line = json.dumps(alert, separators=(",", ":"))
+                flat.write(line + "\n")
+                rule_id = alert["explanation"]["rule_id"]
+                log.append(line, IndexEntry(ts, alert["severity"], alert["camera_id"], rule_id))
+            log.close()  # one segment per day
+    return log_path, flat_path
+
+
+def _scan(flat: Path, start: datetime, end: datetime, camera: str, severity: str) -> list[str]:
+    out = []
+    with open(flat, encoding="utf-8") as f:
+        for line in f:
+            alert = json.loads(line)
+            ts = datetime.fromisoformat(alert["ts"])
+            if start <= ts < end and alert["camera_id"] == camera and alert["severity"] == severity:
+                out.append(line)
+    return out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--days", type=int, default=90)
+    p.add_argument("--per-day", type=int, default=2000)
+    p.add_argument("--queries", type=int, default=20)
+    p.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path, flat_path = _write(Path(tmp), args.days, args.per_day)
+        windows = [
+            T0 + timedelta(days=(q * 7) % args.days, hours=14) for q in range(args.queries)
+        ]
+
+        t0 = time.perf_counter()
+        hits = 0
+        for start in windows:
+            hits += len(
+                list(
+                    query(
+                        log_path,
+                        start=start,
+                        end=start + timedelta(minutes=10),
+                        cameras=["cam2"],
+                        severities=["warning"],
+                    )
+                )
+            )
+        indexed_ms = (time.perf_counter() - t0) / len(windows) * 1000.0
+
+        t0 = time.perf_counter()
+        for start in windows[:3]:
+            _scan(flat_path, start, start + timedelta(minutes=10), "cam2", "warning")
+        scan_ms = (time.perf_counter() - t0) / 3 * 1000.0
+
+    result = {
+        "alerts": args.days * args.per_day,
+        "segments": args.days,
+        "indexed_query_ms": round(indexed_ms, 2),
+        "flat_scan_ms": round(scan_ms, 1),
+        "hits_per_query": hits / len(windows),
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{result['alerts']} alerts in {result['segments']} daily segments")
+    print(f"indexed query: {result['indexed_query_ms']} ms")
+    print(f"flat scan:     {result['flat_scan_ms']} ms")
+    print(f"hits/query:    {result['hits_per_query']}")
+
+
+if __name__ == "__main__":
+    main()
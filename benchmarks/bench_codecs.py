@@ -0,0 +1,107 @@
+"""
+NatsBus wire codecs: encoded size and encode/decode cost per message, per codec.
+
+Messages are the dicts services actually publish (`model_dump(mode="json")` of a motion event
+and of an alert). Codecs whose optional dependency is missing are skipped.
+
+    python benchmarks/bench_codecs.py --messages 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from typing import Any
+
+from hoistwaywatch.bus.codecs import CODEC_NAMES, get_codec
+from hoistwaywatch.contracts.alerts import HwAlertPacketV1
+from hoistwaywatch.contracts.events import HwEventV1
+
+
+def _motion(i: int) -> dict[str, Any]:
+    return HwEventV1(
+        event_id=f"evt_{i:032x}",
+        type="vision.motion_in_zone.v1",
+        ts=datetime.now(UTC),
+        site_id="site-001",
+        camera_id="cam-hoistway-top",
+        source={"service": "vision", "instance_id": "vision-01"},
+        payload={"zone_id": "car_path", "motion_score": 0.3121, "confidence": 0.8, "latency_ms": 4},
+    ).model_dump(mode="json")
+
+
+def _alert(i: int) -> dict[str, Any]:
+    return HwAlertPacketV1(
+        alert_id=f"al_{i:032x}",
+        ts=datetime.now(UTC),
+        site_id="site-001",
+        camera_id="cam-hoistway-top",
+        severity="critical",
+        hazard_score=90,
+        summary="Motion detected in car path",
+        recommended_action="Stop car; verify hoistway clear.",
+        explanation={
+            "rule_id": "R001.motion_in_car_path",
+            "why": "matched R001.motion_in_car_path, type=vision.motion_in_zone.v1",
+            "inputs": [
+                {"name": "event_id", "value": f"evt_{i:032x}"},
+                {"name": "payload", "value": {"zone_id": "car_path", "motion_score": 0.3121}},
+            ],
+        },
+        trigger={"event_ids": [f"evt_{i:032x}"]},
+    ).model_dump(mode="json")
+
+
+def _per_msg_us(fn: Callable[[Any], Any], items: list[Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(items) * 1e6
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--messages", type=int, default=20000)
+    p.add_argument("--repeat", type=int, default=5, help="report the best of N runs")
+    p.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = p.parse_args()
+
+    rows = []
+    for kind, make in (("motion", _motion), ("alert", _alert)):
+        msgs = [make(i) for i in range(args.messages)]
+        for name in CODEC_NAMES:
+            try:
+                codec = get_codec(name)
+            except ValueError:
+                continue
+            encoded = [codec.encode(m) for m in msgs]
+            rows.append(
+                {
+                    "kind": kind,
+                    "codec": name,
+                    "bytes": round(sum(map(len, encoded)) / len(encoded)),
+                    "encode_us": round(_per_msg_us(codec.encode, msgs, args.repeat), 2),
+                    "decode_us": round(_per_msg_us(codec.decode, encoded, args.repeat), 2),
+                }
+            )
+
+    if args.json:
+        print(json.dumps({"messages": args.messages, "rows": rows}, indent=2))
+        return
+    print(f"{args.messages} messages, best of {args.repeat}")
+    print(f"{'kind':>7} {'codec':>8} {'bytes':>6} {'enc us':>7} {'dec us':>7}")
+    for r in rows:
+        print(
+            f"{r['kind']:>7} {r['codec']:>8} {r['bytes']:>6}"
+            f" {r['encode_us']:>7} {r['decode_us']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+hw-event / hw-alert decode cost per message: dict validation vs strict vs fast decode.
+
+`legacy` is what the services did before contracts.decode: json.loads, then model_validate.
+`strict` validates the whole model from bytes; `fast` checks only the envelope.
+
+    python benchmarks/bench_decode.py --messages 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from typing import Any
+
+from hoistwaywatch.contracts.alerts import HwAlertPacketV1
+from hoistwaywatch.contracts.decode import decode_alert, decode_event
+from hoistwaywatch.contracts.events import HwEventV1
+
+
+def _event(i: int) -> bytes:
+    return HwEventV1(
+        event_id=f"evt_{i}",
+        type="vision.motion_in_zone.v1",
+        ts=datetime.now(UTC),
+        site_id="site",
+        camera_id=f"cam{i % 4}",
+        source={"service": "vision", "instance_id": "v1"},
+        payload={"zone_id": "car_path", "motion_score": 0.31, "confidence": 0.8, "latency_ms": 41},
+    ).model_dump_json().encode("utf-8")
+
+
+def _alert(i: int) -> bytes:
+    return HwAlertPacketV1(
+        alert_id=f"al_{i}",
+        ts=datetime.now(UTC),
+        site_id="site",
+        camera_id="cam1",
+        severity="critical",
+        hazard_score=90,
+        summary="Motion detected in car path",
+        recommended_action="Stop car; verify hoistway clear.",
+        explanation={
+            "rule_id": "R001.motion_in_car_path",
+            "why": "matched R001.motion_in_car_path, type=vision.motion_in_zone.v1",
+            "inputs": [
+                {"name": "event_id", "value": f"evt_{i}"},
+                {"name": "payload", "value": {"zone_id": "car_path", "motion_score": 0.31}},
+            ],
+        },
+        trigger={"event_ids": [f"evt_{i}"]},
+    ).model_dump_json().encode("utf-8")
+
+
+def _time(decode: Callable[[bytes], Any], messages: list[bytes], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for m in messages:
+            decode(m)
+        best = min(best, time.perf_counter() - t0)
+    return best / len(messages) * 1e6
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--messages", type=int, default=20000)
+    p.add_argument("--repeat", type=int, default=5, help="report the best of N runs")
+    p.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = p.parse_args()
+
+    rows = []
+    for kind, make, model, decode in (
+        ("event", _event, HwEventV1, decode_event),
+        ("alert", _alert, HwAlertPacketV1, decode_alert),
+    ):
+        messages = [make(i) for i in range(args.messages)]
+        n = args.repeat
+        row = {
+            "kind": kind,
+            "legacy_us": _time(lambda m, t=model: t.model_validate(json.loads(m)), messages, n),
+            "strict_us": _time(lambda m, d=decode: d(m, mode="strict"), messages, n),
+            "fast_us": _time(lambda m, d=decode: d(m, mode="fast"), messages, n),
+        }
+        rows.append({k: round(v, 2) if isinstance(v, float) else v for k, v in row.items()})
+
+    if args.json:
+        print(json.dumps({"messages": args.messages, "rows": rows}, indent=2))
+        return
+    print(f"{args.messages} messages, microseconds per message")
+    print(f"{'kind':>6} {'legacy':>8} {'strict':>8} {'fast':>8}")
+    for r in rows:
+        print(f"{r['kind']:>6} {r['legacy_us']:>8} {r['strict_us']:>8} {r['fast_us']:>8}")
+
+
+if __name__ == "__main__":
+    main()
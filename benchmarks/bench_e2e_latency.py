@@ -0,0 +1,143 @@
+"""
+Frame capture -> actuator start latency per pipeline stage, in one process.
+
+Synthetic frames arrive at `--fps` and go through the real stages with their wire encoding:
+MotionPipeline, JSON, BatchedEvaluator (micro-batched rules), JSON, alert decode and an
+ActuatorDispatcher with an in-process actuator. Every stage stamps the trace the way the
+services do and TraceRecorder reports p50/p99 per span. There is no NATS server, so the
+numbers are a floor: on site add the broker hops (two per alert) to `published_to_evaluated`
+and `evaluated_to_received`.
+
+    python benchmarks/bench_e2e_latency.py --seconds 10 --fps 15 --width 1280
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from collections.abc import Iterator
+from typing import Any
+
+import cv2
+import numpy as np
+
+from hoistwaywatch.alerts.actuator import ActuatorDispatcher, CallableActuator
+from hoistwaywatch.capture.source import Frame
+from hoistwaywatch.contracts.decode import DECODE_MODES, decode_alert
+from hoistwaywatch.observability.metrics import Registry
+from hoistwaywatch.observability.tracing import TraceRecorder, stamp
+from hoistwaywatch.rules.consumer import BatchedEvaluator
+from hoistwaywatch.rules.engine import RulesEngine
+from hoistwaywatch.vision.pipeline import MotionPipeline, PipelineConfig
+from hoistwaywatch.vision.zones import load_zones
+
+# No cooldown: every motion event in the car path becomes an alert.
+RULES = {
+    "version": 1,
+    "rules": [
+        {
+            "id": "R001.motion_in_car_path",
+            "when": {
+                "event_type": "vision.motion_in_zone.v1",
+                "zone_id": "car_path",
+                "motion_score_gte": 0.05,
+                "confidence_gte": 0.5,
+            },
+            "then": {"severity": "critical", "hazard_score": 90},
+        },
+    ],
+}
+
+
+def _frames(width: int) -> Iterator[np.ndarray]:
+    # A well lit static scene; every fifth frame a blob shows up somewhere in the car path.
+    h, w = width * 9 // 16, width
+    rng = np.random.default_rng(11)
+    bg = cv2.GaussianBlur(rng.integers(140, 255, (h, w, 3), dtype=np.uint8), (0, 0), 3)
+    for i in itertools.count():
+        if i % 5:
+            yield bg
+            continue
+        img = bg.copy()
+        center = (int(w * rng.uniform(0.35, 0.65)), int(h * rng.uniform(0.2, 0.8)))
+        cv2.circle(img, center, h // 5, (255, 40, 0), -1)
+        yield img
+
+
+async def _run(args: argparse.Namespace) -> dict[str, Any]:
+    tracer = TraceRecorder(registry=Registry())
+    dispatcher = ActuatorDispatcher(
+        CallableActuator(lambda alert: None), dedupe=False, registry=Registry(), tracer=tracer
+    )
+    await dispatcher.start()
+
+    async def deliver(subject: str, payloads: list[dict[str, Any]]) -> int:
+        # Stands in for NATS + hw-alerts: encode, decode, stamp receipt, dispatch.
+        for p in payloads:
+            alert = decode_alert(json.dumps(p).encode(), mode=args.decode)
+            if alert.trace is not None:
+                trace = {**alert.trace, "received_at": time.time()}
+                dispatcher.dispatch(alert, received=time.monotonic(), trace=trace)
+        return len(payloads)
+
+    evaluator = BatchedEvaluator(
+        RulesEngine(RULES),
+        deliver,
+        subject="hw.alerts.v1",
+        max_batch=64,
+        max_wait_ms=args.batch_ms,
+        decode=args.decode,
+        registry=Registry(),
+    )
+    worker = asyncio.create_task(evaluator.run())
+    pipeline = MotionPipeline(
+        PipelineConfig(
+            site_id="site",
+            camera_id="cam1",
+            instance_id="bench",
+            process_width=320,
+            roi=True,
+            publish_interval_ms=0,
+        ),
+        load_zones("configs/example-zones.json"),
+    )
+    frames = _frames(args.width)
+    period = 1.0 / args.fps
+    start = time.monotonic()
+    for i in range(int(args.seconds * args.fps)):
+        await asyncio.sleep(max(0.0, start + i * period - time.monotonic()))
+        frame = Frame(next(frames), i, time.time(), time.monotonic())
+        for evt in pipeline.process(frame):
+            stamp(evt, "published_at")
+            await evaluator.submit(json.dumps(evt, separators=(",", ":")).encode())
+    await asyncio.sleep(0.2)
+    worker.cancel()
+    await dispatcher.close()
+    return {"frames": i + 1, "traces": tracer.traces, "spans": tracer.report()}
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--seconds", type=float, default=10.0)
+    p.add_argument("--fps", type=float, default=15.0)
+    p.add_argument("--width", type=int, default=1280, help="capture width (16:9 frames)")
+    p.add_argument("--batch-ms", type=float, default=2.0, help="hw-rules --batch-ms")
+    p.add_argument("--decode", choices=DECODE_MODES, default="fast")
+    p.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = p.parse_args()
+
+    result = asyncio.run(_run(args))
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{result['frames']} frames, {result['traces']} traced alerts")
+    print(f"{'span':<24} {'count':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for span, row in result["spans"].items():
+        print(f"{span:<24} {row['count']:>6} {row['p50_ms']:>8} {row['p99_ms']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+CPU cost of read()-every-frame vs grab()-every-frame + retrieve()-every-Nth.
+
+hw-vision and hw-capture take every frame off the stream with grab() and retrieve() only
+the frames they analyse (`--analysis-stride`). This measures the process CPU time per
+source frame of each way of draining a clip, decoder threads included:
+
+- `read`: cap.read() on every frame (the old loop)
+- `stride=N`: cap.grab() on every frame, cap.retrieve() on every Nth
+- `grab`: cap.grab() only (hw-capture without a frame ring)
+
+With OpenCV's FFmpeg backend grab() decodes the frame (inter-frame codecs need every frame
+as a reference, and MJPEG is decoded there as well); retrieve() is the conversion to BGR and
+the copy into a fresh array, which is what a stride saves. The share of that in the total
+depends on how expensive the codec is to decode, so measure recordings of the cameras in
+question with `--clip` (e.g. `ffmpeg -i rtsp://... -c copy -t 60 cam1.mp4` for an H.264
+RTSP stream); without it, synthetic MJPEG and MPEG-4 clips are generated.
+
+    python benchmarks/bench_grab_retrieve.py --clip cam1.mp4 --strides 2 3 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import cv2
+from synthetic import RESOLUTIONS, SyntheticClip
+
+from hoistwaywatch import __version__
+
+CODECS = {"mjpg": ("MJPG", ".avi"), "mp4v": ("mp4v", ".mp4")}
+
+
+def _encode(clip: SyntheticClip, directory: Path, codec: str) -> Path:
+    fourcc, ext = CODECS[codec]
+    path = directory / f"{codec}-{clip.resolution}{ext}"
+    writer = cv2.VideoWriter(
+        str(path), cv2.VideoWriter_fourcc(*fourcc), clip.fps, (clip.width, clip.height)
+    )
+    if not writer.isOpened():
+        raise SystemExit(f"OpenCV cannot write {codec} video here")
+    for image in clip:
+        writer.write(image)
+    writer.release()
+    return path
+
+
+def _drain(path: str, stride: int | None) -> tuple[int, int, float]:
+    """(frames, frames retrieved, CPU seconds); stride None: read() every frame, 0: grab only."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"cannot open {path}")
+    frames = retrieved = 0
+    started = time.process_time()
+    try:
+        while True:
+            if stride is None:
+                ok, _ = cap.read()
+                retrieved += ok
+            else:
+                ok = cap.grab()
+                if ok and stride and frames % stride == 0:
+                    ok, _ = cap.retrieve()
+                    retrieved += ok
+            if not ok:
+                break
+            frames += 1
+    finally:
+        cap.release()
+    return frames, retrieved, time.process_time() - started
+
+
+def _run(label: str, path: str, strides: list[int], repeat: int) -> list[dict[str, Any]]:
+    modes: list[tuple[str, int | None]] = [("read", None)]
+    modes += [(f"stride={n}", n) for n in strides]
+    modes.append(("grab", 0))
+    rows = []
+    baseline = 0.0
+    for mode, stride in modes:
+        # Best of `repeat`: the least disturbed run.
+        runs = [_drain(path, stride) for _ in range(repeat)]
+        frames, retrieved, cpu = min(runs, key=lambda r: r[2])
+        per_frame = cpu / max(1, frames)
+        baseline = baseline or per_frame
+        rows.append(
+            {
+                "clip": label,
+                "mode": mode,
+                "frames": frames,
+                "retrieved": retrieved,
+                "cpu_ms_per_frame": round(per_frame * 1000.0, 3),
+                "cpu_saved_pct": (
+                    round(100.0 * (1.0 - per_frame / baseline), 1) if baseline else None
+                ),
+            }
+        )
+    return rows
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--clip", action="append", default=[], help="recording to measure (repeatable)")
+    p.add_argument("--strides", nargs="+", type=int, default=[1, 2, 3, 5])
+    p.add_argument("--codecs", nargs="+", choices=list(CODECS), default=list(CODECS))
+    p.add_argument("--resolution", choices=list(RESOLUTIONS), default="720p")
+    p.add_argument("--fps", type=float, default=15.0, help="synthetic clip frame rate")
+    p.add_argument("--seconds", type=float, default=20.0, help="synthetic clip length")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    p.add_argument("--out", help="also write the JSON report to this file")
+    args = p.parse_args()
+
+    rows = []
+    for clip in args.clip:
+        rows += _run(Path(clip).name, clip, args.strides, args.repeat)
+    if not args.clip:
+        synthetic = SyntheticClip("motion", args.resolution, fps=args.fps, seconds=args.seconds)
+        with tempfile.TemporaryDirectory() as tmp:
+            for codec in args.codecs:
+                path = _encode(synthetic, Path(tmp), codec)
+                rows += _run(f"{codec}-{args.resolution}", str(path), args.strides, args.repeat)
+
+    report = {
+        "version": __version__,
+        "opencv": cv2.__version__,
+        "config": {"strides": args.strides, "repeat": args.repeat},
+        "results": rows,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{'clip':<20} {'mode':<10} {'frames':>7} {'retrieved':>9} {'cpu_ms':>8} {'saved':>7}")
+    for r in rows:
+        print(
+            f"{r['clip']:<20} {r['mode']:<10} {r['frames']:>7} {r['retrieved']:>9}"
+            f" {r['cpu_ms_per_frame']:>8} {r['cpu_saved_pct']:>6}%"
+        )
+    print("cpu_ms: process CPU per source frame; saved: relative to read() on every frame")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Per-frame cost of the lighting-quality and tamper signals: full-frame gray + np.mean/np.std +
+absdiff (the original hw-vision loop) against a gray thumbnail + cv2.meanStdDev refreshed on
+a cadence (MotionPipeline).
+
+    python benchmarks/bench_lighting_tamper.py --width 1920 --height 1080 --fps 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from hoistwaywatch.vision.pipeline import lighting_quality
+
+
+def _legacy(frame: np.ndarray, ref_gray: np.ndarray) -> tuple[float, float]:
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    mean = float(np.mean(gray)) / 255.0
+    std = float(np.std(gray)) / 255.0
+    quality = max(0.0, min(1.0, (mean * 0.7 + std * 0.3)))
+    diff = float(np.mean(cv2.absdiff(gray, ref_gray))) / 255.0
+    return quality, diff
+
+
+def _thumbnail(frame: np.ndarray, ref_thumb: np.ndarray, width: int) -> tuple[float, float]:
+    h, w = frame.shape[:2]
+    small = cv2.resize(frame, (width, round(h * width / w)), interpolation=cv2.INTER_NEAREST)
+    thumb = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    quality, _ = lighting_quality(thumb)
+    diff = float(cv2.mean(cv2.absdiff(thumb, ref_thumb))[0]) / 255.0
+    return quality, diff
+
+
+def _time_ms(fn, iters: int) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - t0) * 1000.0 / iters
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--width", type=int, default=1920)
+    p.add_argument("--height", type=int, default=1080)
+    p.add_argument("--thumb-width", type=int, default=160)
+    p.add_argument("--fps", type=float, default=30.0, help="camera frame rate")
+    p.add_argument("--interval-ms", type=int, default=200, help="thumbnail refresh cadence")
+    p.add_argument("--iters", type=int, default=50)
+    p.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = p.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = cv2.GaussianBlur(
+        rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8), (0, 0), 2
+    )
+    frame = cv2.add(base, 20)
+    ref_gray = cv2.cvtColor(base, cv2.COLOR_BGR2GRAY)
+    h, w = base.shape[:2]
+    ref_small = cv2.resize(
+        base, (args.thumb_width, round(h * args.thumb_width / w)), interpolation=cv2.INTER_NEAREST
+    )
+    ref_thumb = cv2.cvtColor(ref_small, cv2.COLOR_BGR2GRAY)
+
+    legacy_ms = _time_ms(lambda: _legacy(frame, ref_gray), args.iters)
+    thumb_ms = _time_ms(lambda: _thumbnail(frame, ref_thumb, args.thumb_width), args.iters)
+    # With a cadence, only one frame in every (fps * interval) pays for the thumbnail.
+    refresh_every = max(1.0, args.fps * args.interval_ms / 1000.0)
+    amortized_ms = thumb_ms / refresh_every
+    lq, ld = _legacy(frame, ref_gray)
+    tq, td = _thumbnail(frame, ref_thumb, args.thumb_width)
+
+    result = {
+        "width": args.width,
+        "height": args.height,
+        "legacy_ms_per_frame": round(legacy_ms, 3),
+        "thumbnail_ms_per_refresh": round(thumb_ms, 3),
+        "thumbnail_ms_per_frame_amortized": round(amortized_ms, 4),
+        "quality_abs_error": round(abs(lq - tq), 4),
+        "tamper_diff_abs_error": round(abs(ld - td), 4),
+    }
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"{args.width}x{args.height} @ {args.fps} fps, refresh every {args.interval_ms} ms")
+    for k, v in result.items():
+        if k not in {"width", "height"}:
+            print(f"  {k:<36} {v}")
+    print(f"  {'cpu saved per camera-second (ms)':<36} {(legacy_ms - amortized_ms) * args.fps:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+hw-rules evaluation throughput (events/sec) vs rulebook size.
+
+Rulebooks are generated across many zones and event types, the way site-specific rulebooks
+grow; events are a motion-heavy mix (4 Hz x zones x cameras) with health/tamper traffic.
+
+    python benchmarks/bench_rules.py --rules 10 100 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+from datetime import UTC, datetime
+
+from hoistwaywatch.contracts.events import HwEventV1
+from hoistwaywatch.rules.engine import RulesEngine
+
+
+def _rulebook(n: int, zones: int) -> dict:
+    rules = []
+    for i in range(n):
+        kind = i % 10
+        if kind < 7:
+            when = {
+                "event_type": "vision.motion_in_zone.v1",
+                "zone_id": f"z{i % zones}",
+                "motion_score_gte": 0.35 + (i % 5) / 20,
+                "confidence_gte": 0.5,
+            }
+        elif kind < 9:
+            when = {"event_type": "vision.tamper_or_occlusion.v1", "status_in": ["tampered"]}
+        else:
+            when = {"event_type": "capture.camera_health.v1", "status_in": ["offline"]}
+        rules.append(
+            {
+                "id": f"R{i:05d}",
+                "when": when,
+                "then": {"severity": "warning", "hazard_score": 50, "summary": f"rule {i}"},
+            }
+        )
+    return {"version": 1, "rules": rules}
+
+
+def _events(n: int, zones: int, cameras: int) -> list[HwEventV1]:
+    rng = random.Random(0)
+    now = datetime.now(UTC)
+    out = []
+    for i in range(n):
+        r = rng.random()
+        if r < 0.9:
+            etype = "vision.motion_in_zone.v1"
+            payload = {
+                "zone_id": f"z{rng.randrange(zones)}",
+                "motion_score": rng.random() * 0.4,  # mostly below thresholds
+                "confidence": 0.8,
+            }
+        elif r < 0.97:
+            etype, payload = "vision.lighting_quality.v1", {"quality": 0.7}
+        else:
+            etype, payload = "capture.camera_health.v1", {"status": "ok"}
+        out.append(
+            HwEventV1(
+                event_id=f"evt_{i}",
+                type=etype,
+                ts=now,
+                camera_id=f"cam{rng.randrange(cameras)}",
+                source={"service": "bench", "instance_id": "b"},
+                payload=payload,
+            )
+        )
+    return out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--rules", type=int, nargs="+", default=[10, 100, 1000])
+    p.add_argument("--zones", type=int, default=50)
+    p.add_argument("--cameras", type=int, default=4)
+    p.add_argument("--events", type=int, default=20000)
+    p.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = p.parse_args()
+
+    events = _events(args.events, args.zones, args.cameras)
+    rows = []
+    for n in args.rules:
+        engine = RulesEngine(_rulebook(n, args.zones))
+        t0 = time.perf_counter()
+        alerts = 0
+        for evt in events:
+            alerts += len(engine.evaluate(evt))
+        dt = time.perf_counter() - t0
+        rows.append({"rules": n, "events_per_sec": round(len(events) / dt), "alerts": alerts})
+
+    if args.json:
+        print(json.dumps({"events": args.events, "rows": rows}, indent=2))
+        return
+    print(f"{args.events} events, {args.zones} zones, {args.cameras} cameras")
+    print(f"{'rules':>6} {'events/sec':>12} {'alerts':>8}")
+    for r in rows:
+        print(f"{r['rules']:>6} {r['events_per_sec']:>12} {r['alerts']:>8}")
+
+
+if __name__ == "__main__":
+    main()
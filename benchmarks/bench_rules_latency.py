@@ -0,0 +1,151 @@
+"""
+hw-rules end-to-end event->alert latency at a fixed offered load, over an in-process loopback bus.
+
+Events are submitted to BatchedEvaluator the way the NATS subscription callback does, at a
+steady rate; the loopback bus encodes published alerts to JSON as NatsBus does and records
+how long each alert's triggering event waited until its batch was flushed. Compares
+per-event handling (batch size 1) with micro-batching, both taking only what is already
+queued and waiting up to `--batch-ms` for a batch to fill. No NATS server is involved; each
+publish call waits `--flush-ms` to stand in for the flush round trip to the server.
+
+    python benchmarks/bench_rules_latency.py --rates 1000 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from datetime import UTC, datetime
+from typing import Any
+
+from hoistwaywatch.rules.consumer import BatchedEvaluator
+from hoistwaywatch.rules.engine import RulesEngine
+
+RULES = {
+    "version": 1,
+    "rules": [
+        {
+            "id": "R001.motion_in_car_path",
+            "when": {
+                "event_type": "vision.motion_in_zone.v1",
+                "zone_id": "car_path",
+                "motion_score_gte": 0.15,
+                "confidence_gte": 0.5,
+            },
+            "then": {"severity": "critical", "hazard_score": 90},
+        },
+        {
+            "id": "R010.tamper",
+            "when": {"event_type": "vision.tamper_or_occlusion.v1", "status_in": ["tampered"]},
+            "then": {"severity": "warning"},
+        },
+    ],
+}
+
+
+class LoopbackBus:
+    def __init__(self, flush_sec: float) -> None:
+        self.flush_sec = flush_sec
+        self.latencies: list[float] = []
+
+    async def publish_many(self, subject: str, payloads: list[dict[str, Any]]) -> int:
+        for p in payloads:
+            json.dumps(p, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        await asyncio.sleep(self.flush_sec)
+        now = time.perf_counter()
+        for p in payloads:
+            self.latencies.append(now - p["explanation"]["inputs"][2]["value"]["sent"])
+        return len(payloads)
+
+
+def _event(i: int) -> dict[str, Any]:
+    # One in ten events is motion in the car path and raises an alert.
+    zone = "car_path" if i % 10 == 0 else f"landing_{i % 7}"
+    return {
+        "schema_version": 1,
+        "event_id": f"evt_{i}",
+        "type": "vision.motion_in_zone.v1",
+        "ts": datetime.now(UTC).isoformat(),
+        "site_id": "site",
+        "camera_id": f"cam{i % 4}",
+        "source": {"service": "bench", "instance_id": "b"},
+        "payload": {"zone_id": zone, "motion_score": 0.4, "confidence": 0.9},
+    }
+
+
+async def _run(
+    rate: int, seconds: float, batch: int, batch_ms: float, flush_ms: float
+) -> dict[str, Any]:
+    bus = LoopbackBus(flush_ms / 1000.0)
+    evaluator = BatchedEvaluator(
+        RulesEngine(RULES),
+        bus.publish_many,
+        subject="hw.alerts.v1",
+        max_batch=batch,
+        max_wait_ms=batch_ms,
+    )
+    worker = asyncio.create_task(evaluator.run())
+    total = int(rate * seconds)
+    start = time.perf_counter()
+    sent = 0
+    while sent < total:
+        due = min(total, int((time.perf_counter() - start) * rate) + 1)
+        while sent < due:
+            msg = _event(sent)
+            msg["payload"]["sent"] = time.perf_counter()
+            await evaluator.submit(json.dumps(msg, separators=(",", ":")).encode("utf-8"))
+            sent += 1
+        await asyncio.sleep(0.001)
+    while evaluator.events < total:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    worker.cancel()
+
+    lat = sorted(bus.latencies)
+    return {
+        "rate": rate,
+        "batch": batch,
+        "achieved_events_per_sec": round(total / elapsed),
+        "alerts": len(lat),
+        "p50_ms": round(statistics.median(lat) * 1000, 3),
+        "p99_ms": round(lat[int(len(lat) * 0.99) - 1] * 1000, 3),
+        "max_ms": round(lat[-1] * 1000, 3),
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--rates", type=int, nargs="+", default=[1000, 10000])
+    p.add_argument("--seconds", type=float, default=3.0)
+    p.add_argument("--batch-size", type=int, default=256)
+    p.add_argument("--batch-ms", type=float, default=2.0, help="fill wait for the third row")
+    p.add_argument("--flush-ms", type=float, default=0.5, help="simulated flush round trip")
+    p.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = p.parse_args()
+
+    rows = []
+    for rate in args.rates:
+        for batch, batch_ms in ((1, 0.0), (args.batch_size, 0.0), (args.batch_size, args.batch_ms)):
+            row = asyncio.run(_run(rate, args.seconds, batch, batch_ms, args.flush_ms))
+            rows.append({**row, "batch_ms": batch_ms})
+
+    if args.json:
+        print(json.dumps({"rows": rows}, indent=2))
+        return
+    print(
+        f"{'rate':>6} {'batch':>6} {'wait ms':>8} {'ev/s':>8} {'alerts':>7}"
+        f" {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    )
+    for r in rows:
+        print(
+            f"{r['rate']:>6} {r['batch']:>6} {r['batch_ms']:>8}"
+            f" {r['achieved_events_per_sec']:>8} {r['alerts']:>7}"
+            f" {r['p50_ms']:>8} {r['p99_ms']:>8} {r['max_ms']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
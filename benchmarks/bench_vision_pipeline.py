@@ -0,0 +1,167 @@
+"""
+hw-vision processing loop over synthetic clips: per-stage cost, fps and detection latency.
+
+Each scenario of `synthetic.py` (motion through a zone, lighting ramp, lens cover, camera
+shift) is rendered at 480p/720p/1080p, encoded to a video file and played back through
+cv2.VideoCapture + MotionPipeline the way hw-vision's loop does, without NATS or a camera.
+Pipeline time runs on the clip's own clock (frame index / fps), so hold times such as
+`--occlusion-after-sec` behave as they would live. Per frame it records decode, resize, MOG2,
+lighting, tamper and zone-scoring time; per clip, the frames between the scenario's onset and
+the first matching event (detection latency in frames).
+
+    python benchmarks/bench_vision_pipeline.py --json --out bench-vision.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+import cv2
+from synthetic import RESOLUTIONS, SCENARIOS, SyntheticClip
+
+from hoistwaywatch import __version__
+from hoistwaywatch.capture.source import Frame
+from hoistwaywatch.vision.pipeline import MotionPipeline, PipelineConfig
+from hoistwaywatch.vision.zones import load_zones
+
+STAGES = ("decode", "resize", "mog2", "lighting", "tamper", "zone_scoring")
+CODECS = {"mjpg": ("MJPG", ".avi"), "mp4v": ("mp4v", ".mp4")}
+
+
+def _encode(clip: SyntheticClip, directory: Path, codec: str) -> Path:
+    fourcc, ext = CODECS[codec]
+    path = directory / f"{clip.scenario}-{clip.resolution}{ext}"
+    writer = cv2.VideoWriter(
+        str(path), cv2.VideoWriter_fourcc(*fourcc), clip.fps, (clip.width, clip.height)
+    )
+    if not writer.isOpened():
+        raise SystemExit(f"OpenCV cannot write {codec} video here; try --codec mjpg")
+    for image in clip:
+        writer.write(image)
+    writer.release()
+    return path
+
+
+def _run(clip: SyntheticClip, path: Path, args: argparse.Namespace) -> dict[str, Any]:
+    pipeline = MotionPipeline(
+        PipelineConfig(
+            site_id="bench",
+            camera_id="cam1",
+            instance_id="bench",
+            motion_threshold=args.motion_threshold,
+            process_width=args.process_width,
+            roi=args.roi,
+        ),
+        load_zones(args.zones),
+    )
+    totals = dict.fromkeys(STAGES, 0.0)
+    detected: int | None = None
+    early = 0
+    events = 0
+    cap = cv2.VideoCapture(str(path))
+    index = 0
+    try:
+        while True:
+            t0 = time.perf_counter()
+            ok, image = cap.read()
+            if not ok:
+                break
+            totals["decode"] += time.perf_counter() - t0
+            now = index / clip.fps
+            found = pipeline.process(Frame(image, index, now, now), now=now)
+            for stage, sec in pipeline.last_stage_sec.items():
+                totals[stage] += sec
+            events += len(found)
+            if any(clip.matches(e) for e in found):
+                if index < clip.onset:
+                    early += 1
+                elif detected is None:
+                    detected = index
+            index += 1
+    finally:
+        cap.release()
+
+    frames = max(1, index)
+    busy = sum(totals.values())
+    return {
+        "scenario": clip.scenario,
+        "resolution": clip.resolution,
+        "frames": index,
+        **{f"{stage}_ms": round(totals[stage] / frames * 1000.0, 3) for stage in STAGES},
+        "frame_ms": round(busy / frames * 1000.0, 3),
+        "fps": round(frames / busy, 1) if busy else None,
+        "events": events,
+        "onset_frame": clip.onset,
+        "detect_latency_frames": None if detected is None else detected - clip.onset,
+        "early_detections": early,
+    }
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--resolutions", nargs="+", choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    p.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    p.add_argument("--fps", type=float, default=15.0, help="clip frame rate")
+    p.add_argument("--seconds", type=float, default=8.0, help="clip length")
+    p.add_argument("--codec", choices=list(CODECS), default="mjpg")
+    p.add_argument("--zones", default="configs/example-zones.json")
+    p.add_argument("--motion-threshold", type=float, default=0.15)
+    p.add_argument("--process-width", type=int, default=0, help="as hw-vision --process-width")
+    p.add_argument("--roi", action="store_true", help="as hw-vision --roi")
+    p.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    p.add_argument("--out", help="also write the JSON report to this file")
+    args = p.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for resolution in args.resolutions:
+            for scenario in args.scenarios:
+                clip = SyntheticClip(
+                    scenario,
+                    resolution,
+                    fps=args.fps,
+                    seconds=args.seconds,
+                    zones_path=args.zones,
+                    motion_threshold=args.motion_threshold,
+                )
+                rows.append(_run(clip, _encode(clip, Path(tmp), args.codec), args))
+
+    report = {
+        "version": __version__,
+        "opencv": cv2.__version__,
+        "config": {
+            "fps": args.fps,
+            "seconds": args.seconds,
+            "codec": args.codec,
+            "process_width": args.process_width,
+            "roi": args.roi,
+            "motion_threshold": args.motion_threshold,
+        },
+        "results": rows,
+    }
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(
+        f"{'scenario':<14} {'res':>5} {'decode':>7} {'resize':>7} {'mog2':>7} {'light':>7}"
+        f" {'tamper':>7} {'zones':>7} {'fps':>7} {'latency':>8} {'early':>6}"
+    )
+    for r in rows:
+        latency = "-" if r["detect_latency_frames"] is None else r["detect_latency_frames"]
+        print(
+            f"{r['scenario']:<14} {r['resolution']:>5} {r['decode_ms']:>7} {r['resize_ms']:>7}"
+            f" {r['mog2_ms']:>7} {r['lighting_ms']:>7} {r['tamper_ms']:>7}"
+            f" {r['zone_scoring_ms']:>7} {r['fps']:>7} {latency:>8} {r['early_detections']:>6}"
+        )
+    print("stage columns: mean ms per frame; latency: frames from onset to first matching event")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Per-frame zone scoring cost vs zone count: per-zone bitwise_and + count_nonzero over the
+full frame (the original hw-vision loop) against ZoneScorer, which scores each zone
+separately against its cached mask cropped to the zone's bounding box.
+
+    python benchmarks/bench_zone_scoring.py --width 1920 --height 1080 --max-zones 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from hoistwaywatch.vision.zones import Zone, ZoneScorer, zone_mask
+
+
+def _zones(n: int) -> list[Zone]:
+    # Overlapping vertical bands, similar to car path / landing / pit layouts.
+    out = []
+    for i in range(n):
+        x0 = i / (n + 1)
+        x1 = min(1.0, x0 + 2.0 / (n + 1))
+        out.append(Zone(f"z{i}", [(x0, 0.05), (x1, 0.05), (x1, 0.95), (x0, 0.95)]))
+    return out
+
+
+def _legacy(fg: np.ndarray, masks: list[np.ndarray]) -> list[float]:
+    scores = []
+    for mask in masks:
+        zone_pixels = int(np.count_nonzero(mask))
+        if zone_pixels == 0:
+            continue
+        scores.append(int(np.count_nonzero(cv2.bitwise_and(fg, fg, mask=mask))) / zone_pixels)
+    return scores
+
+
+def _time_ms(fn, iters: int) -> float:
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(iters):
+        fn()
+    return (time.perf_counter() - t0) * 1000.0 / iters
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    p.add_argument("--width", type=int, default=1920)
+    p.add_argument("--height", type=int, default=1080)
+    p.add_argument("--max-zones", type=int, default=10)
+    p.add_argument("--iters", type=int, default=30)
+    p.add_argument("--fg-ratio", type=float, default=0.1)
+    p.add_argument("--json", action="store_true", help="emit JSON instead of a table")
+    args = p.parse_args()
+
+    rng = np.random.default_rng(0)
+    fg = (rng.random((args.height, args.width)) < args.fg_ratio).astype(np.uint8) * 255
+
+    rows = []
+    for n in range(1, args.max_zones + 1):
+        zones = _zones(n)
+        masks = [zone_mask(fg.shape, z) for z in zones]
+        scorer = ZoneScorer(fg.shape, zones)
+        rows.append(
+            {
+                "zones": n,
+                "legacy_ms": round(_time_ms(lambda m=masks: _legacy(fg, m), args.iters), 3),
+                "scorer_ms": round(_time_ms(lambda s=scorer: s.scores(fg), args.iters), 3),
+            }
+        )
+
+    if args.json:
+        print(json.dumps({"width": args.width, "height": args.height, "rows": rows}, indent=2))
+        return
+    print(f"{args.width}x{args.height}, fg_ratio={args.fg_ratio}")
+    print(f"{'zones':>5} {'legacy ms':>10} {'scorer ms':>10} {'speedup':>8}")
+    for r in rows:
+        speedup = r["legacy_ms"] / r["scorer_ms"] if r["scorer_ms"] else float("inf")
+        print(f"{r['zones']:>5} {r['legacy_ms']:>10.3f} {r['scorer_ms']:>10.3f} {speedup:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
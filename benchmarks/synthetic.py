@@ -0,0 +1,145 @@
+"""
+Deterministic synthetic hoistway clips for the vision benchmarks.
+
+A clip is a well-lit static scene (a wall of high-contrast panels with two guide rails) at a
+given resolution, and from `start` (2 s in, once MOG2 and the tamper reference have settled)
+one scenario:
+
+- `motion`: a blob crosses the frame left to right, through the `car_path` zone
+- `lighting_ramp`: the light fades to ~5% over two seconds
+- `lens_cover`: the lens is covered (near-black, flat)
+- `camera_shift`: the camera is knocked; the scene moves by a tenth of the frame width
+
+Each clip knows the event hw-vision should emit for it and `onset`, the first frame at which
+that event is justified (the blob covers `motion_threshold` of the zone, the image is dark
+enough to count as low light, the lens is covered, the camera moved). Detection latency is
+measured from there, so the occlusion/tamper latencies include their configured hold times.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import Any
+
+import cv2
+import numpy as np
+
+from hoistwaywatch.vision.zones import load_zones, zone_mask
+
+RESOLUTIONS: dict[str, tuple[int, int]] = {
+    "480p": (854, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+}
+# Scenario -> (event type, payload key, payload value) it should produce.
+EXPECT: dict[str, tuple[str, str, str]] = {
+    "motion": ("vision.motion_in_zone.v1", "zone_id", "car_path"),
+    "lighting_ramp": ("vision.lighting_quality.v1", "reason", "low_light"),
+    "lens_cover": ("vision.tamper_or_occlusion.v1", "status", "occluded"),
+    "camera_shift": ("vision.tamper_or_occlusion.v1", "status", "tampered"),
+}
+SCENARIOS: tuple[str, ...] = tuple(EXPECT)
+
+LOW_LIGHT_MEAN = 0.12  # vision.pipeline.lighting_quality: mean brightness below this
+MOTION_ZONE = "car_path"
+
+
+def _scene(width: int, height: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    cols, rows = 16, 9
+    panels = rng.choice(np.array([90, 255], dtype=np.uint8), size=(rows, cols))
+    gray = cv2.resize(panels, (width, height), interpolation=cv2.INTER_NEAREST)
+    scene = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+    for x in (0.32, 0.68):
+        cv2.line(scene, (int(width * x), 0), (int(width * x), height), (60, 60, 60), 4)
+    return scene
+
+
+class SyntheticClip:
+    """One scenario at one resolution; iterate it for BGR frames."""
+
+    def __init__(
+        self,
+        scenario: str,
+        resolution: str,
+        *,
+        fps: float = 15.0,
+        seconds: float = 8.0,
+        seed: int = 0,
+        zones_path: str = "configs/example-zones.json",
+        motion_threshold: float = 0.15,
+    ) -> None:
+        if scenario not in EXPECT:
+            raise ValueError(f"unknown scenario {scenario!r} (choose from {SCENARIOS})")
+        self.scenario = scenario
+        self.resolution = resolution
+        self.width, self.height = RESOLUTIONS[resolution]
+        self.fps = fps
+        self.frames = int(seconds * fps)
+        self.start = int(2 * fps)
+        self.expect = EXPECT[scenario]
+        self._scene = _scene(self.width, self.height, seed)
+        zone = next(z for z in load_zones(zones_path) if z.zone_id == MOTION_ZONE)
+        self._zone = zone_mask((self.height, self.width), zone)
+        self._motion_threshold = motion_threshold
+        self.onset = self._onset()
+
+    def matches(self, event: dict[str, Any]) -> bool:
+        type_, key, value = self.expect
+        return event["type"] == type_ and event["payload"].get(key) == value
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for i in range(self.frames):
+            yield self._frame(i)
+
+    def _progress(self, i: int, seconds: float) -> float:
+        return min(1.0, max(0.0, (i - self.start) / (seconds * self.fps)))
+
+    def _blob(self, i: int) -> tuple[tuple[int, int], int] | None:
+        if i < self.start:
+            return None
+        radius = self.height // 5
+        t = self._progress(i, 3.0)
+        x = int(-radius + t * (self.width + 2 * radius))
+        return (x, int(self.height * 0.45)), radius
+
+    def _light(self, i: int) -> float:
+        return 1.0 - 0.95 * self._progress(i, 2.0)
+
+    def _frame(self, i: int) -> np.ndarray:
+        if i < self.start:
+            return self._scene.copy()
+        if self.scenario == "motion":
+            frame = self._scene.copy()
+            blob = self._blob(i)
+            if blob is not None:
+                cv2.circle(frame, blob[0], blob[1], (40, 40, 200), -1)
+            return frame
+        if self.scenario == "lighting_ramp":
+            return cv2.convertScaleAbs(self._scene, alpha=self._light(i))
+        if self.scenario == "lens_cover":
+            return np.full_like(self._scene, 8)
+        shift = np.float32([[1, 0, self.width // 10], [0, 1, 0]])
+        return cv2.warpAffine(
+            self._scene, shift, (self.width, self.height), borderMode=cv2.BORDER_REFLECT
+        )
+
+    def _onset(self) -> int:
+        if self.scenario == "motion":
+            zone_px = cv2.countNonZero(self._zone)
+            blob = np.zeros_like(self._zone)
+            for i in range(self.start, self.frames):
+                blob[:] = 0
+                center, radius = self._blob(i)  # type: ignore[misc]
+                cv2.circle(blob, center, radius, 255, -1)
+                overlap = cv2.countNonZero(cv2.bitwise_and(blob, self._zone))
+                if overlap >= self._motion_threshold * zone_px:
+                    return i
+            return self.frames
+        if self.scenario == "lighting_ramp":
+            mean = float(cv2.cvtColor(self._scene, cv2.COLOR_BGR2GRAY).mean()) / 255.0
+            for i in range(self.start, self.frames):
+                if mean * self._light(i) < LOW_LIGHT_MEAN:
+                    return i
+            return self.frames
+        return self.start
@@ -0,0 +1,348 @@
+"""
+Actuator dispatch for hw-alerts (siren, strobe, relays...).
+
+An actuator starts an action for one alert and reports when it is done:
+- `ShellActuator`: the legacy `--exec` behaviour, one shell process per alert
+- `WorkerActuator`: one long-lived process fed NDJSON alerts on stdin; it answers each with a
+  line containing the same `alert_id` once the action has finished
+- `CallableActuator`: an in-process plugin, `module:function` taking the alert
+
+`ActuatorDispatcher` runs actions in the background so a slow siren never delays the next
+alert, with per-severity concurrency limits, de-duplication of re-triggers while the same
+action is still running, a timeout, and receipt -> action-start latency. Traced alerts get
+`actuated_at` stamped when their action starts and are handed to a TraceRecorder.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import inspect
+import json
+import logging
+import os
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any, Protocol
+
+from hoistwaywatch.contracts.decode import Alert
+from hoistwaywatch.observability.metrics import REGISTRY, Registry
+from hoistwaywatch.observability.tracing import TraceRecorder
+
+DEFAULT_CONCURRENCY = {"critical": 4, "warning": 2, "info": 1}
+
+
+class Actuator(Protocol):
+    async def start(self) -> None: ...
+
+    async def begin(self, alert: Alert) -> Awaitable[None]:
+        """Start the action; return once it has started, with an awaitable for completion."""
+        ...
+
+    async def close(self) -> None: ...
+
+
+def _alert_fields(alert: Alert) -> dict[str, Any]:
+    return {
+        "alert_id": alert.alert_id,
+        "ts": alert.ts.isoformat(),
+        "site_id": alert.site_id,
+        "camera_id": alert.camera_id,
+        "severity": alert.severity,
+        "hazard_score": alert.hazard_score,
+        "summary": alert.summary,
+    }
+
+
+class ShellActuator:
+    """Run `command` through the shell once per alert, with HW_ALERT_* in the environment."""
+
+    def __init__(self, command: str) -> None:
+        self._command = command
+
+    async def start(self) -> None:
+        pass
+
+    async def begin(self, alert: Alert) -> Awaitable[None]:
+        proc = await asyncio.create_subprocess_shell(
+            self._command,
+            env={
+                **os.environ,
+                "HW_ALERT_SEVERITY": alert.severity,
+                "HW_ALERT_ID": alert.alert_id,
+                "HW_ALERT_CAMERA_ID": alert.camera_id or "",
+            },
+        )
+        return _wait_or_kill(proc)
+
+    async def close(self) -> None:
+        pass
+
+
+async def _wait_or_kill(proc: asyncio.subprocess.Process) -> None:
+    try:
+        await proc.wait()
+    except asyncio.CancelledError:
+        # Timed out (or shutting down): do not leave the siren script running.
+        if proc.returncode is None:
+            proc.kill()
+        raise
+
+
+class WorkerActuator:
+    """
+    Keep one `command` process running and write each alert to its stdin as a JSON line.
+    The worker writes a JSON line with the same `alert_id` to stdout when that action is
+    done; other output is ignored. The worker is restarted if it exits.
+    """
+
+    def __init__(self, command: str, *, log: logging.Logger | None = None) -> None:
+        self._command = command
+        self._log = log or logging.getLogger(__name__)
+        self._proc: asyncio.subprocess.Process | None = None
+        self._reader: asyncio.Task[None] | None = None
+        self._waiting: dict[str, asyncio.Future[None]] = {}
+        self._lock = asyncio.Lock()
+        self.restarts = 0
+
+    async def start(self) -> None:
+        await self._spawn()
+
+    async def begin(self, alert: Alert) -> Awaitable[None]:
+        done = asyncio.get_running_loop().create_future()
+        self._waiting[alert.alert_id] = done
+        line = json.dumps(_alert_fields(alert), separators=(",", ":")).encode() + b"\n"
+        try:
+            async with self._lock:
+                if self._proc is None or self._proc.returncode is not None:
+                    self.restarts += 1
+                    self._log.warning("actuator worker exited; restarting")
+                    await self._spawn()
+                assert self._proc is not None and self._proc.stdin is not None
+                self._proc.stdin.write(line)
+                await self._proc.stdin.drain()
+        except BaseException:
+            self._waiting.pop(alert.alert_id, None)
+            raise
+        return self._completion(alert.alert_id, done)
+
+    async def _completion(self, alert_id: str, done: asyncio.Future[None]) -> None:
+        try:
+            await done
+        finally:
+            self._waiting.pop(alert_id, None)
+
+    async def close(self) -> None:
+        if self._proc is None:
+            return
+        if self._proc.stdin is not None:
+            self._proc.stdin.close()
+        try:
+            await asyncio.wait_for(self._proc.wait(), 5.0)
+        except TimeoutError:
+            self._proc.kill()
+        if self._reader is not None:
+            self._reader.cancel()
+
+    async def _spawn(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+        self._proc = await asyncio.create_subprocess_shell(
+            self._command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+        )
+        self._reader = asyncio.create_task(self._read_acks(self._proc))
+
+    async def _read_acks(self, proc: asyncio.subprocess.Process) -> None:
+        assert proc.stdout is not None
+        async for raw in proc.stdout:
+            try:
+                alert_id = json.loads(raw).get("alert_id")
+            except (ValueError, AttributeError):
+                continue
+            done = self._waiting.get(alert_id)
+            if done is not None and not done.done():
+                done.set_result(None)
+        # Worker gone: actions it never acknowledged fail instead of waiting for the timeout.
+        for done in list(self._waiting.values()):
+            if not done.done():
+                done.set_exception(RuntimeError("actuator worker exited"))
+
+
+class CallableActuator:
+    """In-process plugin: a sync or async callable taking the alert."""
+
+    def __init__(self, fn: Callable[[Alert], Any]) -> None:
+        self._fn = fn
+
+    @classmethod
+    def load(cls, spec: str) -> CallableActuator:
+        """Import `module:function`."""
+        module, sep, attr = spec.partition(":")
+        if not sep or not module or not attr:
+            raise ValueError(f"actuator plugin must be module:function, got {spec!r}")
+        fn = getattr(importlib.import_module(module), attr)
+        if not callable(fn):
+            raise ValueError(f"actuator plugin {spec!r} is not callable")
+        return cls(fn)
+
+    async def start(self) -> None:
+        pass
+
+    async def begin(self, alert: Alert) -> Awaitable[None]:
+        fn = self._fn
+        # Plain async functions and objects with an async __call__.
+        if inspect.iscoroutinefunction(fn) or inspect.iscoroutinefunction(type(fn).__call__):
+            return asyncio.ensure_future(fn(alert))
+        return asyncio.ensure_future(asyncio.to_thread(fn, alert))
+
+    async def close(self) -> None:
+        pass
+
+
+def parse_concurrency(spec: str) -> dict[str, int]:
+    """`critical=4,warning=2,info=1` -> limits; unspecified severities keep the defaults."""
+    limits = dict(DEFAULT_CONCURRENCY)
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        severity, sep, value = part.partition("=")
+        if not sep or severity not in limits or not value.isdigit() or int(value) < 1:
+            raise ValueError(f"bad actuator concurrency {part!r} (want e.g. critical=4)")
+        limits[severity] = int(value)
+    return limits
+
+
+class ActuatorDispatcher:
+    """
+    Fire-and-forget front end for an Actuator.
+
+    `dispatch` never waits for the action. Actions of one severity share `limits[severity]`
+    slots; extra ones wait for a slot. While an action for the same (severity, camera) is
+    queued or running, further alerts for it are counted as de-duplicated and not actuated:
+    the siren is already on. Actions that exceed `timeout_sec` are cancelled.
+    """
+
+    def __init__(
+        self,
+        actuator: Actuator,
+        *,
+        limits: dict[str, int] | None = None,
+        timeout_sec: float = 30.0,
+        dedupe: bool = True,
+        log: logging.Logger | None = None,
+        registry: Registry = REGISTRY,
+        tracer: TraceRecorder | None = None,
+    ) -> None:
+        self._actuator = actuator
+        self._tracer = tracer
+        self._slots = {s: asyncio.Semaphore(n) for s, n in (limits or DEFAULT_CONCURRENCY).items()}
+        self._timeout = timeout_sec
+        self._dedupe = dedupe
+        self._log = log or logging.getLogger(__name__)
+        self._active: set[tuple[str, str | None]] = set()
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._latency_ms: deque[float] = deque(maxlen=1024)
+        self.dispatched = 0
+        self.deduped = 0
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self._register_metrics(registry)
+
+    async def start(self) -> None:
+        await self._actuator.start()
+
+    def dispatch(
+        self,
+        alert: Alert,
+        *,
+        received: float | None = None,
+        trace: dict[str, float] | None = None,
+    ) -> bool:
+        """
+        Start the action for `alert` in the background; `received` is a monotonic time.
+        `trace` (stamped up to receipt) gets `actuated_at` and is recorded once the action has
+        started; de-duplicated alerts start no action and are not recorded.
+        """
+        key = (alert.severity, alert.camera_id)
+        if self._dedupe and key in self._active:
+            self.deduped += 1
+            return False
+        self._active.add(key)
+        self.dispatched += 1
+        task = asyncio.create_task(self._run(alert, key, received or time.monotonic(), trace))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def close(self, *, grace_sec: float = 5.0) -> None:
+        """Give running actions `grace_sec` to finish, cancel the rest, stop the actuator."""
+        if self._tasks:
+            _, pending = await asyncio.wait(set(self._tasks), timeout=grace_sec)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        await self._actuator.close()
+
+    async def _run(
+        self,
+        alert: Alert,
+        key: tuple[str, str | None],
+        received: float,
+        trace: dict[str, float] | None,
+    ) -> None:
+        slots = self._slots.get(alert.severity) or self._slots["info"]
+        try:
+            async with slots:
+                async with asyncio.timeout(self._timeout):
+                    completion = await self._actuator.begin(alert)
+                    latency = time.monotonic() - received
+                    self._latency_ms.append(latency * 1000.0)
+                    self._start_seconds.labels(alert.severity).observe(latency)
+                    if trace is not None and self._tracer is not None:
+                        self._tracer.observe({**trace, "actuated_at": time.time()})
+                    await completion
+            self.completed += 1
+        except TimeoutError:
+            self.timed_out += 1
+            self._log.warning(
+                "actuator timed out",
+                extra={"alert_id": alert.alert_id, "timeout_sec": self._timeout},
+            )
+        except Exception:
+            self.failed += 1
+            self._log.exception("actuator failed", extra={"alert_id": alert.alert_id})
+        finally:
+            self._active.discard(key)
+
+    def _register_metrics(self, registry: Registry) -> None:
+        for name, help, attr in (
+            ("dispatched", "Actions started or queued", "dispatched"),
+            ("deduped", "Re-triggers skipped while the action was running", "deduped"),
+            ("completed", "Actions finished", "completed"),
+            ("failed", "Actions that raised or whose worker died", "failed"),
+            ("timed_out", "Actions cancelled at the timeout", "timed_out"),
+        ):
+            registry.counter(f"hw_alerts_actuator_{name}_total", help).set_function(
+                lambda attr=attr: getattr(self, attr)
+            )
+        registry.gauge("hw_alerts_actuator_running", "Actions queued or running").set_function(
+            lambda: len(self._tasks)
+        )
+        self._start_seconds = registry.histogram(
+            "hw_alerts_actuator_start_seconds", "Alert receipt to action start", ["severity"]
+        )
+
+    def stats(self) -> dict[str, float]:
+        lat = sorted(self._latency_ms)
+        return {
+            "actuator_dispatched": self.dispatched,
+            "actuator_deduped": self.deduped,
+            "actuator_completed": self.completed,
+            "actuator_failed": self.failed,
+            "actuator_timed_out": self.timed_out,
+            "actuator_running": len(self._tasks),
+            "actuator_start_p50_ms": round(lat[len(lat) // 2], 2) if lat else 0.0,
+            "actuator_start_max_ms": round(lat[-1], 2) if lat else 0.0,
+        }
@@ -3,62 +3,279 @@ from __future__ import annotations
 import argparse
 import asyncio
 import json
+import logging
 import os
+import shutil
 import sys
+import time
 from datetime import UTC, datetime
 from pathlib import Path
 
-from hoistwaywatch.bus.nats_bus import NatsBus
+import yaml
+
+from hoistwaywatch.alerts.actuator import (
+    Actuator,
+    ActuatorDispatcher,
+    CallableActuator,
+    ShellActuator,
+    WorkerActuator,
+    parse_concurrency,
+)
+from hoistwaywatch.alerts.segments import (
+    SEVERITIES,
+    IndexEntry,
+    SegmentedLog,
+    query,
+    segment_bases,
+)
+from hoistwaywatch.alerts.writer import AlertLogWriter
+from hoistwaywatch.bus.codecs import CODEC_NAMES
+from hoistwaywatch.bus.nats_bus import ALERTS_STREAM, NatsBus, RawBody
 from hoistwaywatch.contracts.alerts import HwAlertPacketV1
-from hoistwaywatch.observability import get_logger, setup_logging
+from hoistwaywatch.contracts.decode import DECODE_MODES, Alert, decode_alert
+from hoistwaywatch.observability import (
+    REGISTRY,
+    MetricsExporter,
+    TraceRecorder,
+    get_logger,
+    setup_logging,
+)
 from hoistwaywatch.util import wait_for_shutdown
 
+RECEIVED = REGISTRY.counter("hw_alerts_received_total", "Alerts received", ["severity"])
+INVALID = REGISTRY.counter("hw_alerts_invalid_total", "Messages dropped as invalid alerts")
+UNLOGGED = REGISTRY.counter(
+    "hw_alerts_unlogged_total", "Alerts acted on although their log commit failed", ["severity"]
+)
+HANDLING_SECONDS = REGISTRY.histogram(
+    "hw_alerts_handling_seconds",
+    "Receipt until logged (fsynced for critical) and actuator dispatched",
+    ["severity"],
+)
+
 
 def _parse_args(argv: list[str]) -> argparse.Namespace:
     p = argparse.ArgumentParser(prog="hw-alerts", description="HoistwayWatch alerts service")
     p.add_argument("--nats", default=os.getenv("HW_NATS_URL", "nats://127.0.0.1:4222"))
+    p.add_argument(
+        "--codec",
+        choices=CODEC_NAMES,
+        default=os.getenv("HW_BUS_CODEC", "json"),
+        help="Wire codec for published messages; received messages are decoded by header.",
+    )
     p.add_argument("--sub", default="hw.alerts.v1")
     p.add_argument(
         "--log",
         default=os.getenv("HW_ALERT_LOG", "alerts.ndjson"),
-        help="Append alerts as NDJSON to this path.",
+        help="Alert log path; segments are written next to it as <stem>-<start_ms>.ndjson.",
+    )
+    p.add_argument(
+        "--log-segment-mb",
+        type=float,
+        default=float(os.getenv("HW_ALERT_LOG_SEGMENT_MB", "64")),
+        help="Start a new log segment once the current one reaches this size in MB.",
+    )
+    p.add_argument(
+        "--log-segment-hours",
+        type=float,
+        default=float(os.getenv("HW_ALERT_LOG_SEGMENT_HOURS", "24")),
+        help="Start a new log segment after this many hours.",
+    )
+    p.add_argument(
+        "--site",
+        default=os.getenv("HW_SITE_CONFIG", ""),
+        help="Site config; `storage.retention_days` sets how long log segments are kept.",
+    )
+    p.add_argument(
+        "--retention-days",
+        type=float,
+        default=None,
+        help="Delete log segments older than this (overrides the site config; 0: keep all).",
+    )
+    p.add_argument(
+        "--log-group-size",
+        type=int,
+        default=int(os.getenv("HW_ALERT_LOG_GROUP_SIZE", "64")),
+        help="Write and fsync the log once this many alerts are queued.",
+    )
+    p.add_argument(
+        "--log-group-ms",
+        type=float,
+        default=float(os.getenv("HW_ALERT_LOG_GROUP_MS", "50")),
+        help="Longest an alert waits for its group fsync (critical alerts sync at once).",
     )
     p.add_argument(
         "--exec",
         default=os.getenv("HW_ALERT_EXEC", ""),
         help="Optional shell command to execute on every alert (e.g. trigger siren/strobe).",
     )
+    p.add_argument(
+        "--actuator-worker",
+        default=os.getenv("HW_ACTUATOR_WORKER", ""),
+        help="Long-lived command fed alerts as JSON lines on stdin (replaces --exec).",
+    )
+    p.add_argument(
+        "--actuator-plugin",
+        default=os.getenv("HW_ACTUATOR_PLUGIN", ""),
+        help="In-process actuator, module:function taking the alert (replaces --exec).",
+    )
+    p.add_argument(
+        "--actuator-concurrency",
+        default=os.getenv("HW_ACTUATOR_CONCURRENCY", ""),
+        help="Concurrent actions per severity, e.g. critical=4,warning=2,info=1.",
+    )
+    p.add_argument(
+        "--actuator-timeout-sec",
+        type=float,
+        default=float(os.getenv("HW_ACTUATOR_TIMEOUT_SEC", "30")),
+    )
+    p.add_argument(
+        "--no-actuator-dedupe",
+        dest="actuator_dedupe",
+        action="store_false",
+        help="Actuate every alert, even while the same (severity, camera) action is running.",
+    )
+    p.add_argument(
+        "--decode",
+        choices=DECODE_MODES,
+        default=os.getenv("HW_DECODE", "strict"),
+        help="strict: full validation; fast: envelope checks only, for trusted producers.",
+    )
+    p.add_argument(
+        "--jetstream",
+        action="store_true",
+        default=os.getenv("HW_JETSTREAM", "") == "1",
+        help="Consume through a durable JetStream consumer (resumes after restarts).",
+    )
+    p.add_argument("--durable", default="alerts", help="JetStream durable consumer name.")
+    p.add_argument(
+        "--jetstream-events-max-mb",
+        type=float,
+        default=float(os.getenv("HW_JETSTREAM_EVENTS_MAX_MB", "1024")),
+        help="Size cap of the HW_EVENTS stream; oldest events are dropped beyond it.",
+    )
+    p.add_argument(
+        "--metrics-port",
+        type=int,
+        default=int(os.getenv("HW_METRICS_PORT", "9404")),
+        help="Serve Prometheus metrics on http://127.0.0.1:<port>/metrics (0: off).",
+    )
+    p.add_argument(
+        "--metrics-interval-sec",
+        type=float,
+        default=float(os.getenv("HW_METRICS_INTERVAL_SEC", "15")),
+        help="Publish a metrics snapshot on hw.metrics.alerts this often (0: off).",
+    )
     return p.parse_args(argv)
 
 
+def _retention_days(args: argparse.Namespace) -> float:
+    if args.retention_days is not None:
+        return args.retention_days
+    if not args.site:
+        return 0.0
+    with open(args.site, encoding="utf-8") as f:
+        cfg = yaml.safe_load(f) or {}
+    return float((cfg.get("storage") or {}).get("retention_days") or 0)
+
+
+def _actuator(
+    args: argparse.Namespace, log: logging.Logger, tracer: TraceRecorder
+) -> ActuatorDispatcher | None:
+    actuator: Actuator
+    if args.actuator_plugin:
+        actuator = CallableActuator.load(args.actuator_plugin)
+    elif args.actuator_worker:
+        actuator = WorkerActuator(args.actuator_worker, log=log)
+    elif args.exec:
+        # keep it simple: delegate hardware to an explicit operator-provided command
+        actuator = ShellActuator(args.exec)
+    else:
+        return None
+    try:
+        limits = parse_concurrency(args.actuator_concurrency)
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from None
+    return ActuatorDispatcher(
+        actuator,
+        limits=limits,
+        timeout_sec=args.actuator_timeout_sec,
+        dedupe=args.actuator_dedupe,
+        log=log,
+        tracer=tracer,
+    )
+
+
+def _log_line(data: RawBody, alert: Alert) -> str:
+    if isinstance(alert, HwAlertPacketV1):
+        return alert.model_dump_json()
+    if isinstance(data, bytes) and b"\n" not in data.strip():
+        # Fast mode: trusted producers already publish compact JSON, log it as received.
+        return data.decode("utf-8").strip()
+    raw = json.loads(data) if isinstance(data, bytes) else data
+    return json.dumps(raw, separators=(",", ":"), ensure_ascii=False)
+
+
 async def _run(args: argparse.Namespace) -> int:
     setup_logging(service="alerts")
     log = get_logger("hoistwaywatch.alerts", service="alerts")
-    bus = NatsBus(args.nats)
+    bus = NatsBus(args.nats, codec=args.codec)
     await bus.connect()
     stop = wait_for_shutdown()
+    store = SegmentedLog(
+        args.log,
+        max_bytes=int(args.log_segment_mb * (1 << 20)),
+        max_age_sec=args.log_segment_hours * 3600.0,
+        retention_days=_retention_days(args),
+    )
+    writer = AlertLogWriter(
+        store, group_size=args.log_group_size, group_ms=args.log_group_ms, log=log
+    )
+    await writer.start()
+    # Frame capture -> actuator start, per stage, for alerts that carry a trace.
+    tracer = TraceRecorder()
+    actuator = _actuator(args, log, tracer)
+    if actuator is not None:
+        await actuator.start()
+    metrics = MetricsExporter(
+        service="alerts",
+        port=args.metrics_port,
+        interval_sec=args.metrics_interval_sec,
+        bus=bus,
+        log=log,
+    )
+    await metrics.start()
 
-    async def on_alert(msg: dict) -> None:
-        alert = HwAlertPacketV1.model_validate(msg)
-        line = json.dumps(alert.model_dump(mode="json"), separators=(",", ":"), ensure_ascii=False)
-        # stdout for operator visibility / journald
-        print(line, flush=True)
-        # durable local log
-        Path(args.log).parent.mkdir(parents=True, exist_ok=True)
-        with open(args.log, "a", encoding="utf-8") as f:
-            f.write(line + "\n")
-
-        if args.exec:
-            # keep it simple: delegate hardware to an explicit operator-provided command
-            proc = await asyncio.create_subprocess_shell(
-                args.exec,
-                env={
-                    **os.environ,
-                    "HW_ALERT_SEVERITY": alert.severity,
-                    "HW_ALERT_ID": alert.alert_id,
-                },
+    async def on_alert(data: RawBody) -> None:
+        received = time.monotonic()
+        received_at = time.time()
+        try:
+            alert = decode_alert(data, mode=args.decode)
+        except ValueError:
+            INVALID.inc()
+            log.warning("dropped invalid alert")
+            return
+        RECEIVED.labels(alert.severity).inc()
+        # Critical alerts are on disk before the siren/strobe command runs, but a failing
+        # log disk must not hold the siren back: the actuator is dispatched regardless.
+        try:
+            await writer.write(
+                _log_line(data, alert), IndexEntry.of(alert), sync=alert.severity == "critical"
+            )
+        except Exception:
+            UNLOGGED.labels(alert.severity).inc()
+            log.exception(
+                "alert log commit failed; dispatching anyway",
+                extra={"alert_id": alert.alert_id, "severity": alert.severity},
             )
-            await proc.wait()
+
+        trace = None if alert.trace is None else {**alert.trace, "received_at": received_at}
+        if actuator is not None:
+            # Runs in the background: a slow siren never holds up the next alert.
+            actuator.dispatch(alert, received=received, trace=trace)
+        elif trace is not None:
+            tracer.observe(trace)
+        HANDLING_SECONDS.labels(alert.severity).observe(time.monotonic() - received)
         log.info(
             "alert handled",
             extra={
@@ -68,28 +285,145 @@ async def _run(args: argparse.Namespace) -> int:
             },
         )
 
-    await bus.subscribe_json(args.sub, on_alert, queue="alerts")
+    async def on_batch(batch: list[RawBody]) -> None:
+        for data in batch:
+            await on_alert(data)
+
+    if args.jetstream:
+        # Durable consumer: alerts published while hw-alerts was down are handled on start.
+        await bus.ensure_streams(events_max_bytes=int(args.jetstream_events_max_mb * (1 << 20)))
+        await bus.consume_durable(args.sub, on_batch, durable=args.durable, batch=64)
+    else:
+        await bus.subscribe_raw(args.sub, on_alert, queue="alerts")
     await stop.wait()
-    log.info("shutting down")
+    stats = writer.stats()
+    if actuator is not None:
+        stats.update(actuator.stats())
+    log.info("shutting down", extra={**stats, "latency": tracer.report()})
+    await metrics.close()
     await bus.close()
+    if actuator is not None:
+        await actuator.close()
+    await writer.close()
+    return 0
+
+
+def _parse_rebuild_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        prog="hw-alerts rebuild",
+        description="Rebuild the alert log from the JetStream alerts stream",
+    )
+    p.add_argument("--nats", default=os.getenv("HW_NATS_URL", "nats://127.0.0.1:4222"))
+    p.add_argument("--out", required=True, help="Alert log path to write segments for")
+    p.add_argument("--force", action="store_true", help="Replace existing segments of --out")
+    return p.parse_args(argv)
+
+
+def _log_files(path: Path) -> list[Path]:
+    """Every file of the segmented log at `path`: segments, their indexes and the names."""
+    files = [
+        base.parent / (base.name + suffix)
+        for base in segment_bases(path.parent, path.stem)
+        for suffix in (".ndjson", ".idx", ".json")
+    ]
+    files.append(path.parent / f"{path.stem}.names.json")
+    return [f for f in files if f.exists()]
+
+
+async def _rebuild(args: argparse.Namespace) -> int:
+    out = Path(args.out)
+    if _log_files(out) and not args.force:
+        raise SystemExit(f"{args.out} has log segments; pass --force to replace them")
+
+    # The existing log may be the only copy: nothing is touched until the whole stream has
+    # been read into a staging directory next to it.
+    bus = NatsBus(args.nats)
+    await bus.connect()
+    staging = out.parent / f".{out.stem}.rebuild"
+    shutil.rmtree(staging, ignore_errors=True)
+    written = invalid = 0
+    try:
+        if await bus.stream_info(ALERTS_STREAM) is None:
+            raise SystemExit(f"no {ALERTS_STREAM} stream on {args.nats}; nothing to rebuild from")
+        store = SegmentedLog(staging / out.name)
+        store.open()
+        try:
+            async for batch in bus.read_stream(ALERTS_STREAM):
+                for data in batch:
+                    try:
+                        alert = decode_alert(data)
+                    except ValueError:
+                        invalid += 1
+                        continue
+                    store.append(_log_line(data, alert), IndexEntry.of(alert))
+                    written += 1
+        finally:
+            store.close()
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    finally:
+        await bus.close()
+
+    _swap_in(staging / out.name, out)
+    print(json.dumps({"out": args.out, "alerts": written, "invalid": invalid}))
+    return 0
+
+
+def _swap_in(staged: Path, out: Path) -> None:
+    # Old files are set aside (not deleted) until the new ones are in place.
+    replaced = out.parent / f".{out.stem}.replaced"
+    shutil.rmtree(replaced, ignore_errors=True)
+    replaced.mkdir()
+    for f in _log_files(out):
+        f.rename(replaced / f.name)
+    for f in _log_files(staged):
+        f.rename(out.parent / f.name)
+    shutil.rmtree(staged.parent)
+    shutil.rmtree(replaced)
+
+
+def _parse_query_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        prog="hw-alerts query",
+        description="Print logged alerts (NDJSON) by time range, severity, camera and rule",
+    )
+    p.add_argument("--log", default=os.getenv("HW_ALERT_LOG", "alerts.ndjson"))
+    p.add_argument("--since", type=_iso, help="ISO 8601 start (inclusive; naive = UTC)")
+    p.add_argument("--until", type=_iso, help="ISO 8601 end (exclusive; naive = UTC)")
+    p.add_argument("--severity", action="append", default=[], choices=SEVERITIES)
+    p.add_argument("--camera", action="append", default=[])
+    p.add_argument("--rule", action="append", default=[])
+    p.add_argument("--limit", type=int, default=None)
+    return p.parse_args(argv)
+
+
+def _iso(value: str) -> datetime:
+    ts = datetime.fromisoformat(value)
+    return ts if ts.tzinfo is not None else ts.replace(tzinfo=UTC)
+
+
+def _query(args: argparse.Namespace) -> int:
+    out = sys.stdout.buffer
+    for line in query(
+        args.log,
+        start=args.since,
+        end=args.until,
+        severities=args.severity,
+        cameras=args.camera,
+        rules=args.rule,
+        limit=args.limit,
+    ):
+        out.write(line + b"\n")
+    out.flush()
     return 0
 
 
 def main(argv: list[str] | None = None) -> None:
-    args = _parse_args(sys.argv[1:] if argv is None else argv)
-    # touch log early with a header comment for human readers
-    if args.log:
-        Path(args.log).parent.mkdir(parents=True, exist_ok=True)
-        with open(args.log, "a", encoding="utf-8") as f:
-            f.write(
-                json.dumps(
-                    {
-                        "ts": datetime.now(UTC).isoformat(),
-                        "note": "hoistwaywatch alerts log start",
-                    },
-                    separators=(",", ":"),
-                )
-                + "\n"
-            )
-    raise SystemExit(asyncio.run(_run(args)))
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["rebuild"]:
+        raise SystemExit(asyncio.run(_rebuild(_parse_rebuild_args(argv[1:]))))
+    if argv[:1] == ["query"]:
+        raise SystemExit(_query(_parse_query_args(argv[1:])))
+    raise SystemExit(asyncio.run(_run(_parse_args(argv))))
 
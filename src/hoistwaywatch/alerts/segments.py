@@ -0,0 +1,386 @@
+"""
+Segmented, indexed alert log.
+
+For a log path like `data/alerts.ndjson` the files are, in `data/`:
+- `alerts-<start_ms>.ndjson`: alert lines of one segment, as they were received
+- `alerts-<start_ms>.idx`: one `INDEX_DTYPE` record per line (time, byte range, codes)
+- `alerts-<start_ms>.json`: written when the segment is sealed: time range, count and
+  severity/camera/rule bitmasks, so queries skip segments without reading their index
+- `alerts.names.json`: camera and rule dictionaries; the codes are shared by all segments
+
+Segments rotate by size and age. Sealed segments older than the retention period are deleted.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import IO, Any, get_args
+
+import numpy as np
+
+from hoistwaywatch.contracts.alerts import Severity
+from hoistwaywatch.contracts.decode import Alert, AlertEnvelope
+
+INDEX_DTYPE = np.dtype(
+    [
+        ("ts_ms", "<i8"),
+        ("offset", "<u8"),
+        ("length", "<u4"),
+        ("severity", "u1"),
+        ("_pad", "u1"),
+        ("camera", "<u2"),
+        ("rule", "<u2"),
+    ]
+)
+SEVERITIES: tuple[str, ...] = get_args(Severity)
+# Code 0 is "no camera" / "no rule"; dictionary names start at 1.
+_MAX_CODE = 0xFFFF
+
+
+@dataclass(frozen=True, slots=True)
+class IndexEntry:
+    """The fields of an alert the index stores next to its byte range."""
+
+    ts: datetime
+    severity: str
+    camera_id: str | None = None
+    rule_id: str | None = None
+
+    @classmethod
+    def of(cls, alert: Alert) -> IndexEntry:
+        if isinstance(alert, AlertEnvelope):
+            rule_id = alert.rule_id
+        else:
+            rule_id = alert.explanation.rule_id
+        return cls(alert.ts, alert.severity, alert.camera_id, rule_id)
+
+
+class _Names:
+    """Append-only name -> code dictionary persisted as `<stem>.names.json`."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        self.cameras: list[str] = []
+        self.rules: list[str] = []
+        if path.exists():
+            raw = json.loads(path.read_text(encoding="utf-8"))
+            self.cameras = list(raw.get("cameras", []))
+            self.rules = list(raw.get("rules", []))
+        self._camera_codes = {n: i + 1 for i, n in enumerate(self.cameras)}
+        self._rule_codes = {n: i + 1 for i, n in enumerate(self.rules)}
+
+    def camera(self, name: str | None) -> int:
+        return self._code(name, self.cameras, self._camera_codes)
+
+    def rule(self, name: str | None) -> int:
+        return self._code(name, self.rules, self._rule_codes)
+
+    def lookup_cameras(self, names: Iterable[str]) -> list[int]:
+        return [self._camera_codes[n] for n in names if n in self._camera_codes]
+
+    def lookup_rules(self, names: Iterable[str]) -> list[int]:
+        return [self._rule_codes[n] for n in names if n in self._rule_codes]
+
+    def _code(self, name: str | None, names: list[str], codes: dict[str, int]) -> int:
+        if name is None:
+            return 0
+        code = codes.get(name)
+        if code is None:
+            if len(names) >= _MAX_CODE:
+                return 0
+            names.append(name)
+            code = codes[name] = len(names)
+            _write_json_atomic(self._path, {"cameras": self.cameras, "rules": self.rules})
+        return code
+
+
+class SegmentedLog:
+    """
+    Append side of the segmented log. Not thread-safe: one writer (AlertLogWriter's worker
+    thread) owns it. `append` only buffers; `sync` makes everything appended so far durable.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str],
+        *,
+        max_bytes: int = 64 << 20,
+        max_age_sec: float = 86_400.0,
+        retention_days: float = 0.0,
+    ) -> None:
+        path = Path(path)
+        self._dir = path.parent
+        self._stem = path.stem
+        self._max_bytes = max_bytes
+        self._max_age_sec = max_age_sec
+        self._retention_days = retention_days
+        self._names: _Names | None = None
+        self._base: Path | None = None
+        self._data: IO[bytes] | None = None
+        self._idx: IO[bytes] | None = None
+        self._opened_at = 0.0
+        self._record = np.zeros(1, dtype=INDEX_DTYPE)
+        self._summary: dict[str, Any] = {}
+        self.rotations = 0
+        self.expired = 0
+
+    def open(self) -> None:
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._names = _Names(self._dir / f"{self._stem}.names.json")
+        # Segments left unsealed by a crash or kill: summarize them from their index.
+        for base in segment_bases(self._dir, self._stem):
+            if not _file(base, ".json").exists():
+                _write_summary(base, _summarize(base))
+        self._expire()
+
+    def append(self, line: str, entry: IndexEntry) -> None:
+        assert self._names is not None, "open() first"
+        if self._data is None:
+            self._start_segment()
+        elif (
+            self._data.tell() >= self._max_bytes
+            or time.monotonic() - self._opened_at >= self._max_age_sec
+        ):
+            self._seal()
+            self._start_segment()
+        assert self._data is not None and self._idx is not None
+        data = (line + "\n").encode("utf-8")
+        rec = self._record[0]
+        rec["ts_ms"] = _ts_ms(entry.ts)
+        rec["offset"] = self._data.tell()
+        rec["length"] = len(data) - 1
+        rec["severity"] = SEVERITIES.index(entry.severity)
+        rec["camera"] = self._names.camera(entry.camera_id)
+        rec["rule"] = self._names.rule(entry.rule_id)
+        self._data.write(data)
+        self._idx.write(self._record.tobytes())
+        _add_to_summary(self._summary, rec)
+
+    def sync(self) -> None:
+        # Data before index: an index record never points past what is on disk.
+        for f in (self._data, self._idx):
+            if f is not None:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def close(self) -> None:
+        if self._data is not None:
+            self._seal()
+
+    def _start_segment(self) -> None:
+        start_ms = int(time.time() * 1000)
+        while (self._dir / f"{self._stem}-{start_ms:013d}.ndjson").exists():
+            start_ms += 1
+        self._base = self._dir / f"{self._stem}-{start_ms:013d}"
+        self._data = open(_file(self._base, ".ndjson"), "ab")
+        self._idx = open(_file(self._base, ".idx"), "ab")
+        self._opened_at = time.monotonic()
+        self._summary = _empty_summary()
+
+    def _seal(self) -> None:
+        assert self._base is not None and self._data is not None and self._idx is not None
+        self.sync()
+        self._data.close()
+        self._idx.close()
+        _write_summary(self._base, self._summary)
+        self._data = self._idx = None
+        self.rotations += 1
+        self._expire()
+
+    def _expire(self) -> None:
+        if self._retention_days <= 0:
+            return
+        cutoff = (time.time() - self._retention_days * 86_400.0) * 1000.0
+        for base in segment_bases(self._dir, self._stem):
+            if base == self._base and self._data is not None:
+                continue
+            summary = _read_summary(base)
+            if summary is None or summary["ts_max"] is None or summary["ts_max"] >= cutoff:
+                continue
+            for suffix in (".ndjson", ".idx", ".json"):
+                _file(base, suffix).unlink(missing_ok=True)
+            self.expired += 1
+
+
+def segment_bases(directory: Path, stem: str) -> list[Path]:
+    """Segment paths without suffix, oldest first."""
+    bases = [
+        p.with_suffix("")
+        for p in directory.glob(f"{stem}-*.ndjson")
+        if p.stem[len(stem) + 1 :].isdigit()
+    ]
+    return sorted(bases, key=lambda p: int(p.name[len(stem) + 1 :]))
+
+
+def query(
+    path: str | os.PathLike[str],
+    *,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    severities: Iterable[str] = (),
+    cameras: Iterable[str] = (),
+    rules: Iterable[str] = (),
+    limit: int | None = None,
+) -> Iterator[bytes]:
+    """
+    Yield the log lines (without newline) of alerts with `start <= ts < end` matching all
+    given filters (each filter matches any of its values), in time order per segment.
+    """
+    path = Path(path)
+    names = _Names(path.parent / f"{path.stem}.names.json")
+    start_ms = _ts_ms(start) if start is not None else None
+    end_ms = _ts_ms(end) if end is not None else None
+    severities, cameras, rules = list(severities), list(cameras), list(rules)
+    filters: list[tuple[str, list[int]]] = []
+    for field, wanted, codes in (
+        ("severity", severities, [SEVERITIES.index(s) for s in severities]),
+        ("camera", cameras, names.lookup_cameras(cameras)),
+        ("rule", rules, names.lookup_rules(rules)),
+    ):
+        if wanted and not codes:
+            return  # none of the requested names was ever logged
+        if codes:
+            filters.append((field, codes))
+
+    remaining = limit
+    for base in segment_bases(path.parent, path.stem):
+        summary = _read_summary(base)
+        if summary is not None and not _may_match(summary, start_ms, end_ms, filters):
+            continue
+        idx = _load_index(base)
+        if idx is None:
+            continue
+        mask = np.ones(len(idx), dtype=bool)
+        if start_ms is not None:
+            mask &= idx["ts_ms"] >= start_ms
+        if end_ms is not None:
+            mask &= idx["ts_ms"] < end_ms
+        for field, codes in filters:
+            mask &= np.isin(idx[field], codes)
+        hits = np.flatnonzero(mask)
+        if not len(hits):
+            continue
+        hits = hits[np.argsort(idx["ts_ms"][hits], kind="stable")]
+        if remaining is not None:
+            hits = hits[:remaining]
+        with open(_file(base, ".ndjson"), "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as data:
+            for i in hits:
+                offset = int(idx["offset"][i])
+                yield data[offset : offset + int(idx["length"][i])]
+        if remaining is not None:
+            remaining -= len(hits)
+            if remaining <= 0:
+                return
+
+
+def _may_match(
+    summary: dict[str, Any],
+    start_ms: int | None,
+    end_ms: int | None,
+    filters: list[tuple[str, list[int]]],
+) -> bool:
+    if not summary["count"]:
+        return False
+    if start_ms is not None and summary["ts_max"] < start_ms:
+        return False
+    if end_ms is not None and summary["ts_min"] >= end_ms:
+        return False
+    for field, codes in filters:
+        mask = summary[f"{field}_mask"]
+        if not any(mask >> code & 1 for code in codes):
+            return False
+    return True
+
+
+def _load_index(base: Path) -> np.ndarray | None:
+    path = _file(base, ".idx")
+    try:
+        # A torn trailing record (crash mid-append) is ignored.
+        n = path.stat().st_size // INDEX_DTYPE.itemsize
+    except FileNotFoundError:
+        return None
+    if n == 0:
+        return None
+    return np.memmap(path, dtype=INDEX_DTYPE, mode="r", shape=(n,))
+
+
+def _empty_summary() -> dict[str, Any]:
+    return {
+        "count": 0,
+        "ts_min": None,
+        "ts_max": None,
+        "severity_mask": 0,
+        "camera_mask": 0,
+        "rule_mask": 0,
+    }
+
+
+def _add_to_summary(summary: dict[str, Any], rec: np.void) -> None:
+    ts = int(rec["ts_ms"])
+    summary["count"] += 1
+    summary["ts_min"] = ts if summary["ts_min"] is None else min(summary["ts_min"], ts)
+    summary["ts_max"] = ts if summary["ts_max"] is None else max(summary["ts_max"], ts)
+    for field in ("severity", "camera", "rule"):
+        summary[f"{field}_mask"] |= 1 << int(rec[field])
+
+
+def _summarize(base: Path) -> dict[str, Any]:
+    summary = _empty_summary()
+    idx = _load_index(base)
+    if idx is None:
+        return summary
+    summary["count"] = len(idx)
+    summary["ts_min"] = int(idx["ts_ms"].min())
+    summary["ts_max"] = int(idx["ts_ms"].max())
+    for field in ("severity", "camera", "rule"):
+        mask = 0
+        for code in np.unique(idx[field]):
+            mask |= 1 << int(code)
+        summary[f"{field}_mask"] = mask
+    return summary
+
+
+def _read_summary(base: Path) -> dict[str, Any] | None:
+    try:
+        raw = json.loads(_file(base, ".json").read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None  # the segment being written
+    for field in ("severity", "camera", "rule"):
+        raw[f"{field}_mask"] = int(raw[f"{field}_mask"], 16)
+    return raw
+
+
+def _file(base: Path, suffix: str) -> Path:
+    return base.parent / (base.name + suffix)
+
+
+def _write_summary(base: Path, summary: dict[str, Any]) -> None:
+    # Masks are hex strings on disk: rule masks can be wider than JSON numbers allow.
+    out = dict(summary)
+    for field in ("severity", "camera", "rule"):
+        out[f"{field}_mask"] = format(summary[f"{field}_mask"], "x")
+    _write_json_atomic(_file(base, ".json"), out)
+
+
+def _write_json_atomic(path: Path, obj: Any) -> None:
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(obj, f, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _ts_ms(ts: datetime) -> int:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=UTC)
+    return int(ts.timestamp() * 1000)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import time
+from typing import IO
+
+from hoistwaywatch.alerts.segments import IndexEntry, SegmentedLog
+from hoistwaywatch.observability.metrics import REGISTRY, Registry
+
+_Item = tuple[str, IndexEntry, asyncio.Future[None] | None]
+
+
+class AlertLogWriter:
+    """
+    Group-committing writer for the alert log.
+
+    `write` only queues a line; one task owns the SegmentedLog and, off the event loop, appends
+    everything queued and fsyncs once per group: after `group_size` lines or `group_ms` after
+    the first line of the group, whichever comes first. A line written with `sync=True` closes
+    its group immediately and `write` returns only after it is on disk, so a critical alert
+    is durable before anything reacts to it. Lines are echoed to `echo` (stdout by default)
+    with one write per group.
+
+    If a commit fails for any reason (disk errors, a broken echo stream), waiters get the
+    error and the writer keeps going with the next group.
+    """
+
+    def __init__(
+        self,
+        store: SegmentedLog,
+        *,
+        group_size: int = 64,
+        group_ms: float = 50.0,
+        max_queued: int = 10_000,
+        echo: IO[str] | None = sys.stdout,
+        log: logging.Logger | None = None,
+        registry: Registry = REGISTRY,
+    ) -> None:
+        if group_size < 1:
+            raise ValueError("group_size must be >= 1")
+        self._store = store
+        self._group_size = group_size
+        self._group_sec = group_ms / 1000.0
+        self._queue: asyncio.Queue[_Item | None] = asyncio.Queue(maxsize=max_queued)
+        self._echo = echo
+        self._log = log or logging.getLogger(__name__)
+        self._task: asyncio.Task[None] | None = None
+        self.lines = 0
+        self.commits = 0
+        self.errors = 0
+        self.max_commit_ms = 0.0
+        registry.counter("hw_alerts_log_lines_total", "Alert log lines on disk").set_function(
+            lambda: self.lines
+        )
+        registry.counter("hw_alerts_log_errors_total", "Failed alert log commits").set_function(
+            lambda: self.errors
+        )
+        self._commit_seconds = registry.histogram(
+            "hw_alerts_log_commit_seconds", "Write + fsync time per alert log group"
+        )
+
+    async def start(self) -> None:
+        await asyncio.to_thread(self._store.open)
+        self._task = asyncio.create_task(self._run())
+
+    async def write(self, line: str, entry: IndexEntry, *, sync: bool = False) -> None:
+        """Queue one log line; with `sync`, wait until it has been fsynced."""
+        if not sync:
+            await self._queue.put((line, entry, None))
+            return
+        done = asyncio.get_running_loop().create_future()
+        await self._queue.put((line, entry, done))
+        await done
+
+    async def close(self) -> None:
+        """Commit whatever is queued, then seal the current segment."""
+        if self._task is not None:
+            await self._queue.put(None)
+            await self._task
+            self._task = None
+        await asyncio.to_thread(self._store.close)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        closing = False
+        while not closing:
+            item = await self._queue.get()
+            if item is None:
+                break
+            group = [item]
+            deadline = loop.time() + self._group_sec
+            while len(group) < self._group_size and group[-1][2] is None:
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), remaining)
+                    except TimeoutError:
+                        break
+                else:
+                    item = self._queue.get_nowait()
+                if item is None:
+                    closing = True
+                    break
+                group.append(item)
+            await self._commit(group)
+
+    async def _commit(self, group: list[_Item]) -> None:
+        started = time.monotonic()
+        error: BaseException | None = None
+        try:
+            await asyncio.to_thread(self._write_and_sync, group)
+        except Exception as exc:
+            error = exc
+            self.errors += 1
+            self._log.error("alert log write failed", extra={"error": repr(exc)})
+        else:
+            elapsed = time.monotonic() - started
+            self.lines += len(group)
+            self.commits += 1
+            self.max_commit_ms = max(self.max_commit_ms, elapsed * 1000.0)
+            self._commit_seconds.observe(elapsed)
+        for _, _, done in group:
+            if done is not None and not done.done():
+                if error is None:
+                    done.set_result(None)
+                else:
+                    done.set_exception(error)
+
+    def _write_and_sync(self, group: list[_Item]) -> None:
+        for line, entry, _ in group:
+            self._store.append(line, entry)
+        self._store.sync()
+        if self._echo is not None:
+            # stdout for operator visibility / journald
+            self._echo.write("".join(line + "\n" for line, _, _ in group))
+            self._echo.flush()
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "log_lines": self.lines,
+            "log_commits": self.commits,
+            "log_errors": self.errors,
+            "log_queued": self._queue.qsize(),
+            "log_max_commit_ms": round(self.max_commit_ms, 2),
+            "log_rotations": self._store.rotations,
+            "log_expired": self._store.expired,
+        }
@@ -0,0 +1,101 @@
+"""
+Wire codecs for NatsBus.
+
+Publishers tag every message with a `Content-Type` header; subscribers pick the decoder from
+that header, and treat messages without one as JSON (what services before codecs sent). So a
+site can move one service at a time to msgpack without a flag day, as long as the consumers
+of its subjects are upgraded first.
+
+- `json`: stdlib, always available (default)
+- `orjson`: same JSON on the wire, faster encode/decode (`pip install hoistwaywatch[orjson]`)
+- `msgpack`: binary, smaller messages (`pip install hoistwaywatch[msgpack]`)
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+CONTENT_TYPE = "Content-Type"
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+
+
+@dataclass(frozen=True)
+class Codec:
+    name: str
+    content_type: str
+    encode: Callable[[Any], bytes]
+    decode: Callable[[bytes], Any]
+
+
+def _json() -> Codec:
+    def encode(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+    return Codec("json", JSON, encode, json.loads)
+
+
+def _orjson() -> Codec:
+    import orjson
+
+    return Codec("orjson", JSON, orjson.dumps, orjson.loads)
+
+
+def _msgpack() -> Codec:
+    import msgpack
+
+    def encode(obj: Any) -> bytes:
+        return msgpack.packb(obj, use_bin_type=True)
+
+    def decode(data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False)
+
+    return Codec("msgpack", MSGPACK, encode, decode)
+
+
+_FACTORIES: dict[str, Callable[[], Codec]] = {"json": _json, "orjson": _orjson, "msgpack": _msgpack}
+CODEC_NAMES: tuple[str, ...] = tuple(_FACTORIES)
+
+
+def get_codec(name: str) -> Codec:
+    factory = _FACTORIES.get(name)
+    if factory is None:
+        raise ValueError(f"unknown codec {name!r} (choose from {', '.join(CODEC_NAMES)})")
+    try:
+        return factory()
+    except ImportError:
+        raise ValueError(
+            f"codec {name!r} needs an optional dependency: pip install hoistwaywatch[{name}]"
+        ) from None
+
+
+class CodecRegistry:
+    """
+    Decoders by content type. JSON is decoded with the fastest JSON codec configured, so a
+    service using `orjson` also reads plain-JSON publishers with orjson.
+    """
+
+    def __init__(self, preferred: Codec) -> None:
+        self._json = preferred if preferred.content_type == JSON else _json()
+        self._by_type: dict[str, Codec] = {JSON: self._json, preferred.content_type: preferred}
+
+    def for_headers(self, headers: dict[str, str] | None) -> Codec:
+        content_type = (headers or {}).get(CONTENT_TYPE, JSON)
+        codec = self._by_type.get(content_type)
+        if codec is None:
+            codec = self._by_type[content_type] = _by_content_type(content_type)
+        return codec
+
+
+def _by_content_type(content_type: str) -> Codec:
+    for factory in _FACTORIES.values():
+        try:
+            codec = factory()
+        except ImportError:
+            continue
+        if codec.content_type == content_type:
+            return codec
+    raise ValueError(f"no codec available for content type {content_type!r}")
@@ -1,17 +1,66 @@
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
-from collections.abc import Awaitable, Callable
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+from typing import Any
 
+import nats.errors
 from nats.aio.client import Client as NATS
+from nats.aio.subscription import Subscription
+from nats.js.api import AckPolicy, ConsumerConfig, DeliverPolicy, StreamConfig
+from nats.js.errors import NotFoundError
+
+from hoistwaywatch.bus.codecs import CONTENT_TYPE, JSON, CodecRegistry, get_codec
+from hoistwaywatch.bus.outbox import Outbox
+from hoistwaywatch.observability.metrics import REGISTRY, Registry
+
+# Message body as handed to subscribe_raw handlers: JSON bytes, or an already-decoded
+# object for binary codecs (contracts.decode accepts both).
+RawBody = bytes | dict[str, Any]
+
+# JetStream streams (optional; see NatsBus.ensure_streams).
+EVENTS_STREAM = "HW_EVENTS"
+ALERTS_STREAM = "HW_ALERTS"
+DEFAULT_EVENTS_MAX_BYTES = 1 << 30
 
 
 class NatsBus:
-    def __init__(self, url: str, *, name: str = "hoistwaywatch") -> None:
+    """
+    Publishes with the configured codec (see bus/codecs.py) and tags each message with its
+    Content-Type; subscribers decode by that header, so services on different codecs interoperate.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        *,
+        name: str = "hoistwaywatch",
+        codec: str = "json",
+        outbox: Outbox | None = None,
+        flush_interval_ms: float = 10.0,
+        registry: Registry = REGISTRY,
+    ) -> None:
         self._url = url
         self._nc = NATS()
         self._log = logging.getLogger(name)
+        self._codec = get_codec(codec)
+        self._headers = {CONTENT_TYPE: self._codec.content_type}
+        self._decoders = CodecRegistry(self._codec)
+        # With an outbox, publish_json only enqueues; a flusher task publishes whatever has
+        # accumulated and flushes once, at most every flush_interval_ms, and holds messages
+        # back while disconnected.
+        self._outbox = outbox
+        self._flush_interval = flush_interval_ms / 1000.0
+        self._wake = asyncio.Event()
+        self._flusher: asyncio.Task[None] | None = None
+        self._consumers: list[asyncio.Task[None]] = []
+        self.publish_errors = 0
+        self.ack_errors = 0
+        self.requeued = 0
+        self.published = 0
+        self.received = 0
+        self._register_metrics(registry)
 
     async def connect(self) -> None:
         async def _disconnected_cb() -> None:
@@ -19,6 +68,7 @@ class NatsBus:
 
         async def _reconnected_cb() -> None:
             self._log.info("nats reconnected", extra={"url": str(self._nc.connected_url)})
+            self._wake.set()
 
         async def _closed_cb() -> None:
             self._log.warning("nats connection closed")
@@ -37,16 +87,43 @@ class NatsBus:
             closed_cb=_closed_cb,
             error_cb=_error_cb,
         )
+        if self._outbox is not None:
+            self._flusher = asyncio.create_task(self._flush_loop())
 
     async def close(self) -> None:
+        for task in self._consumers:
+            task.cancel()
+        if self._flusher is not None:
+            # Wait for the flusher to stop: a batch it was cancelled in the middle of is back
+            # in the outbox for the final flush below.
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            if self._nc.is_connected:
+                await self._flush_outbox()
         try:
             await self._nc.drain()
         finally:
             await self._nc.close()
 
     async def publish_json(self, subject: str, payload: dict) -> None:
-        data = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
-        await self._nc.publish(subject, data)
+        """Publish a JSON-compatible dict, encoded with the bus codec (via the outbox, if any)."""
+        if self._outbox is not None:
+            self._outbox.put(subject, payload)
+            self._wake.set()
+            return
+        await self._nc.publish(subject, self._codec.encode(payload), headers=self._headers)
+        self.published += 1
+
+    async def publish_many(self, subject: str, payloads: Iterable[dict]) -> int:
+        """Publish a batch, then flush once so the whole batch reaches the server together."""
+        n = 0
+        for payload in payloads:
+            await self._nc.publish(subject, self._codec.encode(payload), headers=self._headers)
+            n += 1
+        if n:
+            await self._nc.flush()
+        self.published += n
+        return n
 
     async def subscribe_json(
         self,
@@ -56,8 +133,269 @@ class NatsBus:
         queue: str | None = None,
     ) -> None:
         async def _on_msg(msg) -> None:  # nats callback signature
-            body = json.loads(msg.data.decode("utf-8"))
+            body = self._decoders.for_headers(msg.headers).decode(msg.data)
+            self.received += 1
             await handler(body)
 
         await self._nc.subscribe(subject, cb=_on_msg, queue=queue)
 
+    async def subscribe_raw(
+        self,
+        subject: str,
+        handler: Callable[[RawBody], Awaitable[None]],
+        *,
+        queue: str | None = None,
+    ) -> Subscription:
+        """
+        Like subscribe_json, but JSON bodies are handed over undecoded so contracts.decode can
+        parse them straight into models; other codecs are decoded to a dict first. Returns
+        the subscription so callers can stop it before draining their own queues.
+        """
+
+        async def _on_msg(msg) -> None:  # nats callback signature
+            self.received += 1
+            await handler(self._raw_body(msg))
+
+        return await self._nc.subscribe(subject, cb=_on_msg, queue=queue)
+
+    async def ensure_streams(
+        self,
+        *,
+        events_max_age_sec: float = 7 * 86400,
+        events_max_bytes: int = DEFAULT_EVENTS_MAX_BYTES,
+        alerts_max_age_sec: float = 90 * 86400,
+    ) -> None:
+        """
+        Create (or update the limits of) the JetStream streams that persist all events and
+        alerts. Publishers need no change: streams capture plain publishes on their subjects.
+        Events arrive at motion rates from every camera, so their stream is also capped at
+        `events_max_bytes` (oldest dropped first) to fit an edge device's disk.
+        """
+        js = self._nc.jetstream()
+        for config in (
+            StreamConfig(
+                name=EVENTS_STREAM,
+                subjects=["hw.events.>"],
+                max_age=events_max_age_sec,
+                max_bytes=events_max_bytes,
+            ),
+            StreamConfig(name=ALERTS_STREAM, subjects=["hw.alerts.v1"], max_age=alerts_max_age_sec),
+        ):
+            try:
+                await js.stream_info(config.name)
+            except NotFoundError:
+                await js.add_stream(config)
+            else:
+                await js.update_stream(config)
+
+    async def consume_durable(
+        self,
+        subject: str,
+        handler: Callable[[list[RawBody]], Awaitable[None]],
+        *,
+        durable: str,
+        batch: int = 256,
+        max_ack_pending: int = 4096,
+        max_deliver: int = 5,
+    ) -> None:
+        """
+        Consume `subject` through a durable JetStream pull consumer, in batches of up to `batch`
+        messages. Each message is acked once `handler` has returned for its batch, so after a
+        restart consumption resumes at the first unhandled message (at-least-once: a crash
+        mid-batch redelivers that batch). A new durable starts with messages published from
+        then on. A batch whose handler raises is redelivered, at most `max_deliver` times.
+        Several instances may share one durable name to split the work.
+
+        Failed acks/naks (e.g. during a disconnect) are logged and counted; the server
+        redelivers those messages after its ack wait. The consumer only stops when cancelled,
+        and logs it if anything else ends it.
+        """
+        js = self._nc.jetstream()
+        psub = await js.pull_subscribe(
+            subject,
+            durable=durable,
+            config=ConsumerConfig(
+                ack_policy=AckPolicy.EXPLICIT,
+                deliver_policy=DeliverPolicy.NEW,
+                max_ack_pending=max_ack_pending,
+                max_deliver=max_deliver,
+            ),
+        )
+
+        self._consumers.append(self._consume(psub, handler, batch=batch, durable=durable))
+
+    def _consume(
+        self,
+        psub: Any,
+        handler: Callable[[list[RawBody]], Awaitable[None]],
+        *,
+        batch: int,
+        durable: str,
+    ) -> asyncio.Task[None]:
+        async def _loop() -> None:
+            while True:
+                try:
+                    msgs = await psub.fetch(batch, timeout=1.0)
+                except nats.errors.TimeoutError:
+                    continue
+                except nats.errors.Error:
+                    self._log.warning("jetstream fetch failed", exc_info=True)
+                    await asyncio.sleep(1.0)
+                    continue
+                self.received += len(msgs)
+                try:
+                    await handler([self._raw_body(m) for m in msgs])
+                except asyncio.CancelledError:
+                    task = asyncio.current_task()
+                    if task is not None and task.cancelling():
+                        raise  # consumer is shutting down; unacked messages are redelivered
+                    self._log.error("batch handler cancelled; batch will be redelivered")
+                    await self._settle(msgs, ack=False)
+                except Exception:
+                    self._log.exception("batch handler failed; batch will be redelivered")
+                    await self._settle(msgs, ack=False)
+                else:
+                    await self._settle(msgs, ack=True)
+
+        def _stopped(task: asyncio.Task[None]) -> None:
+            if not task.cancelled() and task.exception() is not None:
+                self._log.error(
+                    "jetstream consumer stopped",
+                    extra={"durable": durable},
+                    exc_info=task.exception(),
+                )
+
+        task = asyncio.create_task(_loop())
+        task.add_done_callback(_stopped)
+        return task
+
+    async def _settle(self, msgs: list[Any], *, ack: bool) -> None:
+        for m in msgs:
+            try:
+                await (m.ack() if ack else m.nak())
+            except Exception:
+                self.ack_errors += 1
+                self._log.warning("jetstream ack/nak failed", extra={"ack": ack}, exc_info=True)
+
+    async def stream_info(self, stream: str) -> Any | None:
+        """JetStream info of `stream`, or None if there is no such stream."""
+        try:
+            return await self._nc.jetstream().stream_info(stream)
+        except NotFoundError:
+            return None
+
+    async def read_stream(self, stream: str, *, batch: int = 512) -> AsyncIterator[list[RawBody]]:
+        """
+        Yield every message currently in `stream`, oldest first, in batches. Raises
+        TimeoutError if the stream stops delivering before its last message, so a partial
+        read is never mistaken for a complete one.
+        """
+        js = self._nc.jetstream()
+        info = await js.stream_info(stream)
+        last = info.state.last_seq
+        if info.state.messages == 0:
+            return
+        psub = await js.pull_subscribe(
+            info.config.subjects[0] if len(info.config.subjects) == 1 else ">",
+            stream=stream,
+            config=ConsumerConfig(ack_policy=AckPolicy.NONE, deliver_policy=DeliverPolicy.ALL),
+        )
+        try:
+            while True:
+                try:
+                    msgs = await psub.fetch(batch, timeout=2.0)
+                except nats.errors.TimeoutError:
+                    raise TimeoutError(f"{stream}: no messages before sequence {last}") from None
+                yield [self._raw_body(m) for m in msgs]
+                if msgs[-1].metadata.sequence.stream >= last:
+                    return
+        finally:
+            await psub.unsubscribe()
+
+    def _raw_body(self, msg: Any) -> RawBody:
+        codec = self._decoders.for_headers(msg.headers)
+        return msg.data if codec.content_type == JSON else codec.decode(msg.data)
+
+    def stats(self) -> dict[str, int]:
+        out = {
+            "pending_bytes": self._nc.pending_data_size,
+            "publish_errors": self.publish_errors,
+            "ack_errors": self.ack_errors,
+        }
+        if self._outbox is not None:
+            out["outbox_requeued"] = self.requeued
+            out.update({f"outbox_{k}": v for k, v in self._outbox.stats().items()})
+        return out
+
+    def _register_metrics(self, registry: Registry) -> None:
+        # Read from the counters above at scrape time: nothing extra on the publish path.
+        registry.counter(
+            "hw_bus_published_messages_total", "Messages handed to the NATS client"
+        ).set_function(lambda: self.published)
+        registry.counter(
+            "hw_bus_received_messages_total", "Messages received from subscriptions"
+        ).set_function(lambda: self.received)
+        registry.counter(
+            "hw_bus_publish_errors_total", "Failed publishes and flushes"
+        ).set_function(lambda: self.publish_errors)
+        registry.counter(
+            "hw_bus_ack_errors_total", "Failed JetStream acks and naks"
+        ).set_function(lambda: self.ack_errors)
+        registry.gauge(
+            "hw_bus_pending_bytes", "Bytes buffered in the NATS client"
+        ).set_function(lambda: self._nc.pending_data_size)
+        registry.gauge(
+            "hw_bus_connected", "1 while connected to NATS"
+        ).set_function(lambda: int(self._nc.is_connected))
+        if self._outbox is not None:
+            outbox = self._outbox
+            registry.gauge("hw_bus_outbox_queued", "Messages waiting in the outbox").set_function(
+                lambda: len(outbox)
+            )
+            registry.counter(
+                "hw_bus_outbox_coalesced_total", "Outbox messages replaced by a newer one"
+            ).set_function(lambda: outbox.coalesced)
+            registry.counter(
+                "hw_bus_outbox_requeued_total",
+                "Messages put back in the outbox after a failed publish or flush",
+            ).set_function(lambda: self.requeued)
+            registry.counter(
+                "hw_bus_outbox_dropped_total", "Outbox messages dropped while full"
+            ).set_function(lambda: outbox.dropped)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            if not self._nc.is_connected:
+                # Hold messages in the outbox (bounded by its policies) until reconnected.
+                continue
+            await self._flush_outbox()
+            await asyncio.sleep(self._flush_interval)
+
+    async def _flush_outbox(self) -> None:
+        # A batch counts as published only once its flush succeeded. Until then its messages
+        # may sit in the client's pending buffer, which a reconnect can lose, so on any failure
+        # the whole batch goes back to the outbox; messages that did get through are then
+        # sent twice (at-least-once).
+        assert self._outbox is not None
+        batch = self._outbox.take()
+        if not batch:
+            return
+        try:
+            for subject, payload in batch:
+                await self._nc.publish(subject, self._codec.encode(payload), headers=self._headers)
+            await self._nc.flush()
+        except Exception:
+            self.publish_errors += 1
+            self.requeued += len(batch)
+            self._outbox.requeue(batch)
+            self._log.warning("publish failed; batch kept in outbox", exc_info=True)
+            # Retry after the flush interval even if nothing else is published meanwhile.
+            self._wake.set()
+            return
+        except BaseException:
+            # Cancelled mid-batch (close()): keep it for the final flush.
+            self._outbox.requeue(batch)
+            raise
+        self.published += len(batch)
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from collections.abc import Callable, Hashable
+from typing import Any, Literal
+
+Policy = Literal["keep", "coalesce", "drop_oldest"]
+Message = tuple[str, dict[str, Any]]
+# Returns the policy for a message and, for "coalesce", the key it replaces older messages by.
+Classifier = Callable[[str, dict[str, Any]], tuple[Policy, Hashable]]
+
+# Safety-relevant signals are never dropped, however long the bus is away.
+_KEEP_TYPES = frozenset({"vision.tamper_or_occlusion.v1", "capture.camera_health.v1"})
+
+
+def classify(subject: str, payload: dict[str, Any]) -> tuple[Policy, Hashable]:
+    """
+    Default subject classes:
+    - alerts, tamper/occlusion and camera health: never dropped;
+    - motion: coalesced to the latest message per (camera, zone);
+    - lighting quality: coalesced to the latest message per camera;
+    - anything else: oldest dropped first when the outbox is full.
+    """
+    if subject.startswith("hw.alerts."):
+        return "keep", None
+    etype = payload.get("type")
+    if etype in _KEEP_TYPES:
+        return "keep", None
+    if etype == "vision.motion_in_zone.v1":
+        zone = (payload.get("payload") or {}).get("zone_id")
+        return "coalesce", (subject, etype, payload.get("camera_id"), str(zone))
+    if etype == "vision.lighting_quality.v1":
+        return "coalesce", (subject, etype, payload.get("camera_id"))
+    return "drop_oldest", None
+
+
+class Outbox:
+    """
+    Bounded publish queue between a service and its bus connection.
+
+    Messages of the "keep" class are held without limit (they are rare and must not be lost)
+    and always go out first. Everything else shares `max_pending` slots: a coalescing message
+    replaces the queued one with the same key, and when the slots are full the oldest message
+    is dropped. While the connection is down this is what bounds memory, instead of the
+    client's reconnect buffer.
+    """
+
+    def __init__(self, *, max_pending: int = 1000, classifier: Classifier = classify) -> None:
+        if max_pending < 1:
+            raise ValueError("max_pending must be >= 1")
+        self._max_pending = max_pending
+        self._classify = classifier
+        self._keep: deque[Message] = deque()
+        self._pending: OrderedDict[Hashable, Message] = OrderedDict()
+        self._seq = 0
+        self.enqueued = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._keep) + len(self._pending)
+
+    def put(self, subject: str, payload: dict[str, Any]) -> None:
+        self.enqueued += 1
+        policy, key = self._classify(subject, payload)
+        if policy == "keep":
+            self._keep.append((subject, payload))
+            return
+        if policy == "coalesce":
+            key = ("c", key)
+            if key in self._pending:
+                self._pending[key] = (subject, payload)
+                self.coalesced += 1
+                return
+        else:
+            self._seq += 1
+            key = ("s", self._seq)
+        self._pending[key] = (subject, payload)
+        if len(self._pending) > self._max_pending:
+            self._pending.popitem(last=False)
+            self.dropped += 1
+
+    def take(self, limit: int | None = None) -> list[Message]:
+        """Remove and return up to `limit` messages: all "keep" messages first, then FIFO."""
+        out: list[Message] = []
+        while self._keep and (limit is None or len(out) < limit):
+            out.append(self._keep.popleft())
+        while self._pending and (limit is None or len(out) < limit):
+            out.append(self._pending.popitem(last=False)[1])
+        return out
+
+    def requeue(self, messages: list[Message]) -> None:
+        """Put back messages that were taken but could not be published."""
+        for subject, payload in messages:
+            policy, key = self._classify(subject, payload)
+            if policy == "coalesce" and ("c", key) in self._pending:
+                continue  # superseded while it was out
+            self.put(subject, payload)
+            self.enqueued -= 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": len(self),
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+        }
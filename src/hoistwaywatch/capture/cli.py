@@ -8,10 +8,11 @@ import time
 import uuid
 from datetime import UTC, datetime
 
-import cv2
-
+from hoistwaywatch.bus.codecs import CODEC_NAMES
 from hoistwaywatch.bus.nats_bus import NatsBus
-from hoistwaywatch.observability import get_logger, setup_logging
+from hoistwaywatch.capture.shm import FrameRingWriter
+from hoistwaywatch.capture.source import open_capture
+from hoistwaywatch.observability import REGISTRY, MetricsExporter, get_logger, setup_logging
 from hoistwaywatch.util import wait_for_shutdown
 
 
@@ -21,6 +22,12 @@ def _parse_args(argv: list[str]) -> argparse.Namespace:
         description="HoistwayWatch capture health service",
     )
     p.add_argument("--nats", default=os.getenv("HW_NATS_URL", "nats://127.0.0.1:4222"))
+    p.add_argument(
+        "--codec",
+        choices=CODEC_NAMES,
+        default=os.getenv("HW_BUS_CODEC", "json"),
+        help="Wire codec for published messages; received messages are decoded by header.",
+    )
     p.add_argument("--site-id", default=os.getenv("HW_SITE_ID", "site_default"))
     p.add_argument("--camera-id", default=os.getenv("HW_CAMERA_ID", "cam1"))
     p.add_argument(
@@ -31,42 +38,105 @@ def _parse_args(argv: list[str]) -> argparse.Namespace:
     p.add_argument("--health-interval-sec", type=float, default=2.0)
     p.add_argument("--offline-after-sec", type=float, default=3.0)
     p.add_argument("--pub", default="hw.events.capture")
+    p.add_argument(
+        "--shm-name",
+        default=os.getenv("HW_FRAME_SHM", ""),
+        help="Publish decoded frames to this shared-memory ring for hw-vision (empty: off).",
+    )
+    p.add_argument("--shm-slots", type=int, default=8)
+    p.add_argument(
+        "--analysis-stride",
+        type=int,
+        default=int(os.getenv("HW_ANALYSIS_STRIDE", "1")),
+        help="Decode and publish every Nth frame to the shared-memory ring; all frames are "
+        "still grabbed so the stream stays drained.",
+    )
+    p.add_argument(
+        "--metrics-port",
+        type=int,
+        default=int(os.getenv("HW_METRICS_PORT", "9401")),
+        help="Serve Prometheus metrics on http://127.0.0.1:<port>/metrics (0: off).",
+    )
+    p.add_argument(
+        "--metrics-interval-sec",
+        type=float,
+        default=float(os.getenv("HW_METRICS_INTERVAL_SEC", "15")),
+        help="Publish a metrics snapshot on hw.metrics.capture this often (0: off).",
+    )
     return p.parse_args(argv)
 
 
-def _open_capture(source: str) -> cv2.VideoCapture:
-    # Numeric device index support
-    if source.isdigit():
-        return cv2.VideoCapture(int(source))
-    return cv2.VideoCapture(source)
-
-
 async def _run(args: argparse.Namespace) -> int:
     setup_logging(service="capture")
     log = get_logger("hoistwaywatch.capture", service="capture")
-    bus = NatsBus(args.nats)
+    bus = NatsBus(args.nats, codec=args.codec)
     await bus.connect()
 
     instance_id = f"capture-{uuid.uuid4().hex[:8]}"
     stop = wait_for_shutdown()
+    metrics = MetricsExporter(
+        service="capture",
+        port=args.metrics_port,
+        interval_sec=args.metrics_interval_sec,
+        bus=bus,
+        log=log,
+    )
+    await metrics.start()
+    frames = REGISTRY.counter("hw_capture_frames_total", "Frames grabbed from the source")
+    decoded = REGISTRY.counter(
+        "hw_capture_frames_decoded_total", "Grabbed frames retrieved into images"
+    )
+    read_failures = REGISTRY.counter("hw_capture_read_failures_total", "Failed source reads")
+    reopens = REGISTRY.counter("hw_capture_reopens_total", "Camera source reopen attempts")
+    read_seconds = REGISTRY.histogram("hw_capture_read_seconds", "Time blocked grabbing a frame")
 
-    cap = _open_capture(args.source)
+    cap = open_capture(args.source)
     last_ok = time.time()
     last_health = 0.0
+    # Single decoder per camera: hw-vision attaches to this ring instead of the source.
+    ring = FrameRingWriter(args.shm_name, slots=args.shm_slots) if args.shm_name else None
+    ring_rejected = 0
+    stride = max(1, args.analysis_stride)
+    index = 0
+    REGISTRY.gauge(
+        "hw_capture_frame_age_seconds", "Time since the last good frame"
+    ).set_function(lambda: time.time() - last_ok)
 
     try:
         while not stop.is_set():
-            ok, frame = cap.read()
+            # grab() every frame keeps the stream drained; only frames that go to the ring are
+            # retrieved, so health-only runs never convert a frame to an image.
+            started = time.monotonic()
+            ok = cap.grab()
+            grabbed = time.monotonic()
+            read_seconds.observe(grabbed - started)
 
             now = time.time()
-            if ok and frame is not None:
+            if ok:
+                frames.inc()
                 last_ok = now
+                if ring is not None and index % stride == 0:
+                    ok, frame = cap.retrieve()
+                    if ok and frame is not None:
+                        decoded.inc()
+                        if not ring.write(frame, captured_at=now, captured_mono=grabbed):
+                            if ring_rejected == 0:
+                                log.warning(
+                                    "frame larger than shared-memory slot; not published",
+                                    extra={"shape": list(frame.shape)},
+                                )
+                            ring_rejected += 1
+                    else:
+                        read_failures.inc()
+                index += 1
             else:
+                read_failures.inc()
                 # Attempt to reopen if source is unhealthy
                 if now - last_ok >= args.offline_after_sec and (not cap.isOpened()):
+                    reopens.inc()
                     log.warning("reopening camera source")
                     cap.release()
-                    cap = _open_capture(args.source)
+                    cap = open_capture(args.source)
 
             # Publish health periodically (even if frames are OK, to provide heartbeat)
             if now - last_health >= args.health_interval_sec:
@@ -98,7 +168,10 @@ async def _run(args: argparse.Namespace) -> int:
             await asyncio.sleep(0)
     finally:
         cap.release()
+        if ring is not None:
+            ring.close()
         log.info("shutting down")
+        await metrics.close()
         await bus.close()
 
 
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import os
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from hoistwaywatch.capture.source import Frame, ReaderStats
+
+# Ring layout (little endian):
+#   header: magic, version, slots, nonce (random per segment), slot_bytes,
+#           published (index of newest frame + 1; 0 = none)
+#   slots:  [slot header | frame bytes] * slots, right after the 32-byte header; each slot
+#           is a 64-byte slot header plus the frame bytes rounded up to a multiple of 64
+# Every slot is guarded by a seqlock: `seq` is odd while the writer is copying into it.
+_MAGIC = 0x48575246  # "HWRF"
+_VERSION = 2
+_HEADER = struct.Struct("<IIIIQQ")
+_SLOT = struct.Struct("<QQddIII")
+_PUBLISHED_OFFSET = 24
+_SLOT_HEADER_BYTES = 64
+_ALIGN = 64
+
+
+def _slot_stride(slot_bytes: int) -> int:
+    return _SLOT_HEADER_BYTES + (slot_bytes + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class FrameRingWriter:
+    """
+    Single-producer shared-memory ring of decoded frames (hw-capture side).
+
+    The segment is sized from the first frame written; later frames larger than a slot
+    are rejected (`write` returns False) rather than resizing under attached readers.
+    """
+
+    def __init__(self, name: str, *, slots: int = 8) -> None:
+        if slots < 2:
+            raise ValueError("frame ring needs at least 2 slots")
+        self.name = name
+        self._slots = slots
+        self._shm: shared_memory.SharedMemory | None = None
+        self._slot_bytes = 0
+        self._stride = 0
+        self._index = 0
+
+    def write(self, image: np.ndarray, *, captured_at: float, captured_mono: float) -> bool:
+        if image.dtype != np.uint8:
+            raise ValueError("frame ring only carries uint8 frames")
+        if self._shm is None:
+            self._create(image.nbytes)
+        if image.nbytes > self._slot_bytes:
+            return False
+        assert self._shm is not None
+        buf = self._shm.buf
+        h, w = image.shape[:2]
+        c = image.shape[2] if image.ndim == 3 else 1
+        base = _HEADER.size + (self._index % self._slots) * self._stride
+        seq = struct.unpack_from("<Q", buf, base)[0]
+
+        struct.pack_into("<Q", buf, base, seq + 1)  # odd: write in progress
+        data = base + _SLOT_HEADER_BYTES
+        dst = np.ndarray((image.nbytes,), dtype=np.uint8, buffer=buf, offset=data)
+        dst[:] = np.ascontiguousarray(image).reshape(-1)
+        _SLOT.pack_into(buf, base, seq + 1, self._index, captured_at, captured_mono, h, w, c)
+        struct.pack_into("<Q", buf, base, seq + 2)  # even: slot stable
+        self._index += 1
+        struct.pack_into("<Q", buf, _PUBLISHED_OFFSET, self._index)
+        return True
+
+    def close(self) -> None:
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def _create(self, slot_bytes: int) -> None:
+        self._slot_bytes = slot_bytes
+        self._stride = _slot_stride(slot_bytes)
+        size = _HEADER.size + self._slots * self._stride
+        try:
+            self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a crashed writer; readers re-attach once frames stop arriving.
+            stale = shared_memory.SharedMemory(name=self.name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+        nonce = int.from_bytes(os.urandom(4), "little")
+        _HEADER.pack_into(self._shm.buf, 0, _MAGIC, _VERSION, self._slots, nonce, slot_bytes, 0)
+
+
+class FrameRingReader:
+    """
+    Zero-copy reader for a FrameRingWriter segment (hw-vision side).
+
+    Same interface as LatestFrameReader. Returned images are views into shared memory;
+    the writer may reuse the slot after `slots` further frames, which `overwritten()`
+    detects so callers can discard results computed on a torn frame.
+    """
+
+    def __init__(
+        self, name: str, *, poll_sec: float = 0.002, reattach_after_sec: float = 3.0
+    ) -> None:
+        self._name = name
+        self._poll_sec = poll_sec
+        self._reattach_after_sec = reattach_after_sec
+        self._shm: shared_memory.SharedMemory | None = None
+        self._slots = 0
+        self._stride = 0
+        self._closed = False
+        self._last_progress = time.monotonic()
+        # Writer frame indexes restart at 0 in a new segment; keep ours monotonic. Re-attaching
+        # to the same segment (same nonce) keeps the offset, so a stalled writer's last frame
+        # is not handed out again under a new index.
+        self._offset = 0
+        self._nonce: int | None = None
+        self._last_index = -1
+        self.stats = ReaderStats()
+
+    @property
+    def is_opened(self) -> bool:
+        return self._shm is not None
+
+    def start(self) -> None:
+        self._attach()
+
+    def close(self) -> None:
+        self._closed = True
+        self._detach()
+
+    def latest(self, *, after: int = -1, timeout: float | None = None) -> Frame | None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._closed:
+            if self._shm is None and not self._attach():
+                self.stats.read_failures += 1
+            else:
+                frame = self._read_newest(after - self._offset)
+                if frame is not None:
+                    self._last_index = frame.index
+                    if after >= 0:
+                        self.stats.dropped += max(0, frame.index - after - 1)
+                    self.stats.frames += 1
+                    self._last_progress = time.monotonic()
+                    return frame
+                if time.monotonic() - self._last_progress >= self._reattach_after_sec:
+                    # A restarted writer creates a fresh segment under the same name.
+                    self._detach()
+                    self._last_progress = time.monotonic()
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self._poll_sec if self._shm is not None else 0.2)
+        return None
+
+    def overwritten(self, frame: Frame) -> bool:
+        """True if the writer has started reusing `frame`'s slot since it was returned."""
+        if self._shm is None:
+            return True
+        raw = frame.index - self._offset
+        if raw < 0:
+            return True
+        base = _HEADER.size + (raw % self._slots) * self._stride
+        seq, index = struct.unpack_from("<QQ", self._shm.buf, base)
+        return seq % 2 == 1 or index != raw
+
+    def _detach(self) -> None:
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                pass  # frames handed out are still alive; the mapping goes with them
+            self._shm = None
+
+    def _attach(self) -> bool:
+        try:
+            shm = shared_memory.SharedMemory(name=self._name)
+        except FileNotFoundError:
+            return False
+        # Readers must not unlink the writer's segment when they exit (Python < 3.13).
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+        magic, version, slots, nonce, slot_bytes, _ = _HEADER.unpack_from(shm.buf, 0)
+        if magic != _MAGIC or version != _VERSION or slots == 0:
+            shm.close()
+            return False
+        self._shm = shm
+        if nonce != self._nonce:
+            self._offset = self._last_index + 1
+            self._nonce = nonce
+        self._slots = slots
+        self._stride = _slot_stride(slot_bytes)
+        self.stats.reopens += 1
+        return True
+
+    def _read_newest(self, after: int) -> Frame | None:
+        assert self._shm is not None
+        buf = self._shm.buf
+        published = struct.unpack_from("<Q", buf, _PUBLISHED_OFFSET)[0]
+        # `after` is negative right after a re-attach, so any frame is then newer.
+        if published == 0 or published - 1 <= after:
+            return None
+        base = _HEADER.size + ((published - 1) % self._slots) * self._stride
+        for _ in range(3):
+            seq0 = struct.unpack_from("<Q", buf, base)[0]
+            if seq0 % 2 == 1:
+                continue
+            _, index, captured_at, captured_mono, h, w, c = _SLOT.unpack_from(buf, base)
+            shape = (h, w, c) if c > 1 else (h, w)
+            image = np.ndarray(shape, dtype=np.uint8, buffer=buf, offset=base + _SLOT_HEADER_BYTES)
+            if struct.unpack_from("<Q", buf, base)[0] == seq0:
+                return Frame(
+                    image=image,
+                    index=index + self._offset,
+                    captured_at=captured_at,
+                    captured_mono=captured_mono,
+                )
+        return None
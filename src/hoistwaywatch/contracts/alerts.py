@@ -1,9 +1,8 @@
 from __future__ import annotations
 
-from datetime import datetime
 from typing import Any, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import AwareDatetime, BaseModel, Field
 
 Severity = Literal["info", "warning", "critical"]
 
@@ -33,7 +32,7 @@ class AlertEvidence(BaseModel):
 class HwAlertPacketV1(BaseModel):
     schema_version: Literal[1] = 1
     alert_id: str
-    ts: datetime
+    ts: AwareDatetime
     site_id: str | None = None
     camera_id: str | None = None
     severity: Severity
@@ -44,4 +43,6 @@ class HwAlertPacketV1(BaseModel):
     trigger: AlertTrigger
     evidence: AlertEvidence | None = None
     debug: dict[str, Any] | None = None
+    # The triggering event's trace plus `evaluated_at`; see observability/tracing.py.
+    trace: dict[str, float] | None = None
 
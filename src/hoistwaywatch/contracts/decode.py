@@ -0,0 +1,167 @@
+"""
+Bytes-to-model decoding for bus messages.
+
+- `strict`: full Pydantic validation straight from the JSON bytes (`model_validate_json`).
+  Use for anything not produced by our own services.
+- `fast`: parse with pydantic-core's JSON parser and check only the envelope fields consumers
+  read (ids, type/severity, ts, camera, payload, trace) into a slotted struct. Meant for trusted
+  producers on the local bus; `source`, `explanation`, `evidence` etc. are not decoded.
+
+Both accept JSON bytes/str or an already-decoded dict (binary bus codecs), and raise
+ValueError subclasses (pydantic's ValidationError or DecodeError) on bad input.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Literal, get_args
+
+from pydantic_core import from_json
+
+from hoistwaywatch.contracts.alerts import HwAlertPacketV1, Severity
+from hoistwaywatch.contracts.events import EventType, HwEventV1
+
+DecodeMode = Literal["strict", "fast"]
+DECODE_MODES: tuple[str, ...] = get_args(DecodeMode)
+
+_EVENT_TYPES = frozenset(get_args(EventType))
+_SEVERITIES = frozenset(get_args(Severity))
+
+
+class DecodeError(ValueError):
+    """A message failed the fast-mode envelope checks."""
+
+
+@dataclass(slots=True)
+class EventEnvelope:
+    """Fast-mode hw-event: the fields RulesEngine reads, nothing else."""
+
+    event_id: str
+    type: str
+    ts: datetime
+    site_id: str | None
+    camera_id: str | None
+    correlation_id: str | None
+    payload: dict[str, Any]
+    trace: dict[str, float] | None = None
+
+
+@dataclass(slots=True)
+class AlertEnvelope:
+    """Fast-mode hw-alert: the fields hw-alerts reads, nothing else."""
+
+    alert_id: str
+    ts: datetime
+    site_id: str | None
+    camera_id: str | None
+    severity: str
+    hazard_score: float
+    summary: str
+    rule_id: str | None
+    trace: dict[str, float] | None = None
+
+
+Event = HwEventV1 | EventEnvelope
+Alert = HwAlertPacketV1 | AlertEnvelope
+
+
+def decode_event(data: bytes | str | dict[str, Any], *, mode: DecodeMode = "strict") -> Event:
+    if mode == "strict":
+        if isinstance(data, dict):
+            return HwEventV1.model_validate(data)
+        return HwEventV1.model_validate_json(data)
+    raw = _object(data)
+    if raw.get("type") not in _EVENT_TYPES:
+        raise DecodeError(f"unknown event type {raw.get('type')!r}")
+    payload = raw.get("payload", {})
+    if not isinstance(payload, dict):
+        raise DecodeError("`payload` must be an object")
+    return EventEnvelope(
+        event_id=_str(raw, "event_id"),
+        type=raw["type"],
+        ts=_ts(raw),
+        site_id=_opt_str(raw, "site_id"),
+        camera_id=_opt_str(raw, "camera_id"),
+        correlation_id=_opt_str(raw, "correlation_id"),
+        payload=payload,
+        trace=_trace(raw),
+    )
+
+
+def decode_alert(data: bytes | str | dict[str, Any], *, mode: DecodeMode = "strict") -> Alert:
+    if mode == "strict":
+        if isinstance(data, dict):
+            return HwAlertPacketV1.model_validate(data)
+        return HwAlertPacketV1.model_validate_json(data)
+    raw = _object(data)
+    if raw.get("severity") not in _SEVERITIES:
+        raise DecodeError(f"unknown severity {raw.get('severity')!r}")
+    score = raw.get("hazard_score")
+    if isinstance(score, bool) or not isinstance(score, int | float) or not 0 <= score <= 100:
+        raise DecodeError("`hazard_score` must be a number within 0..100")
+    return AlertEnvelope(
+        alert_id=_str(raw, "alert_id"),
+        ts=_ts(raw),
+        site_id=_opt_str(raw, "site_id"),
+        camera_id=_opt_str(raw, "camera_id"),
+        severity=raw["severity"],
+        hazard_score=float(score),
+        summary=_str(raw, "summary"),
+        rule_id=_rule_id(raw),
+        trace=_trace(raw),
+    )
+
+
+def _object(data: bytes | str | dict[str, Any]) -> dict[str, Any]:
+    raw = data if isinstance(data, dict) else from_json(data)
+    if not isinstance(raw, dict):
+        raise DecodeError("message must be a JSON object")
+    if raw.get("schema_version", 1) != 1:
+        raise DecodeError(f"unsupported schema_version {raw.get('schema_version')!r}")
+    return raw
+
+
+def _str(raw: dict[str, Any], key: str) -> str:
+    value = raw.get(key)
+    if not isinstance(value, str):
+        raise DecodeError(f"`{key}` must be a string")
+    return value
+
+
+def _opt_str(raw: dict[str, Any], key: str) -> str | None:
+    value = raw.get(key)
+    if value is not None and not isinstance(value, str):
+        raise DecodeError(f"`{key}` must be a string or null")
+    return value
+
+
+def _rule_id(raw: dict[str, Any]) -> str | None:
+    explanation = raw.get("explanation")
+    if not isinstance(explanation, dict):
+        return None
+    return _opt_str(explanation, "rule_id")
+
+
+def _trace(raw: dict[str, Any]) -> dict[str, float] | None:
+    trace = raw.get("trace")
+    if trace is None:
+        return None
+    if not isinstance(trace, dict) or not all(
+        isinstance(v, int | float) and not isinstance(v, bool) for v in trace.values()
+    ):
+        raise DecodeError("`trace` must be an object of numbers")
+    return trace
+
+
+def _ts(raw: dict[str, Any]) -> datetime:
+    value = raw.get("ts")
+    if not isinstance(value, str):
+        raise DecodeError("`ts` must be an ISO 8601 string")
+    try:
+        ts = datetime.fromisoformat(value)
+    except ValueError:
+        raise DecodeError(f"`ts` is not ISO 8601: {value!r}") from None
+    if ts.tzinfo is None:
+        raise DecodeError(f"`ts` has no UTC offset: {value!r}")
+    return ts
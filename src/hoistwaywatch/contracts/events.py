@@ -1,9 +1,8 @@
 from __future__ import annotations
 
-from datetime import datetime
 from typing import Any, Literal
 
-from pydantic import BaseModel, Field
+from pydantic import AwareDatetime, BaseModel, Field
 
 EventType = Literal[
     "capture.camera_health.v1",
@@ -24,11 +23,13 @@ class HwEventV1(BaseModel):
     schema_version: Literal[1] = 1
     event_id: str
     type: EventType
-    ts: datetime
+    ts: AwareDatetime
     site_id: str | None = None
     camera_id: str | None = None
     source: EventSource
     correlation_id: str | None = None
     payload: dict[str, Any] = Field(default_factory=dict)
     evidence: dict[str, Any] | None = None
+    # Stage -> wall-clock stamp (epoch seconds); see observability/tracing.py.
+    trace: dict[str, float] | None = None
 
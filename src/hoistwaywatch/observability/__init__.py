@@ -1,4 +1,15 @@
-__all__ = ["get_logger", "setup_logging"]
+__all__ = [
+    "REGISTRY",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MetricsExporter",
+    "Registry",
+    "TraceRecorder",
+    "get_logger",
+    "setup_logging",
+]
 
 from .logging import get_logger, setup_logging
-
+from .metrics import REGISTRY, Counter, Gauge, Histogram, MetricsExporter, Registry
+from .tracing import TraceRecorder
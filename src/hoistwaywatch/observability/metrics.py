@@ -0,0 +1,334 @@
+"""
+In-process metrics: counters, gauges and fixed-bucket histograms.
+
+Updates are plain attribute/list increments with no locks: each service updates its
+metrics from one event loop (or the GIL serializes the odd update from a worker thread),
+and a scrape that races an update is off by at most that one update. Metrics that mirror
+state already counted elsewhere (e.g. NatsBus.publish_errors) use `set_function` so the
+hot path is not touched at all.
+
+`MetricsExporter` serves the registry as Prometheus text on localhost and publishes a JSON
+snapshot on `hw.metrics.<service>` every few seconds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterator, Sequence
+from typing import Any, Protocol
+
+# Seconds: 100 us .. 10 s, roughly 1-2.5-5 steps.
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], Any] = {}
+
+    def labels(self, *values: object) -> Any:
+        """The child metric for one combination of label values (created on first use)."""
+        child = self._children.get(values)  # type: ignore[arg-type]
+        if child is not None:
+            return child
+        key = tuple(map(str, values))
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {key}")
+            child = self._children[key] = self._child()
+        return child
+
+    def _child(self) -> Any:
+        raise NotImplementedError
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        if not self.labelnames:
+            yield from self._own_samples({})
+            return
+        for key, child in list(self._children.items()):
+            yield from child._own_samples(dict(zip(self.labelnames, key, strict=True)))
+
+    def _own_samples(self, labels: dict[str, str]) -> Iterator[tuple[str, dict[str, str], float]]:
+        raise NotImplementedError
+
+
+class _Scalar(_Metric):
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self.value = 0.0
+        self._fn: Callable[[], float] | None = None
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """Read the value from `fn` at collection time instead of tracking it here."""
+        self._fn = fn
+
+    def get(self) -> float:
+        return float(self._fn()) if self._fn is not None else self.value
+
+    def _own_samples(self, labels: dict[str, str]) -> Iterator[tuple[str, dict[str, str], float]]:
+        yield self.name, labels, self.get()
+
+
+class Counter(_Scalar):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def _child(self) -> Counter:
+        return Counter(self.name, self.help)
+
+
+class Gauge(_Scalar):
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def _child(self) -> Gauge:
+        return Gauge(self.name, self.help)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # counts[i]: observations in (buckets[i-1], buckets[i]]; the last slot is +Inf.
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate of the q-quantile, interpolated within its bucket (NaN when empty)."""
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                if i == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+    def _child(self) -> Histogram:
+        return Histogram(self.name, self.help, buckets=self.buckets)
+
+    def _own_samples(self, labels: dict[str, str]) -> Iterator[tuple[str, dict[str, str], float]]:
+        cumulative = 0
+        for bound, n in zip((*self.buckets, math.inf), self.counts, strict=True):
+            cumulative += n
+            yield f"{self.name}_bucket", {**labels, "le": _fmt(bound)}, cumulative
+        yield f"{self.name}_sum", labels, self.sum
+        yield f"{self.name}_count", labels, self.count
+
+
+class Registry:
+    """Named metrics of one process. Asking for an existing name returns that metric."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        *,
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = Histogram(name, help, labelnames, buckets=buckets)
+        if not isinstance(metric, Histogram):
+            raise ValueError(f"metric {name!r} is already registered as a {metric.kind}")
+        return metric
+
+    def _get(self, cls: Any, name: str, help: str, labelnames: Sequence[str]) -> Any:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, help, labelnames)
+        if type(metric) is not cls:
+            raise ValueError(f"metric {name!r} is already registered as a {metric.kind}")
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                if labels:
+                    body = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                    lines.append(f"{name}{{{body}}} {_fmt(value)}")
+                else:
+                    lines.append(f"{name} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Compact JSON view: scalars as numbers, histograms as count/sum/p50/p99, labelled
+        metrics keyed by their label values joined with ','.
+        """
+        out: dict[str, Any] = {}
+        for metric in list(self._metrics.values()):
+            if not metric.labelnames:
+                out[metric.name] = _snap(metric)
+            else:
+                out[metric.name] = {
+                    ",".join(key): _snap(child) for key, child in list(metric._children.items())
+                }
+        return out
+
+
+def _snap(metric: Any) -> Any:
+    if isinstance(metric, Histogram):
+        p50, p99 = metric.quantile(0.5), metric.quantile(0.99)
+        return {
+            "count": metric.count,
+            "sum": round(metric.sum, 6),
+            "p50": None if math.isnan(p50) else round(p50, 6),
+            "p99": None if math.isnan(p99) else round(p99, 6),
+        }
+    return metric.get()
+
+
+def _fmt(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REGISTRY = Registry()
+
+
+class _Publisher(Protocol):
+    async def publish_json(self, subject: str, payload: dict) -> None: ...
+
+
+class MetricsExporter:
+    """
+    Serve `registry` at http://<host>:<port>/metrics (port 0: no endpoint) and publish
+    `registry.snapshot()` on `hw.metrics.<service>` every `interval_sec` (0: never).
+    """
+
+    def __init__(
+        self,
+        *,
+        service: str,
+        port: int,
+        interval_sec: float,
+        bus: _Publisher | None = None,
+        host: str = "127.0.0.1",
+        registry: Registry = REGISTRY,
+        log: logging.Logger | logging.LoggerAdapter | None = None,
+    ) -> None:
+        self._service = service
+        self._port = port
+        self._interval = interval_sec
+        self._bus = bus
+        self._host = host
+        self._registry = registry
+        self._log = log or logging.getLogger(__name__)
+        self._server: asyncio.Server | None = None
+        self._publisher: asyncio.Task[None] | None = None
+
+    async def start(self) -> None:
+        if self._port:
+            try:
+                self._server = await asyncio.start_server(self._serve, self._host, self._port)
+            except OSError:
+                # Metrics must never take a service down.
+                self._log.warning(
+                    "metrics endpoint unavailable", extra={"port": self._port}, exc_info=True
+                )
+        if self._interval > 0 and self._bus is not None:
+            self._publisher = asyncio.create_task(self._publish_loop())
+
+    async def close(self) -> None:
+        if self._publisher is not None:
+            self._publisher.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 5.0)
+            parts = request.split(b" ", 2)
+            path = parts[1].split(b"?", 1)[0] if len(parts) > 1 else b""
+            if parts[0] == b"GET" and path in (b"/metrics", b"/"):
+                body = self._registry.render().encode()
+                status, ctype = b"200 OK", b"text/plain; version=0.0.4; charset=utf-8"
+            else:
+                body, status, ctype = b"not found\n", b"404 Not Found", b"text/plain"
+            writer.write(
+                b"HTTP/1.1 " + status + b"\r\nContent-Type: " + ctype
+                + b"\r\nContent-Length: " + str(len(body)).encode()
+                + b"\r\nConnection: close\r\n\r\n" + body
+            )  # fmt: skip
+            await writer.drain()
+        except (TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _publish_loop(self) -> None:
+        assert self._bus is not None
+        subject = f"hw.metrics.{self._service}"
+        while True:
+            await asyncio.sleep(self._interval)
+            payload = {"service": self._service, "ts": time.time(), **self._registry.snapshot()}
+            try:
+                await self._bus.publish_json(subject, payload)
+            except Exception:
+                self._log.warning("metrics publish failed", exc_info=True)
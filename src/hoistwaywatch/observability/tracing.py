@@ -0,0 +1,107 @@
+"""
+End-to-end latency tracing, frame capture -> actuator start.
+
+Traced messages carry a `trace` object of wall-clock stamps (epoch seconds), one per stage:
+
+    captured_at   frame grabbed from the camera (vision, from the frame)
+    published_at  event handed to the bus (vision)
+    evaluated_at  rule matched and alert built (rules, copied from the event)
+    received_at   alert decoded (alerts)
+    actuated_at   actuator action started (alerts)
+
+Each stage only adds its own key, so a trace shows where the time went even when a stage is
+skipped (no actuator: the trace ends at receipt). Stamps from different hosts are only as
+comparable as their clocks; negative spans from clock skew are counted as zero.
+
+`TraceRecorder` turns finished traces into per-stage histograms and a p50/p99 report.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+
+from hoistwaywatch.observability.metrics import REGISTRY, Registry
+
+STAGES: tuple[str, ...] = (
+    "captured_at",
+    "published_at",
+    "evaluated_at",
+    "received_at",
+    "actuated_at",
+)
+END_TO_END = "end_to_end"
+
+# Seconds: 1 ms .. 10 s. Inter-process hops are rarely below a millisecond.
+TRACE_BUCKETS: tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)  # fmt: skip
+
+
+def stamp(message: dict[str, Any], stage: str, at: float | None = None) -> None:
+    """Add `stage` to the trace of a message about to be published (untraced: no-op)."""
+    trace = message.get("trace")
+    if trace is not None:
+        trace[stage] = time.time() if at is None else at
+
+
+def spans(trace: dict[str, float]) -> dict[str, float]:
+    """
+    Seconds between consecutive stamped stages ("captured_to_published", ...) and from the
+    first to the last stamp ("end_to_end"). Empty for traces with fewer than two stamps.
+    """
+    out: dict[str, float] = {}
+    first: float | None = None
+    prev: tuple[str, float] | None = None
+    for stage in STAGES:
+        at = trace.get(stage)
+        if at is None:
+            continue
+        if prev is None:
+            first = at
+        else:
+            out[f"{prev[0][:-3]}_to_{stage[:-3]}"] = max(0.0, at - prev[1])
+        prev = (stage, at)
+    if out and first is not None and prev is not None:
+        out[END_TO_END] = max(0.0, prev[1] - first)
+    return out
+
+
+class TraceRecorder:
+    """Per-span latency histograms (`hw_trace_span_seconds{span}`) for finished traces."""
+
+    def __init__(self, *, registry: Registry = REGISTRY) -> None:
+        self._seconds = registry.histogram(
+            "hw_trace_span_seconds",
+            "Time between pipeline stages of traced alerts (end_to_end: first to last stamp)",
+            ["span"],
+            buckets=TRACE_BUCKETS,
+        )
+        self.traces = 0
+
+    def observe(self, trace: dict[str, float]) -> None:
+        measured = spans(trace)
+        if not measured:
+            return
+        self.traces += 1
+        for span, seconds in measured.items():
+            self._seconds.labels(span).observe(seconds)
+
+    def report(self) -> dict[str, dict[str, float | int | None]]:
+        """{span: {count, p50_ms, p99_ms}} from the histograms (bucket-interpolated)."""
+        out: dict[str, dict[str, float | int | None]] = {}
+        for (span,), hist in sorted(self._seconds._children.items(), key=_span_order):
+            p50, p99 = hist.quantile(0.5), hist.quantile(0.99)
+            out[span] = {
+                "count": hist.count,
+                "p50_ms": None if hist.count == 0 else round(p50 * 1000.0, 2),
+                "p99_ms": None if hist.count == 0 else round(p99 * 1000.0, 2),
+            }
+        return out
+
+
+def _span_order(item: tuple[tuple[str, ...], object]) -> tuple[int, str]:
+    # Pipeline order; end_to_end last.
+    span = item[0][0]
+    first = f"{span.split('_to_', 1)[0]}_at"
+    return (STAGES.index(first) if first in STAGES else len(STAGES), span)
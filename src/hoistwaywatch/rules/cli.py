@@ -2,55 +2,232 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import json
 import os
 import sys
+from collections.abc import Iterator
 
+from hoistwaywatch.bus.codecs import CODEC_NAMES
 from hoistwaywatch.bus.nats_bus import NatsBus
-from hoistwaywatch.contracts.events import HwEventV1
-from hoistwaywatch.observability import get_logger, setup_logging
+from hoistwaywatch.contracts.decode import DECODE_MODES
+from hoistwaywatch.observability import REGISTRY, MetricsExporter, get_logger, setup_logging
+from hoistwaywatch.rules.consumer import BatchedEvaluator
 from hoistwaywatch.rules.engine import RulesEngine
+from hoistwaywatch.rules.replay import open_ndjson, replay
 from hoistwaywatch.util import wait_for_shutdown
 
+# Longest shutdown waits for queued events to be evaluated and their alerts published.
+_DRAIN_TIMEOUT_SEC = 10.0
+
 
 def _parse_args(argv: list[str]) -> argparse.Namespace:
     p = argparse.ArgumentParser(prog="hw-rules", description="HoistwayWatch rules service")
     p.add_argument("--nats", default=os.getenv("HW_NATS_URL", "nats://127.0.0.1:4222"))
+    p.add_argument(
+        "--codec",
+        choices=CODEC_NAMES,
+        default=os.getenv("HW_BUS_CODEC", "json"),
+        help="Wire codec for published messages; received messages are decoded by header.",
+    )
     p.add_argument("--rules", default=os.getenv("HW_RULES_PATH", "configs/rules.yaml"))
     p.add_argument("--sub", default="hw.events.>")
     p.add_argument("--pub", default="hw.alerts.v1")
     p.add_argument("--queue", default="rules")
+    p.add_argument(
+        "--state-max-entries",
+        type=int,
+        default=int(os.getenv("HW_RULES_STATE_MAX", "10000")),
+        help="Upper bound on correlation state keys (least recently updated are evicted).",
+    )
+    p.add_argument(
+        "--allowed-lateness-sec",
+        type=float,
+        default=float(os.getenv("HW_RULES_ALLOWED_LATENESS_SEC", "5.0")),
+        help="How far behind the newest event time an event may arrive and still correlate.",
+    )
+    p.add_argument(
+        "--max-clock-skew-sec",
+        type=float,
+        default=float(os.getenv("HW_RULES_MAX_CLOCK_SKEW_SEC", "60")),
+        help="How far ahead of this host a camera's clock may run and still advance its "
+        "event clock.",
+    )
+    p.add_argument(
+        "--batch-size",
+        type=int,
+        default=int(os.getenv("HW_RULES_BATCH_SIZE", "256")),
+        help="Most events evaluated (and alerts published with one flush) per batch.",
+    )
+    p.add_argument(
+        "--batch-ms",
+        type=float,
+        default=float(os.getenv("HW_RULES_BATCH_MS", "0")),
+        help="Longest a batch waits to fill after its first event (0 = take what is queued).",
+    )
+    p.add_argument(
+        "--max-in-flight",
+        type=int,
+        default=int(os.getenv("HW_RULES_MAX_IN_FLIGHT", "4096")),
+        help="Events received but not yet evaluated before the subscription is throttled.",
+    )
+    p.add_argument(
+        "--decode",
+        choices=DECODE_MODES,
+        default=os.getenv("HW_DECODE", "strict"),
+        help="strict: full validation; fast: envelope checks only, for trusted producers.",
+    )
+    p.add_argument(
+        "--jetstream",
+        action="store_true",
+        default=os.getenv("HW_JETSTREAM", "") == "1",
+        help="Consume through a durable JetStream consumer (resumes after restarts).",
+    )
+    p.add_argument("--durable", default="rules", help="JetStream durable consumer name.")
+    p.add_argument(
+        "--jetstream-events-max-mb",
+        type=float,
+        default=float(os.getenv("HW_JETSTREAM_EVENTS_MAX_MB", "1024")),
+        help="Size cap of the HW_EVENTS stream; oldest events are dropped beyond it.",
+    )
+    p.add_argument("--stats-interval-sec", type=float, default=60.0)
+    p.add_argument(
+        "--metrics-port",
+        type=int,
+        default=int(os.getenv("HW_METRICS_PORT", "9403")),
+        help="Serve Prometheus metrics on http://127.0.0.1:<port>/metrics (0: off).",
+    )
+    p.add_argument(
+        "--metrics-interval-sec",
+        type=float,
+        default=float(os.getenv("HW_METRICS_INTERVAL_SEC", "15")),
+        help="Publish a metrics snapshot on hw.metrics.rules this often (0: off).",
+    )
     return p.parse_args(argv)
 
 
 async def _run(args: argparse.Namespace) -> int:
     setup_logging(service="rules")
     log = get_logger("hoistwaywatch.rules", service="rules")
-    engine = RulesEngine.load_yaml(args.rules)
-    bus = NatsBus(args.nats)
+    engine = RulesEngine.load_yaml(
+        args.rules,
+        state_max_entries=args.state_max_entries,
+        allowed_lateness_sec=args.allowed_lateness_sec,
+        max_clock_skew_sec=args.max_clock_skew_sec,
+    )
+    bus = NatsBus(args.nats, codec=args.codec)
     await bus.connect()
     stop = wait_for_shutdown()
 
-    async def on_event(msg: dict) -> None:
-        try:
-            event = HwEventV1.model_validate(msg)
-        except Exception:
-            # Fail-loud but keep service alive: ignore malformed payloads.
-            log.warning("dropped invalid event")
-            return
-        alerts = engine.evaluate(event)
-        for alert in alerts:
-            await bus.publish_json(args.pub, alert.model_dump(mode="json"))
-        if alerts:
-            log.info("emitted alerts", extra={"count": len(alerts), "event_type": event.type})
-
-    await bus.subscribe_json(args.sub, on_event, queue=args.queue)
+    evaluator = BatchedEvaluator(
+        engine,
+        bus.publish_many,
+        subject=args.pub,
+        max_batch=args.batch_size,
+        max_wait_ms=args.batch_ms,
+        max_in_flight=args.max_in_flight,
+        decode=args.decode,
+        log=log,
+    )
+
+    for key in engine.stats():
+        # Correlation state (size, evictions, late drops...), read from the engine at scrape.
+        REGISTRY.gauge(f"hw_rules_{key}", f"Rules engine {key.replace('_', ' ')}").set_function(
+            lambda key=key: engine.stats()[key]
+        )
+    metrics = MetricsExporter(
+        service="rules",
+        port=args.metrics_port,
+        interval_sec=args.metrics_interval_sec,
+        bus=bus,
+        log=log,
+    )
+    await metrics.start()
+
+    async def report_stats() -> None:
+        while True:
+            await asyncio.sleep(args.stats_interval_sec)
+            log.info("rules engine stats", extra={**engine.stats(), **evaluator.stats()})
+
+    worker: asyncio.Task[None] | None = None
+    sub = None
+    if args.jetstream:
+        # Batches come straight from the durable consumer and are acked once evaluated and
+        # their alerts published.
+        await bus.ensure_streams(events_max_bytes=int(args.jetstream_events_max_mb * (1 << 20)))
+        await bus.consume_durable(
+            args.sub,
+            evaluator.process,
+            durable=args.durable,
+            batch=args.batch_size,
+            max_ack_pending=args.max_in_flight,
+        )
+    else:
+        sub = await bus.subscribe_raw(args.sub, evaluator.submit, queue=args.queue)
+        worker = asyncio.create_task(evaluator.run())
+    reporter = asyncio.create_task(report_stats())
     await stop.wait()
+    reporter.cancel()
     log.info("shutting down")
+    if worker is not None and sub is not None:
+        # Stop taking events, then evaluate and publish what is already queued.
+        await sub.unsubscribe()
+        try:
+            await asyncio.wait_for(evaluator.drain(), _DRAIN_TIMEOUT_SEC)
+        except TimeoutError:
+            log.warning("events left unevaluated at shutdown", extra=evaluator.stats())
+        worker.cancel()
+    await metrics.close()
     await bus.close()
     return 0
 
 
+def _parse_replay_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        prog="hw-rules replay",
+        description="Run recorded hw-events (NDJSON, optionally .gz) through the rulebook",
+    )
+    p.add_argument("events", nargs="+", help="Event log(s), replayed in the order given")
+    p.add_argument("--rules", default=os.getenv("HW_RULES_PATH", "configs/rules.yaml"))
+    p.add_argument("--out", default="", help="Write alerts here as NDJSON (default: discard)")
+    p.add_argument(
+        "--state-max-entries", type=int, default=int(os.getenv("HW_RULES_STATE_MAX", "10000"))
+    )
+    p.add_argument(
+        "--allowed-lateness-sec",
+        type=float,
+        default=float(os.getenv("HW_RULES_ALLOWED_LATENESS_SEC", "5.0")),
+    )
+    p.add_argument("--decode", choices=DECODE_MODES, default="strict")
+    return p.parse_args(argv)
+
+
+def _replay(args: argparse.Namespace) -> int:
+    engine = RulesEngine.load_yaml(
+        args.rules,
+        state_max_entries=args.state_max_entries,
+        allowed_lateness_sec=args.allowed_lateness_sec,
+        event_time=True,
+    )
+
+    def lines() -> Iterator[str]:
+        for path in args.events:
+            with open_ndjson(path) as f:
+                yield from f
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else None
+    try:
+        report = replay(engine, lines(), out, decode=args.decode)
+    finally:
+        if out is not None:
+            out.close()
+    print(json.dumps({"rules": args.rules, **report.as_dict(), **engine.stats()}, indent=2))
+    return 0
+
+
 def main(argv: list[str] | None = None) -> None:
-    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["replay"]:
+        raise SystemExit(_replay(_parse_replay_args(argv[1:])))
+    args = _parse_args(argv)
     raise SystemExit(asyncio.run(_run(args)))
 
@@ -0,0 +1,195 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any, get_args
+
+from hoistwaywatch.contracts.alerts import Severity
+from hoistwaywatch.contracts.events import EventType
+
+Predicate = Callable[[dict[str, Any]], bool]
+
+_WHEN_KEYS = {
+    "event_type",
+    "zone_id",
+    "status_in",
+    "motion_score_gte",
+    "confidence_gte",
+    "and_recent",
+}
+_THEN_KEYS = {"severity", "hazard_score", "summary", "recommended_action", "cooldown_sec"}
+_RECENT_KEYS = {"event_type", "zone_id", "within_sec", "min_count"}
+
+
+class RuleError(ValueError):
+    """A rule in the rulebook is malformed; raised at load time, never per event."""
+
+
+@dataclass(frozen=True, slots=True)
+class RecentRequirement:
+    event_type: str
+    zone_id: str | None
+    within_sec: float
+    # "N occurrences within T": at least min_count matching events in the window
+    min_count: int
+    # State key is f"{key_prefix}{camera_id}{key_suffix}" (see RulesEngine._ingest_state)
+    key_prefix: str
+    key_suffix: str
+
+    def key(self, camera_id: str) -> str:
+        return f"{self.key_prefix}{camera_id}{self.key_suffix}"
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledRule:
+    position: int
+    rule_id: str
+    event_type: str
+    zone_id: Any
+    predicates: tuple[Predicate, ...]
+    and_recent: tuple[RecentRequirement, ...]
+    cooldown_sec: float
+    severity: str
+    hazard_score: float
+    summary: str
+    recommended_action: str | None
+
+
+def compile_rules(raw_rules: Any) -> list[CompiledRule]:
+    if raw_rules is None:
+        return []
+    if not isinstance(raw_rules, list):
+        raise RuleError("`rules` must be a list")
+    compiled: list[CompiledRule] = []
+    seen: set[str] = set()
+    for pos, raw in enumerate(raw_rules):
+        rule = compile_rule(raw, position=pos)
+        if rule.rule_id in seen:
+            raise RuleError(f"rules[{pos}]: duplicate rule id {rule.rule_id!r}")
+        seen.add(rule.rule_id)
+        compiled.append(rule)
+    return compiled
+
+
+def compile_rule(raw: Any, *, position: int) -> CompiledRule:
+    where = f"rules[{position}]"
+    if not isinstance(raw, dict):
+        raise RuleError(f"{where}: rule must be a mapping")
+    rid = raw.get("id")
+    if not rid or not isinstance(rid, str):
+        raise RuleError(f"{where}: missing `id`")
+    where = f"rule {rid!r}"
+    when = raw.get("when", {})
+    then = raw.get("then", {})
+    if not isinstance(when, dict):
+        raise RuleError(f"{where}: `when` must be a mapping")
+    if not isinstance(then, dict):
+        raise RuleError(f"{where}: `then` must be a mapping")
+    _reject_unknown(where, "when", when, _WHEN_KEYS)
+    _reject_unknown(where, "then", then, _THEN_KEYS)
+
+    event_type = _event_type(where, when.get("event_type"))
+    predicates: list[Predicate] = []
+
+    status_in = when.get("status_in")
+    if status_in is not None:
+        if not isinstance(status_in, list):
+            raise RuleError(f"{where}: `when.status_in` must be a list")
+        allowed = frozenset(status_in)
+        predicates.append(lambda payload: payload.get("status") in allowed)
+
+    for field, key in (("motion_score", "motion_score_gte"), ("confidence", "confidence_gte")):
+        if when.get(key) is not None:
+            predicates.append(_gte(field, _number(where, f"when.{key}", when[key])))
+
+    and_recent: list[RecentRequirement] = []
+    reqs = when.get("and_recent")
+    if reqs:
+        if not isinstance(reqs, list):
+            raise RuleError(f"{where}: `when.and_recent` must be a list")
+        for i, req in enumerate(reqs):
+            rwhere = f"{where}: when.and_recent[{i}]"
+            if not isinstance(req, dict):
+                raise RuleError(f"{rwhere} must be a mapping")
+            _reject_unknown(rwhere, "requirement", req, _RECENT_KEYS)
+            et = _event_type(rwhere, req.get("event_type"))
+            within = _number(rwhere, "within_sec", req.get("within_sec", 2.0))
+            if within <= 0:
+                raise RuleError(f"{rwhere}: `within_sec` must be > 0")
+            min_count = req.get("min_count", 1)
+            if isinstance(min_count, bool) or not isinstance(min_count, int) or min_count < 1:
+                raise RuleError(f"{rwhere}: `min_count` must be an integer >= 1")
+            z = _zone_id(rwhere, "zone_id", req.get("zone_id"))
+            and_recent.append(
+                RecentRequirement(
+                    event_type=et,
+                    zone_id=z,
+                    within_sec=within,
+                    min_count=min_count,
+                    key_prefix=f"{et}|cam=",
+                    key_suffix="" if z is None else f"|zone={z}",
+                )
+            )
+
+    severity = then.get("severity", "warning")
+    if severity not in get_args(Severity):
+        raise RuleError(f"{where}: `then.severity` must be one of {list(get_args(Severity))}")
+    hazard_score = _number(where, "then.hazard_score", then.get("hazard_score", 50))
+    if not 0 <= hazard_score <= 100:
+        raise RuleError(f"{where}: `then.hazard_score` must be within 0..100")
+    cooldown = _number(where, "then.cooldown_sec", then.get("cooldown_sec", 0) or 0)
+    if cooldown < 0:
+        raise RuleError(f"{where}: `then.cooldown_sec` must be >= 0")
+    action = then.get("recommended_action")
+
+    return CompiledRule(
+        position=position,
+        rule_id=rid,
+        event_type=event_type,
+        zone_id=_zone_id(where, "when.zone_id", when.get("zone_id")),
+        predicates=tuple(predicates),
+        and_recent=tuple(and_recent),
+        cooldown_sec=cooldown,
+        severity=severity,
+        hazard_score=hazard_score,
+        summary=str(then.get("summary", rid)),
+        recommended_action=None if action is None else str(action),
+    )
+
+
+def _gte(field: str, threshold: float) -> Predicate:
+    def _check(payload: dict[str, Any]) -> bool:
+        try:
+            return float(payload.get(field, 0)) >= threshold
+        except (TypeError, ValueError):
+            return False
+
+    return _check
+
+
+def _event_type(where: str, value: Any) -> str:
+    if value not in get_args(EventType):
+        raise RuleError(f"{where}: unknown event_type {value!r}")
+    return value
+
+
+def _zone_id(where: str, key: str, value: Any) -> str | None:
+    # Zone ids in payloads are strings: anything else could never match.
+    if value is not None and not isinstance(value, str):
+        raise RuleError(f"{where}: `{key}` must be a string, got {value!r}")
+    return value
+
+
+def _number(where: str, key: str, value: Any) -> float:
+    if isinstance(value, bool):
+        raise RuleError(f"{where}: `{key}` must be a number, got {value!r}")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise RuleError(f"{where}: `{key}` must be a number, got {value!r}") from None
+
+
+def _reject_unknown(where: str, section: str, data: dict[str, Any], known: set[str]) -> None:
+    unknown = sorted(set(data) - known)
+    if unknown:
+        raise RuleError(f"{where}: unknown {section} key(s) {unknown}")
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import heapq
+import time
 import uuid
 from dataclasses import dataclass
 from datetime import UTC, datetime
@@ -13,7 +15,8 @@ from hoistwaywatch.contracts.alerts import (
     ExplanationInput,
     HwAlertPacketV1,
 )
-from hoistwaywatch.contracts.events import HwEventV1
+from hoistwaywatch.contracts.decode import Event
+from hoistwaywatch.rules.compiler import CompiledRule, RuleError, compile_rules
 from hoistwaywatch.rules.state import TTLState
 
 
@@ -28,112 +31,141 @@ class RuleMatch:
 
 
 class RulesEngine:
-    def __init__(self, config: dict[str, Any]) -> None:
+    def __init__(
+        self,
+        config: dict[str, Any],
+        *,
+        state_max_entries: int = 10_000,
+        allowed_lateness_sec: float = 5.0,
+        max_clock_skew_sec: float = 60.0,
+        event_time: bool = False,
+    ) -> None:
         self._config = config
-        self._rules: list[dict[str, Any]] = list(config.get("rules", []))
-        self._state = TTLState()
+        # Live: cooldowns and alert timestamps follow the wall clock. Replay/backtest: they
+        # follow the events' own `ts`, so a week of traffic behaves as it did on site.
+        self._event_time = event_time
+        # Malformed rules fail here (RuleError) instead of being skipped on every event.
+        self._rules: list[CompiledRule] = compile_rules(config.get("rules", []))
+        # Correlation state only has to remember event types some rule asks about, for as
+        # long as the longest window any rule asks about.
+        reqs = [req for rule in self._rules for req in rule.and_recent]
+        self._correlated_types = frozenset(req.event_type for req in reqs)
+        # Correlation runs in event time: a supporting event counts if its `ts` falls within
+        # `within_sec` before the triggering event's `ts` (or up to the allowed lateness
+        # after it, for producers whose clocks or deliveries are slightly out of order).
+        # Watermarks are per camera; live, a camera clock running more than
+        # `max_clock_skew_sec` ahead of ours does not move its watermark further.
+        self._state = TTLState(
+            max_entries=state_max_entries,
+            ttl_sec=max((req.within_sec for req in reqs), default=None),
+            history=max((req.min_count for req in reqs), default=1),
+            allowed_lateness_sec=allowed_lateness_sec,
+            max_skew_sec=None if event_time else max_clock_skew_sec,
+        )
         self._cooldowns: dict[str, float] = {}
+        # Candidate rules per (event_type, zone_id); zone_id None is the wildcard bucket for
+        # rules without a zone filter. Buckets are in rulebook order, and merged by position
+        # so alerts are still emitted in rulebook order.
+        self._index: dict[tuple[str, Any], list[CompiledRule]] = {}
+        for rule in self._rules:
+            self._index.setdefault((rule.event_type, rule.zone_id), []).append(rule)
 
     @staticmethod
-    def load_yaml(path: str) -> RulesEngine:
+    def load_yaml(
+        path: str,
+        *,
+        state_max_entries: int = 10_000,
+        allowed_lateness_sec: float = 5.0,
+        max_clock_skew_sec: float = 60.0,
+        event_time: bool = False,
+    ) -> RulesEngine:
         with open(path, encoding="utf-8") as f:
             cfg = yaml.safe_load(f)
         if not isinstance(cfg, dict):
             raise ValueError("rules config must be a mapping")
-        return RulesEngine(cfg)
-
-    def evaluate(self, event: HwEventV1) -> list[HwAlertPacketV1]:
+        try:
+            return RulesEngine(
+                cfg,
+                state_max_entries=state_max_entries,
+                allowed_lateness_sec=allowed_lateness_sec,
+                max_clock_skew_sec=max_clock_skew_sec,
+                event_time=event_time,
+            )
+        except RuleError as e:
+            raise RuleError(f"{path}: {e}") from None
+
+    def evaluate(self, event: Event) -> list[HwAlertPacketV1]:
         # Update correlation state (best-effort)
         self._ingest_state(event)
 
         alerts: list[HwAlertPacketV1] = []
-        for rule in self._rules:
+        for rule in self._candidates(event):
             match = self._match_rule(rule, event)
             if match is None:
                 continue
             alerts.append(self._to_alert(match, event))
         return alerts
 
-    def _ingest_state(self, event: HwEventV1) -> None:
+    def stats(self) -> dict[str, int]:
+        return {f"state_{k}": v for k, v in self._state.stats().items()}
+
+    def _candidates(self, event: Event) -> list[CompiledRule]:
+        wildcard = self._index.get((event.type, None), [])
+        zone_id = (event.payload or {}).get("zone_id")
+        try:
+            zoned = self._index.get((event.type, zone_id), []) if zone_id is not None else []
+        except TypeError:  # unhashable zone_id in payload: no zone rule can match it
+            zoned = []
+        if not zoned:
+            return wildcard
+        if not wildcard:
+            return zoned
+        return list(heapq.merge(wildcard, zoned, key=lambda r: r.position))
+
+    def _ingest_state(self, event: Event) -> None:
         # Store last-seen event payloads for correlation rules.
         # Key design: stable, explicit, easy to reason about.
-        if event.camera_id:
-            key = f"{event.type}|cam={event.camera_id}"
-            self._state.set(key, {"event_id": event.event_id, "payload": event.payload})
-        if event.camera_id and isinstance(event.payload, dict) and "zone_id" in event.payload:
-            key = f"{event.type}|cam={event.camera_id}|zone={event.payload.get('zone_id')}"
-            self._state.set(key, {"event_id": event.event_id, "payload": event.payload})
-
-    def _match_rule(self, rule: dict[str, Any], event: HwEventV1) -> RuleMatch | None:
-        rid = rule.get("id")
-        when = rule.get("when", {})
-        then = rule.get("then", {})
-        if not rid or not isinstance(when, dict) or not isinstance(then, dict):
-            return None
-
-        if when.get("event_type") != event.type:
-            return None
-
-        # Common filters (simple, explainable)
+        if event.type not in self._correlated_types or not event.camera_id:
+            return
+        ts = event.ts.timestamp()
+        value = {"event_id": event.event_id, "payload": event.payload}
+        cam = event.camera_id
+        self._state.set(f"{event.type}|cam={cam}", value, ts=ts, clock=cam)
+        if isinstance(event.payload, dict) and "zone_id" in event.payload:
+            key = f"{event.type}|cam={cam}|zone={event.payload.get('zone_id')}"
+            self._state.set(key, value, ts=ts, clock=cam)
+
+    def _match_rule(self, rule: CompiledRule, event: Event) -> RuleMatch | None:
+        # event_type and zone_id are already guaranteed by the index.
         payload = event.payload or {}
-
-        zone_id = when.get("zone_id")
-        if zone_id is not None and payload.get("zone_id") != zone_id:
-            return None
-
-        status_in = when.get("status_in")
-        if status_in is not None:
-            status = payload.get("status")
-            if status not in status_in:
+        for predicate in rule.predicates:
+            if not predicate(payload):
                 return None
 
-        def _gte(field: str, key: str) -> bool:
-            threshold = when.get(key)
-            if threshold is None:
-                return True
-            try:
-                return float(payload.get(field, 0)) >= float(threshold)
-            except Exception:
-                return False
-
-        if not _gte("motion_score", "motion_score_gte"):
-            return None
-        if not _gte("confidence", "confidence_gte"):
-            return None
-
         # Cooldown (avoid alert floods)
-        cooldown = float(then.get("cooldown_sec", 0) or 0)
-        if cooldown > 0:
+        rid = rule.rule_id
+        if rule.cooldown_sec > 0:
             last = self._cooldowns.get(rid, 0.0)
-            if (datetime.now(UTC).timestamp() - last) < cooldown:
+            if (self._now(event).timestamp() - last) < rule.cooldown_sec:
                 return None
 
         # Correlation: require recent supporting event(s)
-        and_recent = when.get("and_recent")
         supporting: list[tuple[str, dict[str, Any]]] = []
-        if and_recent:
-            if not isinstance(and_recent, list):
+        if rule.and_recent:
+            cam = event.camera_id
+            if not cam:
                 return None
-            for req in and_recent:
-                if not isinstance(req, dict):
-                    return None
-                et = req.get("event_type")
-                within = float(req.get("within_sec", 2.0))
-                z = req.get("zone_id")
-                cam = event.camera_id
-                if not cam or not et:
-                    return None
-                key = f"{et}|cam={cam}" if z is None else f"{et}|cam={cam}|zone={z}"
-                found = self._state.get_if_fresh(key, within_sec=within)
-                if found is None:
+            t = event.ts.timestamp()
+            end = t + self._state.allowed_lateness_sec
+            for req in rule.and_recent:
+                key = req.key(cam)
+                start = t - req.within_sec
+                if self._state.count(key, start=start, end=end) < req.min_count:
                     return None
+                found = self._state.latest(key, start=start, end=end)
+                assert found is not None
                 supporting.append((key, found))
 
-        severity = then.get("severity", "warning")
-        hazard_score = float(then.get("hazard_score", 50))
-        summary = str(then.get("summary", rid))
-        recommended_action = then.get("recommended_action")
-
         # Human-readable why (the “genius” part: trustable, auditable)
         why_parts: list[str] = [f"matched {rid}"]
         why_parts.append(f"type={event.type}")
@@ -149,23 +181,25 @@ class RulesEngine:
             why_parts.append(f"supporting={len(supporting)}")
 
         # Stamp cooldown now that we will emit
-        if cooldown > 0:
-            self._cooldowns[rid] = datetime.now(UTC).timestamp()
+        if rule.cooldown_sec > 0:
+            self._cooldowns[rid] = self._now(event).timestamp()
 
         return RuleMatch(
             rule_id=rid,
-            severity=severity,
-            hazard_score=hazard_score,
-            summary=summary,
-            recommended_action=recommended_action,
+            severity=rule.severity,
+            hazard_score=rule.hazard_score,
+            summary=rule.summary,
+            recommended_action=rule.recommended_action,
             why=", ".join(why_parts),
         )
 
-    def _to_alert(self, match: RuleMatch, event: HwEventV1) -> HwAlertPacketV1:
-        now = datetime.now(UTC)
+    def _now(self, event: Event) -> datetime:
+        return event.ts if self._event_time else datetime.now(UTC)
+
+    def _to_alert(self, match: RuleMatch, event: Event) -> HwAlertPacketV1:
         return HwAlertPacketV1(
             alert_id=f"al_{uuid.uuid4().hex}",
-            ts=now,
+            ts=self._now(event),
             site_id=event.site_id,
             camera_id=event.camera_id,
             severity=match.severity,  # type: ignore[arg-type]
@@ -182,5 +216,6 @@ class RulesEngine:
                 ],
             ),
             trigger=AlertTrigger(event_ids=[event.event_id], correlation_id=event.correlation_id),
+            trace=None if event.trace is None else {**event.trace, "evaluated_at": time.time()},
         )
 
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import gzip
+import time
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import IO, Any
+
+from hoistwaywatch.contracts.decode import DecodeMode, decode_event
+from hoistwaywatch.rules.engine import RulesEngine
+
+
+@dataclass
+class ReplayReport:
+    events: int = 0
+    invalid: int = 0
+    alerts: int = 0
+    elapsed_sec: float = 0.0
+    rule_hits: Counter[str] = field(default_factory=Counter)
+
+    def as_dict(self) -> dict[str, Any]:
+        eps = self.events / self.elapsed_sec if self.elapsed_sec > 0 else 0.0
+        return {
+            "events": self.events,
+            "invalid": self.invalid,
+            "alerts": self.alerts,
+            "elapsed_sec": round(self.elapsed_sec, 3),
+            "events_per_sec": round(eps, 1),
+            "rule_hits": dict(self.rule_hits.most_common()),
+        }
+
+
+def open_ndjson(path: str) -> IO[str]:
+    """Open a recorded event log; `.gz` files are decompressed on the fly."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def replay(
+    engine: RulesEngine,
+    lines: Iterable[str],
+    out: IO[str] | None,
+    *,
+    decode: DecodeMode = "strict",
+) -> ReplayReport:
+    """
+    Run recorded hw-events (one JSON object per line) through `engine` as fast as possible.
+
+    The engine should be built with `event_time=True` so cooldowns and alert timestamps follow
+    the recording rather than the replay. Lines that are not valid hw-events are counted and
+    skipped, as the live service does. Alerts are written to `out` as NDJSON.
+    """
+    report = ReplayReport()
+    started = time.perf_counter()
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            event = decode_event(line, mode=decode)
+        except ValueError:
+            report.invalid += 1
+            continue
+        report.events += 1
+        for alert in engine.evaluate(event):
+            report.alerts += 1
+            report.rule_hits[alert.explanation.rule_id] += 1
+            if out is not None:
+                out.write(alert.model_dump_json())
+                out.write("\n")
+    report.elapsed_sec = time.perf_counter() - started
+    return report
@@ -1,33 +1,184 @@
 from __future__ import annotations
 
+import bisect
+import heapq
 import time
-from dataclasses import dataclass
+from collections import OrderedDict
+from collections.abc import Callable
 from typing import Any
 
 
-@dataclass(frozen=True)
-class _Entry:
-    ts: float
-    value: dict[str, Any]
+class _History:
+    """Recent events of one key, sorted by event time, capped at `limit` (oldest dropped)."""
+
+    __slots__ = ("ts", "values")
+
+    def __init__(self) -> None:
+        self.ts: list[float] = []
+        self.values: list[dict[str, Any]] = []
+
+    def add(self, ts: float, value: dict[str, Any], limit: int) -> None:
+        i = bisect.bisect_right(self.ts, ts)
+        self.ts.insert(i, ts)
+        self.values.insert(i, value)
+        if len(self.ts) > limit:
+            del self.ts[0], self.values[0]
+
+    def span(self, start: float, end: float) -> tuple[int, int]:
+        return bisect.bisect_left(self.ts, start), bisect.bisect_right(self.ts, end)
 
 
 class TTLState:
     """
     Tiny in-memory TTL store for cross-event correlation.
     Field devices are single-node; persistence is not required for MVP correlation rules.
+
+    Everything runs in event time (the producers' `ts`), so bursts, reordering and replays
+    give the same answers as live traffic. Each key keeps a short history sorted by event
+    time; window lookups are two bisects.
+
+    Producers' clocks disagree, so there is one event clock per `clock` domain (the engine
+    uses the camera id): the newest `ts` seen from it. Events older than their domain's clock
+    minus `allowed_lateness_sec` (the watermark) are rejected. With `max_skew_sec`, a `ts`
+    advances its clock no further than the wall clock plus that allowance, so one camera
+    whose clock runs ahead cannot push its own watermark past everything it sends later.
+
+    Bounded two ways so a hub with many cameras (or one emitting junk zone ids) cannot grow
+    it forever:
+    - keys whose newest event is older than `ttl_sec` (the longest window any rule asks
+      about) on their own domain's clock are dropped, via an expiry heap purged on every
+      insert (O(log n));
+    - at most `max_entries` keys are kept, evicting the least recently updated.
     """
 
-    def __init__(self) -> None:
-        self._by_key: dict[str, _Entry] = {}
+    def __init__(
+        self,
+        *,
+        max_entries: int = 10_000,
+        ttl_sec: float | None = None,
+        history: int = 32,
+        allowed_lateness_sec: float = 5.0,
+        max_skew_sec: float | None = None,
+        wall_clock: Callable[[], float] = time.time,
+    ) -> None:
+        if max_entries < 1 or history < 1:
+            raise ValueError("max_entries and history must be >= 1")
+        self._by_key: OrderedDict[str, _History] = OrderedDict()
+        # At most one live heap record per key (`_armed`), re-armed on pop if the key was
+        # refreshed, so the heap is bounded by the number of keys rather than the event rate.
+        # Records are due on the newest clock of any domain, offset by how far the key's own
+        # domain was behind it; a popped key whose own clock has not passed its expiry is
+        # re-armed. Expiry can run late, never early, and lookups are windowed by `ts` anyway.
+        # Records of keys evicted by `max_entries` go stale and are compacted away.
+        self._expiry: list[tuple[float, str, str]] = []
+        self._armed: dict[str, tuple[float, str, str]] = {}
+        self._max_entries = max_entries
+        self._ttl_sec = ttl_sec
+        self._history = history
+        self.allowed_lateness_sec = allowed_lateness_sec
+        self.max_skew_sec = max_skew_sec
+        self._wall_clock = wall_clock
+        self._clocks: dict[str, float] = {}
+        self._newest = float("-inf")
+        self.evictions = 0
+        self.expirations = 0
+        self.late_dropped = 0
 
-    def set(self, key: str, value: dict[str, Any], *, ts: float | None = None) -> None:
-        self._by_key[key] = _Entry(ts=time.time() if ts is None else ts, value=value)
+    def __len__(self) -> int:
+        return len(self._by_key)
 
-    def get_if_fresh(self, key: str, *, within_sec: float) -> dict[str, Any] | None:
-        entry = self._by_key.get(key)
-        if entry is None:
-            return None
-        if (time.time() - entry.ts) > within_sec:
+    def clock(self, domain: str = "") -> float:
+        """Event clock of `domain`: the newest (skew-clamped) `ts` it has sent."""
+        return self._clocks.get(domain, float("-inf"))
+
+    def watermark(self, domain: str = "") -> float:
+        return self.clock(domain) - self.allowed_lateness_sec
+
+    def set(self, key: str, value: dict[str, Any], *, ts: float, clock: str = "") -> bool:
+        """
+        Record an event at event time `ts` on the `clock` domain; False if it arrived behind
+        that domain's watermark.
+        """
+        if ts < self.watermark(clock):
+            self.late_dropped += 1
+            return False
+        advance = ts
+        if self.max_skew_sec is not None:
+            advance = min(ts, self._wall_clock() + self.max_skew_sec)
+        now = self._clocks[clock] = max(self.clock(clock), advance)
+        self._newest = max(self._newest, now)
+        hist = self._by_key.get(key)
+        if hist is None:
+            hist = self._by_key[key] = _History()
+        else:
+            self._by_key.move_to_end(key)
+        hist.add(ts, value, self._history)
+        if self._ttl_sec is not None:
+            if key not in self._armed:
+                due = hist.ts[-1] + self._ttl_sec + (self._newest - now)
+                self._arm((due, key, clock))
+            self._purge()
+        while len(self._by_key) > self._max_entries:
+            evicted, _ = self._by_key.popitem(last=False)
+            self._armed.pop(evicted, None)
+            self.evictions += 1
+        if len(self._expiry) > 2 * len(self._armed) + 64:
+            self._expiry = list(self._armed.values())
+            heapq.heapify(self._expiry)
+        return True
+
+    def count(self, key: str, *, start: float, end: float) -> int:
+        """Number of events for `key` with start <= ts <= end."""
+        hist = self._by_key.get(key)
+        if hist is None:
+            return 0
+        lo, hi = hist.span(start, end)
+        return hi - lo
+
+    def latest(self, key: str, *, start: float, end: float) -> dict[str, Any] | None:
+        """Most recent (in event time) value for `key` with start <= ts <= end."""
+        hist = self._by_key.get(key)
+        if hist is None:
             return None
-        return entry.value
+        lo, hi = hist.span(start, end)
+        return hist.values[hi - 1] if hi > lo else None
+
+    def get_if_fresh(
+        self, key: str, *, within_sec: float, clock: str = ""
+    ) -> dict[str, Any] | None:
+        """Newest value seen within `within_sec` of the `clock` domain's event clock."""
+        now = self.clock(clock)
+        return self.latest(key, start=now - within_sec, end=now)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._by_key),
+            "max_entries": self._max_entries,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "late_dropped": self.late_dropped,
+        }
+
+    def _arm(self, record: tuple[float, str, str]) -> None:
+        heapq.heappush(self._expiry, record)
+        self._armed[record[1]] = record
 
+    def _purge(self) -> None:
+        ttl = self._ttl_sec
+        assert ttl is not None
+        newest = self._newest
+        while self._expiry and self._expiry[0][0] < newest:
+            record = heapq.heappop(self._expiry)
+            _, key, domain = record
+            if self._armed.get(key) is not record:
+                continue  # stale: the key was evicted (and maybe re-armed) since
+            hist = self._by_key[key]
+            now = self.clock(domain)
+            if hist.ts[-1] + ttl >= now:
+                # Refreshed since it was armed, or its domain's clock is behind the newest:
+                # wait until its own clock passes the expiry.
+                self._arm((hist.ts[-1] + ttl + (newest - now), key, domain))
+                continue
+            del self._armed[key]
+            del self._by_key[key]
+            self.expirations += 1
@@ -1,4 +1,4 @@
-__all__ = ["wait_for_shutdown"]
+__all__ = ["next_batch", "wait_for_shutdown"]
 
+from .batching import next_batch
 from .shutdown import wait_for_shutdown
-
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+
+async def next_batch(
+    queue: asyncio.Queue[Any], *, max_size: int, max_wait_sec: float
+) -> list[Any]:
+    """
+    Wait for one item, then keep collecting until `max_size` items or `max_wait_sec` has
+    passed since the first one arrived. Under load batches fill instantly; when traffic is
+    sparse a lone item waits at most `max_wait_sec`.
+    """
+    batch = [await queue.get()]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + max_wait_sec
+    while len(batch) < max_size:
+        if not queue.empty():
+            batch.append(queue.get_nowait())
+            continue
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), remaining))
+        except TimeoutError:
+            break
+    return batch
@@ -2,41 +2,57 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import functools
 import json
+import logging
+import multiprocessing as mp
 import os
 import sys
 import time
 import uuid
-from dataclasses import dataclass
 from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
 
-import cv2
-import numpy as np
-
+from hoistwaywatch.bus.codecs import CODEC_NAMES
 from hoistwaywatch.bus.nats_bus import NatsBus
-from hoistwaywatch.observability import get_logger, setup_logging
+from hoistwaywatch.bus.outbox import Outbox
+from hoistwaywatch.capture.shm import FrameRingReader
+from hoistwaywatch.capture.source import LatestFrameReader
+from hoistwaywatch.observability import REGISTRY, MetricsExporter, get_logger, setup_logging
+from hoistwaywatch.observability.tracing import stamp
 from hoistwaywatch.util import wait_for_shutdown
-
-
-@dataclass(frozen=True)
-class Zone:
-    zone_id: str
-    polygon_norm: list[tuple[float, float]]
-
-
-def _parse_args(argv: list[str]) -> argparse.Namespace:
-    p = argparse.ArgumentParser(
-        prog="hw-vision",
-        description="HoistwayWatch vision service (motion-in-zone)",
-    )
-    p.add_argument("--nats", default=os.getenv("HW_NATS_URL", "nats://127.0.0.1:4222"))
+from hoistwaywatch.vision.multicam import assign_cameras, drain, load_site_cameras, worker_main
+from hoistwaywatch.vision.offline import DEFAULT_WARMUP_FRAMES, Recording, run_offline
+from hoistwaywatch.vision.pipeline import MotionPipeline, PipelineConfig
+from hoistwaywatch.vision.scheduler import AnalysisScheduler, SchedulerConfig
+from hoistwaywatch.vision.zones import load_zones
+
+FRAMES = REGISTRY.counter("hw_vision_frames_analysed_total", "Frames analysed", ["camera"])
+DROPPED = REGISTRY.counter(
+    "hw_vision_frames_dropped_total", "Decoded frames replaced before analysis", ["camera"]
+)
+EVENTS = REGISTRY.counter("hw_vision_events_total", "Events published", ["camera", "type"])
+ANALYSIS_SECONDS = REGISTRY.histogram(
+    "hw_vision_analysis_seconds", "Analysis time per frame", ["camera"]
+)
+ZONE_SCORING_SECONDS = REGISTRY.histogram(
+    "hw_vision_zone_scoring_seconds", "Time to score all zones of a frame", ["camera"]
+)
+FRAME_AGE_SECONDS = REGISTRY.histogram(
+    "hw_vision_frame_age_seconds", "Age of a frame when its analysis starts", ["camera"]
+)
+CAMERA_ANALYSIS_FPS = REGISTRY.gauge(
+    "hw_vision_analysis_fps", "Frames analysed per second (--site mode)", ["camera"]
+)
+CAMERA_DECODE_FPS = REGISTRY.gauge(
+    "hw_vision_decode_fps", "Frames decoded per second (--site mode)", ["camera"]
+)
+
+
+def _add_pipeline_args(p: argparse.ArgumentParser) -> None:
+    """Analysis options shared by the live service and `hw-vision offline`."""
     p.add_argument("--site-id", default=os.getenv("HW_SITE_ID", "site_default"))
-    p.add_argument("--camera-id", default=os.getenv("HW_CAMERA_ID", "cam1"))
-    p.add_argument(
-        "--source",
-        default=os.getenv("HW_CAMERA_SOURCE", "0"),
-        help="OpenCV VideoCapture source (device index like 0, or RTSP URL).",
-    )
     p.add_argument("--zones", default=os.getenv("HW_ZONES_PATH", "configs/example-zones.json"))
     p.add_argument(
         "--motion-threshold",
@@ -69,204 +85,468 @@ def _parse_args(argv: list[str]) -> argparse.Namespace:
         type=float,
         default=float(os.getenv("HW_TAMPER_AFTER_SEC", "3.0")),
     )
+    p.add_argument(
+        "--process-width",
+        type=int,
+        default=int(os.getenv("HW_PROCESS_WIDTH", "0")),
+        help="Downscale frames to this width before analysis, e.g. 320-640 (0: native).",
+    )
+    p.add_argument(
+        "--roi",
+        action="store_true",
+        default=os.getenv("HW_ROI", "") == "1",
+        help="Run background subtraction only on the union bounding box of the zones.",
+    )
+    p.add_argument(
+        "--quality-interval-ms",
+        type=int,
+        default=int(os.getenv("HW_QUALITY_INTERVAL_MS", "200")),
+        help="Refresh cadence of lighting/tamper statistics (computed on a thumbnail).",
+    )
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        prog="hw-vision",
+        description="HoistwayWatch vision service (motion-in-zone)",
+    )
+    p.add_argument("--nats", default=os.getenv("HW_NATS_URL", "nats://127.0.0.1:4222"))
+    p.add_argument(
+        "--codec",
+        choices=CODEC_NAMES,
+        default=os.getenv("HW_BUS_CODEC", "json"),
+        help="Wire codec for published messages; received messages are decoded by header.",
+    )
+    p.add_argument("--camera-id", default=os.getenv("HW_CAMERA_ID", "cam1"))
+    _add_pipeline_args(p)
+    p.add_argument(
+        "--source",
+        default=os.getenv("HW_CAMERA_SOURCE", "0"),
+        help="OpenCV VideoCapture source (device index like 0, or RTSP URL).",
+    )
+    p.add_argument(
+        "--shm-name",
+        default=os.getenv("HW_FRAME_SHM", ""),
+        help="Read frames from hw-capture's shared-memory ring instead of opening --source.",
+    )
+    p.add_argument(
+        "--analysis-stride",
+        type=int,
+        default=int(os.getenv("HW_ANALYSIS_STRIDE", "1")),
+        help="Decode every Nth frame of --source; the rest are grabbed and skipped "
+        "(with --shm-name, set it on hw-capture instead).",
+    )
+    p.add_argument(
+        "--max-fps",
+        type=float,
+        default=float(os.getenv("HW_MAX_FPS", "0")),
+        help="Analysis rate while there is activity (0: every frame).",
+    )
+    p.add_argument(
+        "--idle-fps",
+        type=float,
+        default=float(os.getenv("HW_IDLE_FPS", "5")),
+        help="Analysis rate on a quiet, stable scene (0: never slow down).",
+    )
+    p.add_argument("--idle-after-sec", type=float, default=5.0)
+    p.add_argument(
+        "--cpu-budget",
+        type=float,
+        default=float(os.getenv("HW_CPU_BUDGET", "1.0")),
+        help="Fraction of one core each camera's analysis may use.",
+    )
     p.add_argument("--pub", default="hw.events.vision")
+    p.add_argument(
+        "--outbox-max",
+        type=int,
+        default=int(os.getenv("HW_BUS_OUTBOX_MAX", "1000")),
+        help="Droppable events held while the bus is slow or away (0: publish directly).",
+    )
+    p.add_argument(
+        "--flush-ms",
+        type=float,
+        default=float(os.getenv("HW_BUS_FLUSH_MS", "10")),
+        help="Minimum interval between outbox flushes.",
+    )
+    p.add_argument(
+        "--site",
+        default=os.getenv("HW_SITE_CONFIG", ""),
+        help="Site config (cameras: list); analyse all its cameras in one service.",
+    )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("HW_VISION_WORKERS", "0")),
+        help="Worker processes for --site mode (0: one per camera, capped at CPU count).",
+    )
+    p.add_argument(
+        "--health-interval-sec",
+        type=float,
+        default=float(os.getenv("HW_VISION_HEALTH_INTERVAL_SEC", "2")),
+        help="Publish capture.camera_health.v1 for the frames analysed here this often "
+        "(0: off; single-camera mode).",
+    )
+    p.add_argument(
+        "--stale-after-sec",
+        type=float,
+        default=float(os.getenv("HW_VISION_STALE_AFTER_SEC", "3")),
+        help="Report the camera stalled once the newest frame received is this old.",
+    )
+    p.add_argument("--stats-interval-sec", type=float, default=30.0)
+    p.add_argument(
+        "--metrics-port",
+        type=int,
+        default=int(os.getenv("HW_METRICS_PORT", "9402")),
+        help="Serve Prometheus metrics on http://127.0.0.1:<port>/metrics (0: off).",
+    )
+    p.add_argument(
+        "--metrics-interval-sec",
+        type=float,
+        default=float(os.getenv("HW_METRICS_INTERVAL_SEC", "15")),
+        help="Publish a metrics snapshot on hw.metrics.vision this often (0: off).",
+    )
     return p.parse_args(argv)
 
 
-def _open_capture(source: str) -> cv2.VideoCapture:
-    if source.isdigit():
-        return cv2.VideoCapture(int(source))
-    return cv2.VideoCapture(source)
+def _scheduler_config(args: argparse.Namespace) -> SchedulerConfig:
+    return SchedulerConfig(
+        max_fps=args.max_fps,
+        idle_fps=args.idle_fps,
+        idle_after_sec=args.idle_after_sec,
+        cpu_budget=args.cpu_budget,
+    )
 
 
-def _load_zones(path: str) -> list[Zone]:
-    with open(path, encoding="utf-8") as f:
-        data = json.load(f)
-    zones = []
-    for z in data.get("zones", []):
-        zid = z["id"]
-        poly = [(float(x), float(y)) for x, y in z["polygon"]]
-        zones.append(Zone(zone_id=zid, polygon_norm=poly))
-    return zones
+def _pipeline_config(args: argparse.Namespace, instance_id: str) -> PipelineConfig:
+    return PipelineConfig(
+        site_id=args.site_id,
+        camera_id=args.camera_id,
+        instance_id=instance_id,
+        motion_threshold=args.motion_threshold,
+        min_confidence=args.min_confidence,
+        publish_interval_ms=args.publish_interval_ms,
+        occlusion_quality_lt=args.occlusion_quality_lt,
+        occlusion_after_sec=args.occlusion_after_sec,
+        tamper_diff_gt=args.tamper_diff_gt,
+        tamper_after_sec=args.tamper_after_sec,
+        process_width=args.process_width,
+        roi=args.roi,
+        quality_interval_ms=args.quality_interval_ms,
+    )
+
 
+def _exporter(
+    args: argparse.Namespace, bus: NatsBus, log: logging.LoggerAdapter
+) -> MetricsExporter:
+    return MetricsExporter(
+        service="vision",
+        port=args.metrics_port,
+        interval_sec=args.metrics_interval_sec,
+        bus=bus,
+        log=log,
+    )
 
-def _zone_mask(frame_shape: tuple[int, int], zone: Zone) -> np.ndarray:
-    h, w = frame_shape
-    pts = np.array([[int(x * w), int(y * h)] for x, y in zone.polygon_norm], dtype=np.int32)
-    mask = np.zeros((h, w), dtype=np.uint8)
-    cv2.fillPoly(mask, [pts], 255)
-    return mask
 
+def _bus(args: argparse.Namespace) -> NatsBus:
+    return NatsBus(
+        args.nats,
+        codec=args.codec,
+        outbox=Outbox(max_pending=args.outbox_max) if args.outbox_max > 0 else None,
+        flush_interval_ms=args.flush_ms,
+    )
 
-def _lighting_quality(gray: np.ndarray) -> tuple[float, str | None]:
-    # Extremely simple but field-useful: mean brightness & contrast proxy
-    mean = float(np.mean(gray)) / 255.0
-    std = float(np.std(gray)) / 255.0
-    quality = max(0.0, min(1.0, (mean * 0.7 + std * 0.3)))
-    reason = None
-    if mean < 0.12:
-        reason = "low_light"
-    elif std < 0.05:
-        reason = "blur"
-    return quality, reason
+
+def _health_event(
+    args: argparse.Namespace,
+    instance_id: str,
+    reader: LatestFrameReader | FrameRingReader,
+    frame_age: float,
+) -> dict[str, Any]:
+    """camera_health.v1 as seen by hw-vision: the age of the newest frame it received."""
+    if not reader.is_opened:
+        status = "offline"
+    elif frame_age >= args.stale_after_sec:
+        status = "stalled"
+    else:
+        status = "ok"
+    return {
+        "schema_version": 1,
+        "event_id": f"evt_{uuid.uuid4().hex}",
+        "type": "capture.camera_health.v1",
+        "ts": datetime.now(UTC).isoformat(),
+        "site_id": args.site_id,
+        "camera_id": args.camera_id,
+        "source": {"service": "vision", "instance_id": instance_id},
+        "payload": {
+            "status": status,
+            "latency_ms": round(frame_age * 1000.0),
+            "note": f"frame_age_sec={round(frame_age, 3)} dropped={reader.stats.dropped}",
+        },
+    }
 
 
 async def _run(args: argparse.Namespace) -> int:
     setup_logging(service="vision")
     log = get_logger("hoistwaywatch.vision", service="vision")
-    zones = _load_zones(args.zones)
+    zones = load_zones(args.zones)
     if not zones:
         raise SystemExit(f"no zones found in {args.zones}")
 
-    bus = NatsBus(args.nats)
+    bus = _bus(args)
     await bus.connect()
     instance_id = f"vision-{uuid.uuid4().hex[:8]}"
     stop = wait_for_shutdown()
 
-    cap = _open_capture(args.source)
-    if not cap.isOpened():
+    # Either attach to hw-capture's frame ring (single decoder per camera), or decode on a
+    # dedicated thread so the event loop (NATS I/O) never blocks on the camera. Both always
+    # hand out the newest frame instead of draining a stale RTSP buffer.
+    reader: LatestFrameReader | FrameRingReader
+    if args.shm_name:
+        reader = FrameRingReader(args.shm_name)
+    else:
+        reader = LatestFrameReader(args.source, stride=max(1, args.analysis_stride))
+    reader.start()
+    if not args.shm_name and not reader.is_opened:
+        reader.close()
         raise SystemExit("failed to open camera source")
 
-    subtractor = cv2.createBackgroundSubtractorMOG2(
-        history=200,
-        varThreshold=16,
-        detectShadows=False,
-    )
+    pipeline = MotionPipeline(_pipeline_config(args, instance_id), zones)
+    scheduler = AnalysisScheduler(_scheduler_config(args), motion_threshold=args.motion_threshold)
+    last_index = -1
+    last_stats = time.time()
+    last_frame_mono = last_health = time.monotonic()
 
-    masks: dict[str, np.ndarray] = {}
-    last_emit: dict[str, float] = {}
-    ref_gray: np.ndarray | None = None
-    bad_quality_since: float | None = None
-    tamper_since: float | None = None
+    metrics = _exporter(args, bus, log)
+    await metrics.start()
+    cam = args.camera_id
+    frames, analysis_sec = FRAMES.labels(cam), ANALYSIS_SECONDS.labels(cam)
+    scoring_sec, frame_age = ZONE_SCORING_SECONDS.labels(cam), FRAME_AGE_SECONDS.labels(cam)
+    DROPPED.labels(cam).set_function(lambda: reader.stats.dropped)
 
     try:
         while not stop.is_set():
-            ok, frame = cap.read()
-            if not ok or frame is None:
-                await asyncio.sleep(0.2)
+            captured = await asyncio.to_thread(reader.latest, after=last_index, timeout=0.5)
+            if captured is not None:
+                last_index = captured.index
+                last_frame_mono = captured.captured_mono
+            # Health of the frames this service actually receives, so a stalled ring or
+            # reader shows up even while hw-capture still grabs from the camera.
+            now_mono = time.monotonic()
+            if args.health_interval_sec > 0 and now_mono - last_health >= args.health_interval_sec:
+                health = _health_event(args, instance_id, reader, now_mono - last_frame_mono)
+                EVENTS.labels(cam, health["type"]).inc()
+                await bus.publish_json(args.pub, health)
+                last_health = now_mono
+            if captured is None:
                 continue
 
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            if ref_gray is None:
-                ref_gray = gray.copy()
-            h, w = gray.shape[:2]
-            if not masks:
-                for z in zones:
-                    masks[z.zone_id] = _zone_mask((h, w), z)
+            started = time.monotonic()
+            frame_age.observe(captured.age_sec())
+            for evt in pipeline.process(captured, overwritten=reader.overwritten):
+                EVENTS.labels(cam, evt["type"]).inc()
+                stamp(evt, "published_at")
+                await bus.publish_json(args.pub, evt)
+            elapsed = time.monotonic() - started
+            frames.inc()
+            analysis_sec.observe(elapsed)
+            scoring_sec.observe(pipeline.last_score_sec)
+            scheduler.record(
+                started=started,
+                elapsed=elapsed,
+                max_score=max(pipeline.last_scores.values(), default=0.0),
+                quality=pipeline.last_quality,
+            )
 
-            fg = subtractor.apply(frame)
-            fg = cv2.threshold(fg, 200, 255, cv2.THRESH_BINARY)[1]
+            now = time.time()
+            if now - last_stats >= args.stats_interval_sec:
+                st = reader.stats
+                log.info(
+                    "frame reader stats",
+                    extra={
+                        "frames": st.frames,
+                        "dropped": st.dropped,
+                        "read_failures": st.read_failures,
+                        "reopens": st.reopens,
+                        "torn": pipeline.torn_frames,
+                        "frame_age_ms": round(captured.age_sec() * 1000.0, 1),
+                        **scheduler.snapshot(time.monotonic()),
+                        **bus.stats(),
+                    },
+                )
+                last_stats = now
+
+            # Idle scenes are analysed less often; the reader keeps only the newest frame.
+            await asyncio.sleep(scheduler.next_delay(time.monotonic()))
+    finally:
+        reader.close()
+        log.info("shutting down")
+        await metrics.close()
+        await bus.close()
 
-            # Lighting quality affects confidence (uncertainty-aware)
-            quality, reason = _lighting_quality(gray)
 
-            now = time.time()
-            # Publish lighting quality at ~1Hz
-            if now - last_emit.get("_lighting", 0.0) >= 1.0:
-                evt = {
-                    "schema_version": 1,
-                    "event_id": f"evt_{uuid.uuid4().hex}",
-                    "type": "vision.lighting_quality.v1",
-                    "ts": datetime.now(UTC).isoformat(),
-                    "site_id": args.site_id,
-                    "camera_id": args.camera_id,
-                    "source": {"service": "vision", "instance_id": instance_id},
-                    "payload": {"quality": round(quality, 3), "reason": reason},
-                }
-                await bus.publish_json(args.pub, evt)
-                last_emit["_lighting"] = now
-
-            # Occlusion / unusable view detection (fail-loud)
-            if quality < args.occlusion_quality_lt:
-                bad_quality_since = bad_quality_since or now
-            else:
-                bad_quality_since = None
-
-            if (
-                bad_quality_since is not None
-                and (now - bad_quality_since) >= args.occlusion_after_sec
-            ):
-                if now - last_emit.get("_occlusion", 0.0) >= 1.0:
-                    evt = {
-                        "schema_version": 1,
-                        "event_id": f"evt_{uuid.uuid4().hex}",
-                        "type": "vision.tamper_or_occlusion.v1",
-                        "ts": datetime.now(UTC).isoformat(),
-                        "site_id": args.site_id,
-                        "camera_id": args.camera_id,
-                        "source": {"service": "vision", "instance_id": instance_id},
-                        "payload": {
-                            "status": "occluded",
-                            "confidence": round(float(1.0 - quality), 3),
-                        },
-                    }
-                    await bus.publish_json(args.pub, evt)
-                    last_emit["_occlusion"] = now
-
-            # Tamper detection (large persistent global change under decent visibility)
-            if ref_gray is not None and quality >= 0.35:
-                diff = cv2.absdiff(gray, ref_gray)
-                diff_score = float(np.mean(diff)) / 255.0
-                if diff_score > args.tamper_diff_gt:
-                    tamper_since = tamper_since or now
-                else:
-                    tamper_since = None
-
-                if tamper_since is not None and (now - tamper_since) >= args.tamper_after_sec:
-                    if now - last_emit.get("_tamper", 0.0) >= 2.0:
-                        evt = {
-                            "schema_version": 1,
-                            "event_id": f"evt_{uuid.uuid4().hex}",
-                            "type": "vision.tamper_or_occlusion.v1",
-                            "ts": datetime.now(UTC).isoformat(),
-                            "site_id": args.site_id,
-                            "camera_id": args.camera_id,
-                            "source": {"service": "vision", "instance_id": instance_id},
-                            "payload": {"status": "tampered", "confidence": round(diff_score, 3)},
-                        }
-                        await bus.publish_json(args.pub, evt)
-                        last_emit["_tamper"] = now
-
-            # Motion-in-zone
-            for zone_id, mask in masks.items():
-                zone_pixels = int(np.count_nonzero(mask))
-                if zone_pixels == 0:
-                    continue
-                motion_pixels = int(np.count_nonzero(cv2.bitwise_and(fg, fg, mask=mask)))
-                motion_score = motion_pixels / zone_pixels
-
-                # Confidence penalized by low visibility
-                confidence = max(0.0, min(1.0, quality))
-
-                if motion_score >= args.motion_threshold and confidence >= args.min_confidence:
-                    # Debounce per-zone (avoid flooding)
-                    if now - last_emit.get(zone_id, 0.0) < (args.publish_interval_ms / 1000.0):
-                        continue
-                    evt = {
-                        "schema_version": 1,
-                        "event_id": f"evt_{uuid.uuid4().hex}",
-                        "type": "vision.motion_in_zone.v1",
-                        "ts": datetime.now(UTC).isoformat(),
-                        "site_id": args.site_id,
-                        "camera_id": args.camera_id,
-                        "source": {"service": "vision", "instance_id": instance_id},
-                        "payload": {
-                            "zone_id": zone_id,
-                            "motion_score": round(float(motion_score), 4),
-                            "confidence": round(float(confidence), 4),
-                        },
-                    }
-                    await bus.publish_json(args.pub, evt)
-                    last_emit[zone_id] = now
-
-            await asyncio.sleep(0)  # yield
+async def _run_site(args: argparse.Namespace) -> int:
+    setup_logging(service="vision")
+    log = get_logger("hoistwaywatch.vision", service="vision")
+    cameras = load_site_cameras(
+        args.site, default_zones=args.zones, default_stride=args.analysis_stride
+    )
+    if not cameras:
+        raise SystemExit(f"no cameras found in {args.site}")
+    groups = assign_cameras(cameras, args.workers)
+
+    # One bus connection for all cameras; workers only compute and hand events back.
+    bus = _bus(args)
+    await bus.connect()
+    instance_id = f"vision-{uuid.uuid4().hex[:8]}"
+    stop = wait_for_shutdown()
+
+    # Analysis runs in the workers: the parent counts published events and exposes the
+    # per-camera figures of their periodic stats reports.
+    metrics = _exporter(args, bus, log)
+    await metrics.start()
+
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    worker_stop = ctx.Event()
+    base = _pipeline_config(args, instance_id)
+    procs = [
+        ctx.Process(
+            target=worker_main,
+            args=(group, base, _scheduler_config(args), out, worker_stop, args.stats_interval_sec),
+            name=f"hw-vision-worker-{i}",
+            daemon=True,
+        )
+        for i, group in enumerate(groups)
+    ]
+    for proc in procs:
+        proc.start()
+    log.info(
+        "multi-camera vision started",
+        extra={"cameras": len(cameras), "workers": [[c.camera_id for c in g] for g in groups]},
+    )
+
+    try:
+        while not stop.is_set():
+            for kind, item in await asyncio.to_thread(drain, out, 0.5):
+                if kind == "event":
+                    EVENTS.labels(item.get("camera_id"), item.get("type")).inc()
+                    # Stamped here, not in the worker: time in the worker queue counts.
+                    stamp(item, "published_at")
+                    await bus.publish_json(args.pub, item)
+                elif kind == "stats":
+                    for cam_id, st in item.items():
+                        CAMERA_ANALYSIS_FPS.labels(cam_id).set(st["analysis_fps"])
+                        CAMERA_DECODE_FPS.labels(cam_id).set(st["decode_fps"])
+                        DROPPED.labels(cam_id).inc(st["dropped"])
+                    try:
+                        backlog = out.qsize()
+                    except NotImplementedError:  # macOS
+                        backlog = None
+                    log.info(
+                        "camera stats",
+                        extra={"cameras": item, "publish_backlog": backlog, **bus.stats()},
+                    )
+            dead = [p.name for p in procs if not p.is_alive()]
+            if dead:
+                log.error("vision worker exited", extra={"workers": dead})
+                return 1
     finally:
-        cap.release()
+        worker_stop.set()
+        for proc in procs:
+            proc.join(timeout=5.0)
+            if proc.is_alive():
+                proc.terminate()
         log.info("shutting down")
+        await metrics.close()
         await bus.close()
+    return 0
 
 
-def main(argv: list[str] | None = None) -> None:
-    args = _parse_args(sys.argv[1:] if argv is None else argv)
-    raise SystemExit(asyncio.run(_run(args)))
+def _parse_offline_args(argv: list[str]) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        prog="hw-vision offline",
+        description="Re-run detection over recorded clips in parallel; write events as NDJSON",
+    )
+    p.add_argument(
+        "clips",
+        nargs="+",
+        metavar="[CAMERA=]PATH",
+        help="Recorded clip, optionally prefixed with its camera id (default: the file stem).",
+    )
+    _add_pipeline_args(p)
+    p.add_argument("--out", default="-", help="Events NDJSON path (-: stdout)")
+    p.add_argument(
+        "--site",
+        default=os.getenv("HW_SITE_CONFIG", ""),
+        help="Site config: per-camera zones for clips named after its camera ids.",
+    )
+    p.add_argument(
+        "--start",
+        type=_iso,
+        action="append",
+        default=[],
+        help="ISO 8601 start time of each clip, in order (default: file mtime - duration).",
+    )
+    p.add_argument("--chunk-sec", type=float, default=300.0, help="Video seconds per chunk.")
+    p.add_argument(
+        "--warmup-frames",
+        type=int,
+        default=DEFAULT_WARMUP_FRAMES,
+        help="Frames decoded before each chunk to settle MOG2 and the hold timers.",
+    )
+    p.add_argument("--workers", type=int, default=0, help="Worker processes (0: CPU count).")
+    # Each recording's camera id replaces this one.
+    p.set_defaults(camera_id="offline")
+    return p.parse_args(argv)
 
+
+def _iso(value: str) -> datetime:
+    ts = datetime.fromisoformat(value)
+    return ts if ts.tzinfo is not None else ts.replace(tzinfo=UTC)
+
+
+def _offline(args: argparse.Namespace) -> int:
+    if args.start and len(args.start) != len(args.clips):
+        raise SystemExit("--start must be given once per clip, or not at all")
+    zones_by_camera = {}
+    if args.site:
+        zones_by_camera = {
+            c.camera_id: c.zones_path
+            for c in load_site_cameras(args.site, default_zones=args.zones)
+        }
+    recordings = []
+    for i, clip in enumerate(args.clips):
+        camera_id, sep, path = clip.partition("=")
+        if not sep:
+            camera_id, path = Path(clip).stem, clip
+        start = args.start[i].timestamp() if args.start else None
+        zones = load_zones(zones_by_camera.get(camera_id, args.zones))
+        try:
+            recordings.append(Recording.probe(camera_id, path, zones, start_ts=start))
+        except ValueError as exc:
+            raise SystemExit(str(exc)) from None
+
+    config = _pipeline_config(args, f"vision-offline-{uuid.uuid4().hex[:8]}")
+    run = functools.partial(
+        run_offline,
+        recordings,
+        config,
+        chunk_sec=args.chunk_sec,
+        warmup_frames=args.warmup_frames,
+        workers=args.workers,
+    )
+    if args.out == "-":
+        summary = run(sys.stdout)
+    else:
+        with open(args.out, "w", encoding="utf-8") as out:
+            summary = run(out)
+    print(json.dumps(summary), file=sys.stderr)
+    return 0
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["offline"]:
+        raise SystemExit(_offline(_parse_offline_args(argv[1:])))
+    args = _parse_args(argv)
+    raise SystemExit(asyncio.run(_run_site(args) if args.site else _run(args)))
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import queue
+import time
+from dataclasses import dataclass, replace
+from typing import Any
+
+import yaml
+
+from hoistwaywatch.capture.shm import FrameRingReader
+from hoistwaywatch.capture.source import LatestFrameReader
+from hoistwaywatch.vision.pipeline import MotionPipeline, PipelineConfig
+from hoistwaywatch.vision.scheduler import AnalysisScheduler, SchedulerConfig
+from hoistwaywatch.vision.zones import load_zones
+
+
+@dataclass(frozen=True)
+class CameraSpec:
+    camera_id: str
+    source: str
+    zones_path: str
+    shm_name: str = ""
+    analysis_stride: int = 1
+
+
+def load_site_cameras(
+    path: str, *, default_zones: str, default_stride: int = 1
+) -> list[CameraSpec]:
+    """Read the `cameras:` list of a site config (see configs/example-site.yaml)."""
+    with open(path, encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    if not isinstance(cfg, dict) or not isinstance(cfg.get("cameras"), list):
+        raise ValueError(f"{path}: site config must have a `cameras:` list")
+    cameras = []
+    for cam in cfg["cameras"]:
+        cam_id = cam.get("id")
+        if cam.get("source") is not None:
+            source = str(cam["source"])
+        elif cam.get("type") == "uvc":
+            source = str(cam.get("device", 0))
+        else:
+            source = str(cam.get("rtsp_url", ""))
+        if not cam_id or not (source or cam.get("shm_name")):
+            raise ValueError(f"{path}: camera entries need `id` and a source")
+        cameras.append(
+            CameraSpec(
+                camera_id=str(cam_id),
+                source=source,
+                zones_path=str(cam.get("zones", default_zones)),
+                shm_name=str(cam.get("shm_name", "")),
+                analysis_stride=max(1, int(cam.get("analysis_stride", default_stride))),
+            )
+        )
+    return cameras
+
+
+def assign_cameras(cameras: list[CameraSpec], workers: int) -> list[list[CameraSpec]]:
+    """Round-robin cameras over at most `workers` processes (0 = one per core)."""
+    n = workers or (os.cpu_count() or 1)
+    n = max(1, min(n, len(cameras)))
+    return [cameras[i::n] for i in range(n)]
+
+
+def worker_main(
+    cameras: list[CameraSpec],
+    base: PipelineConfig,
+    schedule: SchedulerConfig,
+    out: mp.Queue,
+    stop: Any,
+    stats_interval_sec: float,
+) -> None:
+    """
+    Worker process: owns the readers and pipelines of its cameras and services them
+    round-robin, always taking each camera's newest frame once its scheduler says it is
+    due. Events and per-camera stats
+    go back to the parent, which owns the single bus connection.
+    """
+    readers: list[LatestFrameReader | FrameRingReader] = []
+    pipelines: list[MotionPipeline] = []
+    schedulers: list[AnalysisScheduler] = []
+    for cam in cameras:
+        reader: LatestFrameReader | FrameRingReader
+        if cam.shm_name:
+            reader = FrameRingReader(cam.shm_name)
+        else:
+            reader = LatestFrameReader(cam.source, stride=cam.analysis_stride)
+        reader.start()
+        readers.append(reader)
+        cfg = replace(base, camera_id=cam.camera_id)
+        pipelines.append(MotionPipeline(cfg, load_zones(cam.zones_path)))
+        schedulers.append(AnalysisScheduler(schedule, motion_threshold=cfg.motion_threshold))
+
+    last_index = [-1] * len(cameras)
+    last_age = [0.0] * len(cameras)
+    prev = [(0, 0, 0)] * len(cameras)  # analysed, decoded, dropped at last report
+    last_stats = time.monotonic()
+    try:
+        while not stop.is_set():
+            busy = False
+            for i, (reader, pipeline) in enumerate(zip(readers, pipelines, strict=True)):
+                if schedulers[i].next_delay(time.monotonic()) > 0:
+                    continue
+                frame = reader.latest(after=last_index[i], timeout=0)
+                if frame is None:
+                    continue
+                busy = True
+                last_index[i] = frame.index
+                last_age[i] = frame.age_sec()
+                started = time.monotonic()
+                for evt in pipeline.process(frame, overwritten=reader.overwritten):
+                    out.put(("event", evt))
+                schedulers[i].record(
+                    started=started,
+                    elapsed=time.monotonic() - started,
+                    max_score=max(pipeline.last_scores.values(), default=0.0),
+                    quality=pipeline.last_quality,
+                )
+            if not busy:
+                time.sleep(0.005)
+
+            now = time.monotonic()
+            if now - last_stats >= stats_interval_sec:
+                elapsed = now - last_stats
+                report = {}
+                for i, cam in enumerate(cameras):
+                    st = readers[i].stats
+                    cur = (pipelines[i].frames, st.frames, st.dropped)
+                    report[cam.camera_id] = {
+                        "analysis_fps": round((cur[0] - prev[i][0]) / elapsed, 2),
+                        "decode_fps": round((cur[1] - prev[i][1]) / elapsed, 2),
+                        # Backlog: frames decoded but never analysed, and how old the
+                        # newest analysed frame already was when analysis started.
+                        "dropped": cur[2] - prev[i][2],
+                        "frame_age_ms": round(last_age[i] * 1000.0, 1),
+                        **schedulers[i].snapshot(now),
+                    }
+                    prev[i] = cur
+                out.put(("stats", report))
+                last_stats = now
+    finally:
+        for reader in readers:
+            reader.close()
+
+
+def drain(out: mp.Queue, timeout: float) -> list[tuple[str, Any]]:
+    """Block up to `timeout` for one item, then take whatever else is already queued."""
+    try:
+        items = [out.get(timeout=timeout)]
+    except queue.Empty:
+        return []
+    while True:
+        try:
+            items.append(out.get_nowait())
+        except queue.Empty:
+            return items
@@ -0,0 +1,193 @@
+"""
+Offline re-analysis of recorded clips (`hw-vision offline`).
+
+Each recording is split into chunks of `chunk_sec` that are analysed in parallel by a process
+pool. A chunk starts decoding `warmup_frames` before its first frame and discards the events
+of those frames: MOG2 (history=200) needs that long to learn the background, and the
+debounce and occlusion/tamper hold timers pick up the state they would have had. The tamper
+reference is the recording's first frame, as in a live run from the start of the clip. Event
+timestamps follow the video clock from the recording's start time, and the events of all
+chunks and recordings are written as one time-ordered NDJSON stream.
+
+Results match a sequential pass except where a chunk boundary falls within `warmup_frames`
+of a scene change that MOG2 had not finished absorbing; a longer warm-up narrows that.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import multiprocessing as mp
+import os
+import time
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any
+
+import cv2
+
+from hoistwaywatch.capture.source import Frame
+from hoistwaywatch.vision.pipeline import MotionPipeline, PipelineConfig
+from hoistwaywatch.vision.zones import Zone
+
+DEFAULT_WARMUP_FRAMES = 200  # MOG2 history
+
+
+@dataclass(frozen=True)
+class Recording:
+    camera_id: str
+    path: str
+    zones: tuple[Zone, ...]
+    fps: float
+    frames: int
+    start_ts: float  # wall-clock time of the first frame (epoch seconds)
+
+    @classmethod
+    def probe(
+        cls, camera_id: str, path: str, zones: Iterable[Zone], *, start_ts: float | None = None
+    ) -> Recording:
+        """
+        Read frame count and rate from the container. Without `start_ts` the recording is
+        assumed to have ended at the file's modification time.
+        """
+        cap = cv2.VideoCapture(path)
+        try:
+            if not cap.isOpened():
+                raise ValueError(f"cannot open recording {path}")
+            fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+            frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        finally:
+            cap.release()
+        if fps <= 0 or frames <= 0:
+            raise ValueError(f"{path}: unknown frame rate or length (not a seekable file?)")
+        if start_ts is None:
+            start_ts = Path(path).stat().st_mtime - frames / fps
+        return cls(camera_id, path, tuple(zones), fps, frames, start_ts)
+
+    @property
+    def duration_sec(self) -> float:
+        return self.frames / self.fps
+
+
+@dataclass(frozen=True)
+class Chunk:
+    recording: Recording
+    first: int  # first frame whose events are kept
+    end: int  # one past the last frame
+    warmup_from: int  # decoding starts here; events before `first` are discarded
+
+
+def plan_chunks(recording: Recording, *, chunk_sec: float, warmup_frames: int) -> list[Chunk]:
+    size = max(1, round(chunk_sec * recording.fps))
+    return [
+        Chunk(recording, first, min(first + size, recording.frames), max(0, first - warmup_frames))
+        for first in range(0, recording.frames, size)
+    ]
+
+
+def process_chunk(chunk: Chunk, config: PipelineConfig) -> tuple[list[dict[str, Any]], int]:
+    """Events of the chunk's own frames, and the number of frames decoded (warm-up included)."""
+    rec = chunk.recording
+    pipeline = MotionPipeline(replace(config, camera_id=rec.camera_id), list(rec.zones))
+    cap = cv2.VideoCapture(rec.path)
+    events: list[dict[str, Any]] = []
+    decoded = 0
+    try:
+        if chunk.warmup_from > 0:
+            ok, image = cap.read()
+            if not ok:
+                return events, decoded
+            decoded += 1
+            pipeline.set_tamper_reference(image)
+            _seek(cap, chunk.warmup_from)
+        for index in range(chunk.warmup_from, chunk.end):
+            ok, image = cap.read()
+            if not ok:
+                break
+            decoded += 1
+            now = rec.start_ts + index / rec.fps
+            found = pipeline.process(Frame(image, index, now, now), now=now)
+            if index >= chunk.first:
+                events.extend(found)
+    finally:
+        cap.release()
+    return events, decoded
+
+
+def _seek(cap: cv2.VideoCapture, index: int) -> None:
+    # Next read() returns frame `index`; containers whose seeks are not frame-accurate are
+    # read forward instead.
+    if cap.set(cv2.CAP_PROP_POS_FRAMES, index) and int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == index:
+        return
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    for _ in range(index):
+        if not cap.grab():
+            return
+
+
+def _init_worker() -> None:
+    # One OpenCV thread per process: the pool already uses every core.
+    cv2.setNumThreads(1)
+
+
+def _run_chunk(args: tuple[Chunk, PipelineConfig]) -> tuple[list[dict[str, Any]], int]:
+    return process_chunk(*args)
+
+
+def run_offline(
+    recordings: list[Recording],
+    config: PipelineConfig,
+    out: IO[str],
+    *,
+    chunk_sec: float = 300.0,
+    warmup_frames: int = DEFAULT_WARMUP_FRAMES,
+    workers: int = 0,
+) -> dict[str, Any]:
+    """Analyse `recordings`, write their events to `out` in time order, return a summary."""
+    started = time.monotonic()
+    plans = [
+        plan_chunks(recording, chunk_sec=chunk_sec, warmup_frames=warmup_frames)
+        for recording in recordings
+    ]
+    chunks = [chunk for plan in plans for chunk in plan]
+    workers = min(workers or os.cpu_count() or 1, len(chunks)) or 1
+    jobs = [(c, config) for c in chunks]
+    if workers == 1:
+        results = [_run_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(
+            workers, mp_context=mp.get_context("spawn"), initializer=_init_worker
+        ) as pool:
+            results = list(pool.map(_run_chunk, jobs))
+
+    # Chunks come back in plan order, so each recording's events are already in time order.
+    streams, pos = [], 0
+    for plan in plans:
+        streams.append([e for events, _ in results[pos : pos + len(plan)] for e in events])
+        pos += len(plan)
+    written = 0
+    for event in heapq.merge(*streams, key=_event_time):
+        out.write(json.dumps(event, separators=(",", ":"), ensure_ascii=False) + "\n")
+        written += 1
+    out.flush()
+
+    elapsed = time.monotonic() - started
+    video_sec = sum(r.duration_sec for r in recordings)
+    return {
+        "recordings": len(recordings),
+        "chunks": len(chunks),
+        "workers": workers,
+        "frames": sum(r.frames for r in recordings),
+        "frames_decoded": sum(decoded for _, decoded in results),
+        "events": written,
+        "video_sec": round(video_sec, 1),
+        "wall_sec": round(elapsed, 2),
+        "realtime_factor": round(video_sec / elapsed, 1) if elapsed > 0 else None,
+    }
+
+
+def _event_time(event: dict[str, Any]) -> datetime:
+    return datetime.fromisoformat(event["ts"])
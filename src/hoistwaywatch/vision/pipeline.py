@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import time
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+import cv2
+import numpy as np
+
+from hoistwaywatch.capture.source import Frame
+from hoistwaywatch.vision.zones import Zone, ZoneScorer
+
+
+@dataclass(frozen=True)
+class PipelineConfig:
+    site_id: str
+    camera_id: str
+    instance_id: str
+    motion_threshold: float = 0.15
+    min_confidence: float = 0.5
+    publish_interval_ms: int = 250
+    occlusion_quality_lt: float = 0.08
+    occlusion_after_sec: float = 2.5
+    tamper_diff_gt: float = 0.25
+    tamper_after_sec: float = 3.0
+    # Downscale frames wider than this before analysis (0 = native resolution).
+    process_width: int = 0
+    # Run background subtraction only on the union bounding box of the zones.
+    roi: bool = False
+    # Lighting and tamper statistics: thumbnail width and refresh cadence.
+    quality_width: int = 160
+    quality_interval_ms: int = 200
+
+
+def lighting_quality(gray: np.ndarray) -> tuple[float, str | None]:
+    # Extremely simple but field-useful: mean brightness & contrast proxy
+    m, sd = cv2.meanStdDev(gray)
+    mean = float(m[0, 0]) / 255.0
+    std = float(sd[0, 0]) / 255.0
+    quality = max(0.0, min(1.0, (mean * 0.7 + std * 0.3)))
+    reason = None
+    if mean < 0.12:
+        reason = "low_light"
+    elif std < 0.05:
+        reason = "blur"
+    return quality, reason
+
+
+_STAGES = ("resize", "mog2", "lighting", "tamper", "zone_scoring")
+
+
+def _lap(since: float) -> tuple[float, float]:
+    now = time.perf_counter()
+    return now, now - since
+
+
+class MotionPipeline:
+    """
+    Per-camera analysis state: background model, zone scorer, lighting/tamper timers and
+    per-zone debouncing. Pure computation: `process` returns hw-event dicts and leaves
+    transport to the caller, so one process can drive many cameras.
+    """
+
+    def __init__(self, config: PipelineConfig, zones: list[Zone]) -> None:
+        self.config = config
+        self._zones = zones
+        self._subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=200,
+            varThreshold=16,
+            detectShadows=False,
+        )
+        self._scorer: ZoneScorer | None = None
+        self._roi_scorer: ZoneScorer | None = None
+        self.last_scores: dict[str, float] = {}
+        self.last_quality = 0.0
+        self._last_emit: dict[str, float] = {}
+        self._ref_thumb: np.ndarray | None = None
+        self._quality_at = float("-inf")
+        self._reason: str | None = None
+        self._diff_score = 0.0
+        self._bad_quality_since: float | None = None
+        self._tamper_since: float | None = None
+        self.frames = 0
+        self.torn_frames = 0
+        # Wall time of the last zone-scoring pass (all zones), for metrics.
+        self.last_score_sec = 0.0
+        # Per-stage wall time of the last processed frame (resize, mog2, lighting, tamper,
+        # zone_scoring); lighting/tamper are 0 on frames between quality refreshes.
+        self.last_stage_sec: dict[str, float] = {}
+
+    def process(
+        self,
+        frame: Frame,
+        *,
+        now: float | None = None,
+        overwritten: Callable[[Frame], bool] | None = None,
+    ) -> list[dict[str, Any]]:
+        cfg = self.config
+        now = time.time() if now is None else now
+        stage = self.last_stage_sec = dict.fromkeys(_STAGES, 0.0)
+        t = time.perf_counter()
+        image = self._scaled(frame.image)
+        h, w = image.shape[:2]
+        # Lighting/tamper signals change slowly and are published at ~1 Hz: compute them
+        # on a gray thumbnail, and only every quality_interval_ms.
+        thumb = None
+        t, stage["resize"] = _lap(t)
+        if now - self._quality_at >= cfg.quality_interval_ms / 1000.0:
+            thumb = self._thumbnail(image)
+            t, stage["lighting"] = _lap(t)
+        if self._scorer is None or self._scorer.frame_shape != (h, w):
+            self._scorer = ZoneScorer((h, w), self._zones)
+            y0, _, x0, _ = self._scorer.bbox
+            self._roi_scorer = self._scorer.relative_to(y0, x0) if cfg.roi else self._scorer
+
+        # Motion scores are ratios of zone area, so they survive downscaling and cropping to
+        # the zones' union bounding box (pixels outside every zone never contribute).
+        if cfg.roi:
+            y0, y1, x0, x1 = self._scorer.bbox
+            image = image[y0:y1, x0:x1]
+        if overwritten is not None:
+            # Shared-memory frames are validated before MOG2 learns them: take a private copy
+            # (unless resizing already made one), then check the slot was not reused meanwhile.
+            if np.may_share_memory(image, frame.image):
+                image = image.copy()
+            if overwritten(frame):
+                # Results would mix two frames, and the background model would learn them.
+                self.torn_frames += 1
+                return []
+        fg = self._subtractor.apply(image)
+        fg = cv2.threshold(fg, 200, 255, cv2.THRESH_BINARY)[1]
+        t, stage["mog2"] = _lap(t)
+        self.frames += 1
+
+        if thumb is not None:
+            if self._ref_thumb is None or self._ref_thumb.shape != thumb.shape:
+                self._ref_thumb = thumb
+            self.last_quality, self._reason = lighting_quality(thumb)
+            t, lighting = _lap(t)
+            stage["lighting"] += lighting
+            self._diff_score = float(cv2.mean(cv2.absdiff(thumb, self._ref_thumb))[0]) / 255.0
+            t, stage["tamper"] = _lap(t)
+            self._quality_at = now
+
+        # Lighting quality affects confidence (uncertainty-aware)
+        quality, reason = self.last_quality, self._reason
+
+        events: list[dict[str, Any]] = []
+        # Publish lighting quality at ~1Hz
+        if now - self._last_emit.get("_lighting", 0.0) >= 1.0:
+            events.append(
+                self._event(
+                    "vision.lighting_quality.v1",
+                    {"quality": round(quality, 3), "reason": reason},
+                    now,
+                    frame.captured_at,
+                )
+            )
+            self._last_emit["_lighting"] = now
+
+        # Occlusion / unusable view detection (fail-loud)
+        if quality < cfg.occlusion_quality_lt:
+            self._bad_quality_since = self._bad_quality_since or now
+        else:
+            self._bad_quality_since = None
+
+        if (
+            self._bad_quality_since is not None
+            and (now - self._bad_quality_since) >= cfg.occlusion_after_sec
+        ):
+            if now - self._last_emit.get("_occlusion", 0.0) >= 1.0:
+                events.append(
+                    self._event(
+                        "vision.tamper_or_occlusion.v1",
+                        {"status": "occluded", "confidence": round(float(1.0 - quality), 3)},
+                        now,
+                        frame.captured_at,
+                    )
+                )
+                self._last_emit["_occlusion"] = now
+
+        # Tamper detection (large persistent global change under decent visibility)
+        if quality >= 0.35:
+            diff_score = self._diff_score
+            if diff_score > cfg.tamper_diff_gt:
+                self._tamper_since = self._tamper_since or now
+            else:
+                self._tamper_since = None
+
+            if (
+                self._tamper_since is not None
+                and (now - self._tamper_since) >= cfg.tamper_after_sec
+            ):
+                if now - self._last_emit.get("_tamper", 0.0) >= 2.0:
+                    events.append(
+                        self._event(
+                            "vision.tamper_or_occlusion.v1",
+                            {"status": "tampered", "confidence": round(diff_score, 3)},
+                            now,
+                            frame.captured_at,
+                        )
+                    )
+                    self._last_emit["_tamper"] = now
+
+        # Motion-in-zone (all zones scored in one pass)
+        # Confidence penalized by low visibility
+        confidence = max(0.0, min(1.0, quality))
+        scorer = self._roi_scorer
+        assert scorer is not None
+        scored_at = time.perf_counter()
+        self.last_scores = dict(zip(scorer.zone_ids, scorer.scores(fg).tolist(), strict=True))
+        self.last_score_sec = stage["zone_scoring"] = time.perf_counter() - scored_at
+        for zone_id, motion_score in self.last_scores.items():
+            if motion_score >= cfg.motion_threshold and confidence >= cfg.min_confidence:
+                # Debounce per-zone (avoid flooding)
+                if now - self._last_emit.get(zone_id, 0.0) < (cfg.publish_interval_ms / 1000.0):
+                    continue
+                # Capture-to-publish latency, including any time spent queued behind I/O
+                latency_ms = (time.time() - frame.captured_at) * 1000.0
+                events.append(
+                    self._event(
+                        "vision.motion_in_zone.v1",
+                        {
+                            "zone_id": zone_id,
+                            "motion_score": round(float(motion_score), 4),
+                            "confidence": round(float(confidence), 4),
+                            "latency_ms": round(latency_ms, 1),
+                        },
+                        now,
+                        frame.captured_at,
+                    )
+                )
+                self._last_emit[zone_id] = now
+        return events
+
+    def set_tamper_reference(self, image: np.ndarray) -> None:
+        """Detect tampering against `image` instead of the first processed frame."""
+        self._ref_thumb = self._thumbnail(self._scaled(image))
+
+    def _scaled(self, image: np.ndarray) -> np.ndarray:
+        width = self.config.process_width
+        h, w = image.shape[:2]
+        if not width or w <= width:
+            return image
+        size = (width, max(1, round(h * width / w)))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    def _thumbnail(self, image: np.ndarray) -> np.ndarray:
+        width = self.config.quality_width
+        h, w = image.shape[:2]
+        if width and w > width:
+            # Nearest-neighbour only touches the sampled pixels: a strided view, not a pass.
+            size = (width, max(1, round(h * width / w)))
+            image = cv2.resize(image, size, interpolation=cv2.INTER_NEAREST)
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    def _event(
+        self, type_: str, payload: dict[str, Any], now: float, captured_at: float
+    ) -> dict[str, Any]:
+        cfg = self.config
+        return {
+            "schema_version": 1,
+            "event_id": f"evt_{uuid.uuid4().hex}",
+            "type": type_,
+            "ts": datetime.fromtimestamp(now, UTC).isoformat(),
+            "site_id": cfg.site_id,
+            "camera_id": cfg.camera_id,
+            "source": {"service": "vision", "instance_id": cfg.instance_id},
+            "payload": payload,
+            # Latency trace; the publisher adds published_at (observability/tracing.py).
+            "trace": {"captured_at": captured_at},
+        }
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class SchedulerConfig:
+    # Analysis rate while anything is happening (0 = every frame the camera delivers).
+    max_fps: float = 0.0
+    # Analysis rate on a quiet, stable scene (0 = never slow down).
+    idle_fps: float = 5.0
+    # Quiet time before dropping to idle_fps.
+    idle_after_sec: float = 5.0
+    # Any zone scoring above this fraction of the motion threshold counts as activity.
+    wake_fraction: float = 0.5
+    # Lighting quality change between analyses that counts as activity.
+    lighting_delta: float = 0.05
+    # Share of one core the camera's analysis may use (1.0 = a full core).
+    cpu_budget: float = 1.0
+
+
+class AnalysisScheduler:
+    """
+    Decides how long to wait before analysing the next frame of one camera.
+
+    Full rate while there is motion or lighting is changing, idle_fps once the scene has
+    been quiet for idle_after_sec, and back to full rate on the very next analysis that
+    sees activity. The interval is never shorter than what keeps average processing time
+    within cpu_budget. Frames arriving meanwhile are simply superseded by the latest-frame
+    reader, so skipping costs nothing.
+    """
+
+    def __init__(self, config: SchedulerConfig, *, motion_threshold: float) -> None:
+        self.config = config
+        self._wake_score = motion_threshold * config.wake_fraction
+        self._last_active = float("-inf")
+        self._last_quality: float | None = None
+        self._proc_ema: float | None = None
+        self._last_start: float | None = None
+        # Reporting window
+        self._analyses = 0
+        self._window_start: float | None = None
+        self._max_gap = 0.0
+
+    def record(self, *, started: float, elapsed: float, max_score: float, quality: float) -> None:
+        """Account for one analysis that began at `started` and took `elapsed` seconds."""
+        cfg = self.config
+        if (
+            max_score >= self._wake_score
+            or self._last_quality is None
+            or abs(quality - self._last_quality) >= cfg.lighting_delta
+        ):
+            self._last_active = started
+        self._last_quality = quality
+        ema = self._proc_ema
+        self._proc_ema = elapsed if ema is None else 0.8 * ema + 0.2 * elapsed
+
+        if self._window_start is None:
+            self._window_start = started
+        if self._last_start is not None:
+            self._max_gap = max(self._max_gap, started - self._last_start)
+        self._last_start = started
+        self._analyses += 1
+
+    def next_delay(self, now: float) -> float:
+        """Seconds to wait from `now` before the next analysis may start."""
+        if self._last_start is None:
+            return 0.0
+        cfg = self.config
+        fps = cfg.max_fps if self._active_at(now) else cfg.idle_fps
+        interval = 1.0 / fps if fps > 0 else 0.0
+        if self._proc_ema is not None and cfg.cpu_budget > 0:
+            interval = max(interval, self._proc_ema / cfg.cpu_budget)
+        return max(0.0, self._last_start + interval - now)
+
+    def snapshot(self, now: float) -> dict[str, float | str]:
+        """Effective analysis fps and worst-case detection latency since the last snapshot."""
+        elapsed = now - self._window_start if self._window_start is not None else 0.0
+        # Motion starting right after an analysis is only seen by the next one, and then
+        # reported once that analysis finishes.
+        worst = self._max_gap + (self._proc_ema or 0.0)
+        out: dict[str, float | str] = {
+            "mode": "active" if self._active_at(now) else "idle",
+            "analysis_fps": round(self._analyses / elapsed, 2) if elapsed > 0 else 0.0,
+            "worst_detection_latency_ms": round(worst * 1000.0, 1),
+            "proc_ms": round((self._proc_ema or 0.0) * 1000.0, 2),
+        }
+        self._analyses = 0
+        self._window_start = now
+        self._max_gap = 0.0
+        return out
+
+    def _active_at(self, now: float) -> bool:
+        return (now - self._last_active) < self.config.idle_after_sec
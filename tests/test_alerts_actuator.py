@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+import shlex
+import sys
+from datetime import UTC, datetime
+
+import pytest
+
+from hoistwaywatch.alerts.actuator import (
+    ActuatorDispatcher,
+    CallableActuator,
+    WorkerActuator,
+    parse_concurrency,
+)
+from hoistwaywatch.contracts.decode import AlertEnvelope
+
+
+def _alert(i: int, severity: str = "critical", camera: str = "cam1") -> AlertEnvelope:
+    return AlertEnvelope(
+        alert_id=f"al_{i}",
+        ts=datetime(2026, 1, 1, tzinfo=UTC),
+        site_id=None,
+        camera_id=camera,
+        severity=severity,
+        hazard_score=90.0,
+        summary="Motion detected in car path",
+        rule_id="R001",
+    )
+
+
+class _Gate:
+    """Plugin whose actions run until released; records the most running at once."""
+
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+        self.running = 0
+        self.peak = 0
+        self.seen: list[str] = []
+
+    async def __call__(self, alert: AlertEnvelope) -> None:
+        self.seen.append(alert.alert_id)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await self.release.wait()
+        finally:
+            self.running -= 1
+
+
+def test_dispatch_is_non_blocking_and_limited_per_severity() -> None:
+    async def run() -> tuple[_Gate, ActuatorDispatcher]:
+        gate = _Gate()
+        dispatcher = ActuatorDispatcher(
+            CallableActuator(gate), limits=parse_concurrency("critical=2")
+        )
+        await dispatcher.start()
+        for i in range(5):
+            assert dispatcher.dispatch(_alert(i, camera=f"cam{i}"))
+        await asyncio.sleep(0.05)
+        assert gate.running == 2  # the other three wait for a slot
+        gate.release.set()
+        await dispatcher.close()
+        return gate, dispatcher
+
+    gate, dispatcher = asyncio.run(asyncio.wait_for(run(), 5.0))
+    assert gate.peak == 2
+    assert len(gate.seen) == 5
+    assert dispatcher.completed == 5
+
+
+def test_retriggers_are_deduplicated_while_the_action_runs() -> None:
+    async def run() -> ActuatorDispatcher:
+        gate = _Gate()
+        dispatcher = ActuatorDispatcher(CallableActuator(gate))
+        assert dispatcher.dispatch(_alert(1))
+        assert not dispatcher.dispatch(_alert(2))  # same severity + camera: siren already on
+        assert dispatcher.dispatch(_alert(3, camera="cam2"))
+        await asyncio.sleep(0.01)
+        gate.release.set()
+        await asyncio.sleep(0.01)
+        assert dispatcher.dispatch(_alert(4))  # finished, so it fires again
+        await dispatcher.close()
+        return dispatcher
+
+    dispatcher = asyncio.run(asyncio.wait_for(run(), 5.0))
+    assert (dispatcher.dispatched, dispatcher.deduped, dispatcher.completed) == (3, 1, 3)
+    assert dispatcher.stats()["actuator_start_max_ms"] >= 0.0
+
+
+def test_actions_past_the_timeout_are_cancelled() -> None:
+    async def run() -> ActuatorDispatcher:
+        gate = _Gate()
+        dispatcher = ActuatorDispatcher(CallableActuator(gate), timeout_sec=0.05)
+        dispatcher.dispatch(_alert(1))
+        await asyncio.sleep(0.2)
+        assert gate.running == 0
+        await dispatcher.close()
+        return dispatcher
+
+    dispatcher = asyncio.run(asyncio.wait_for(run(), 5.0))
+    assert dispatcher.timed_out == 1
+
+
+WORKER = """
+import json, sys
+print("ready", flush=True)
+for line in sys.stdin:
+    alert = json.loads(line)
+    print(json.dumps({"alert_id": alert["alert_id"], "ok": True}), flush=True)
+"""
+
+
+def test_worker_receives_alerts_over_one_pipe() -> None:
+    async def run() -> tuple[WorkerActuator, ActuatorDispatcher]:
+        worker = WorkerActuator(f"{shlex.quote(sys.executable)} -c {shlex.quote(WORKER)}")
+        dispatcher = ActuatorDispatcher(worker, timeout_sec=5.0)
+        await dispatcher.start()
+        for i in range(6):
+            dispatcher.dispatch(_alert(i, camera=f"cam{i}"))
+        await dispatcher.close()
+        return worker, dispatcher
+
+    worker, dispatcher = asyncio.run(asyncio.wait_for(run(), 10.0))
+    assert dispatcher.completed == 6
+    assert worker.restarts == 0
+
+
+@pytest.mark.parametrize("spec", ["critical", "siren=1", "critical=0"])
+def test_bad_concurrency_specs_are_rejected(spec: str) -> None:
+    with pytest.raises(ValueError):
+        parse_concurrency(spec)
+
+
+def test_plugin_spec_needs_module_and_function() -> None:
+    with pytest.raises(ValueError):
+        CallableActuator.load("os")
+    assert isinstance(CallableActuator.load("builtins:print"), CallableActuator)
+
+
+def test_sync_plugins_run_off_the_event_loop() -> None:
+    calls: list[str] = []
+
+    async def run() -> None:
+        dispatcher = ActuatorDispatcher(CallableActuator(lambda a: calls.append(a.alert_id)))
+        dispatcher.dispatch(_alert(1))
+        await dispatcher.close()
+
+    asyncio.run(asyncio.wait_for(run(), 5.0))
+    assert calls == ["al_1"]
+
+
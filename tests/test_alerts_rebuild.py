@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from hoistwaywatch.alerts import cli
+from hoistwaywatch.alerts.segments import query
+from hoistwaywatch.contracts.alerts import HwAlertPacketV1
+
+
+def _alert(n: int) -> bytes:
+    return HwAlertPacketV1(
+        alert_id=f"al_{n}",
+        ts=datetime(2026, 1, 1, tzinfo=UTC),
+        severity="critical",
+        hazard_score=90,
+        summary="Motion detected in car path",
+        explanation={"rule_id": "R001", "why": "matched R001"},
+        trigger={"event_ids": [f"evt_{n}"]},
+    ).model_dump_json().encode("utf-8")
+
+
+class _FakeBus:
+    """Stands in for NatsBus: `stream` None means no HW_ALERTS stream; `fail_after` batches."""
+
+    stream: list[list[bytes]] | None = None
+    fail_after: int | None = None
+
+    def __init__(self, url: str) -> None:
+        pass
+
+    async def connect(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def stream_info(self, stream: str) -> Any | None:
+        return None if self.stream is None else object()
+
+    async def read_stream(self, stream: str) -> AsyncIterator[list[bytes]]:
+        assert self.stream is not None
+        for i, batch in enumerate(self.stream):
+            if i == self.fail_after:
+                raise TimeoutError("stream stalled")
+            yield batch
+
+
+@pytest.fixture
+def old_log(tmp_path: Path) -> Path:
+    out = tmp_path / "alerts.ndjson"
+    (tmp_path / "alerts-0000000000001.ndjson").write_text('{"old":1}\n')
+    (tmp_path / "alerts.names.json").write_text('{"cameras":[],"rules":[]}')
+    return out
+
+
+def _rebuild(monkeypatch: pytest.MonkeyPatch, out: Path, **bus: Any) -> None:
+    fake = type("Bus", (_FakeBus,), bus)
+    monkeypatch.setattr(cli, "NatsBus", fake)
+    args = argparse.Namespace(nats="nats://fake", out=str(out), force=True)
+    asyncio.run(cli._rebuild(args))
+
+
+@pytest.mark.parametrize(
+    ("bus", "error"),
+    [
+        ({"stream": None}, SystemExit),
+        ({"stream": [[_alert(1)], [_alert(2)]], "fail_after": 1}, TimeoutError),
+    ],
+)
+def test_failed_rebuild_leaves_the_existing_log_alone(
+    monkeypatch: pytest.MonkeyPatch, old_log: Path, bus: dict[str, Any], error: type
+) -> None:
+    before = sorted(p.name for p in old_log.parent.iterdir())
+    with pytest.raises(error):
+        _rebuild(monkeypatch, old_log, **bus)
+    assert sorted(p.name for p in old_log.parent.iterdir()) == before
+    assert (old_log.parent / "alerts-0000000000001.ndjson").read_text() == '{"old":1}\n'
+
+
+def test_rebuild_replaces_the_log_once_the_stream_is_read(
+    monkeypatch: pytest.MonkeyPatch, old_log: Path
+) -> None:
+    _rebuild(monkeypatch, old_log, stream=[[_alert(1), _alert(2)], [b"not json"]])
+    files = sorted(p.name for p in old_log.parent.iterdir())
+    assert "alerts-0000000000001.ndjson" not in files
+    assert not any(name.startswith(".") for name in files)
+    assert [json.loads(line)["alert_id"] for line in query(old_log)] == ["al_1", "al_2"]
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import time
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+
+from hoistwaywatch.alerts.segments import IndexEntry, SegmentedLog, query, segment_bases
+
+T0 = datetime(2026, 3, 1, 14, 0, tzinfo=UTC)
+
+
+def _fill(path: Path, n: int, **kwargs: object) -> SegmentedLog:
+    log = SegmentedLog(path, **kwargs)  # type: ignore[arg-type]
+    log.open()
+    for i in range(n):
+        entry = IndexEntry(
+            ts=T0 + timedelta(minutes=i),
+            severity=("info", "warning", "critical")[i % 3],
+            camera_id=f"cam{i % 2 + 1}",
+            rule_id=f"R00{i % 3 + 1}",
+        )
+        log.append(json.dumps({"n": i, "camera_id": entry.camera_id}), entry)
+    log.close()
+    return log
+
+
+def _ns(lines: object) -> list[int]:
+    return [json.loads(line)["n"] for line in lines]  # type: ignore[attr-defined]
+
+
+def test_query_by_time_range_camera_and_severity(tmp_path: Path) -> None:
+    path = tmp_path / "alerts.ndjson"
+    _fill(path, 30)
+
+    window = {"start": T0 + timedelta(minutes=10), "end": T0 + timedelta(minutes=20)}
+    assert _ns(query(path, **window)) == list(range(10, 20))
+    assert _ns(query(path, **window, cameras=["cam2"])) == [11, 13, 15, 17, 19]
+    assert _ns(query(path, **window, severities=["critical"], cameras=["cam1"])) == [14]
+    assert _ns(query(path, rules=["R002"], limit=3)) == [1, 4, 7]
+    assert _ns(query(path, cameras=["cam9"])) == []
+
+
+def test_segments_rotate_by_size_and_queries_span_them(tmp_path: Path) -> None:
+    path = tmp_path / "alerts.ndjson"
+    log = _fill(path, 50, max_bytes=200)
+
+    bases = segment_bases(tmp_path, "alerts")
+    assert len(bases) > 5
+    assert log.rotations == len(bases)
+    assert all((tmp_path / f"{b.name}.json").exists() for b in bases)
+    assert _ns(query(path)) == list(range(50))
+    assert _ns(query(path, start=T0 + timedelta(minutes=45))) == list(range(45, 50))
+
+
+def test_unsealed_segment_is_summarized_on_open(tmp_path: Path) -> None:
+    path = tmp_path / "alerts.ndjson"
+    log = SegmentedLog(path)
+    log.open()
+    log.append('{"n":0}', IndexEntry(ts=T0, severity="critical", camera_id="cam1"))
+    log.sync()  # "crash": never sealed
+    assert _ns(query(path, severities=["critical"])) == [0]
+
+    SegmentedLog(path).open()
+    (base,) = segment_bases(tmp_path, "alerts")
+    summary = json.loads((tmp_path / f"{base.name}.json").read_text())
+    assert summary["count"] == 1
+    assert _ns(query(path, severities=["critical"])) == [0]
+    assert _ns(query(path, severities=["info"])) == []
+
+
+def test_retention_deletes_old_sealed_segments(tmp_path: Path) -> None:
+    path = tmp_path / "alerts.ndjson"
+    _fill(path, 3)  # alerts from 2026-03-01
+    log = SegmentedLog(path, retention_days=1)
+    log.open()
+    assert log.expired == 1
+    assert segment_bases(tmp_path, "alerts") == []
+
+    recent = IndexEntry(ts=datetime.fromtimestamp(time.time(), UTC), severity="info")
+    log.append('{"n":9}', recent)
+    log.close()
+    assert _ns(query(path)) == [9]
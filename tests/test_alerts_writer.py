@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import asyncio
+import io
+from datetime import UTC, datetime
+from pathlib import Path
+
+import pytest
+
+from hoistwaywatch.alerts.segments import IndexEntry, SegmentedLog, segment_bases
+from hoistwaywatch.alerts.writer import AlertLogWriter
+
+ENTRY = IndexEntry(ts=datetime(2026, 1, 1, tzinfo=UTC), severity="warning", camera_id="cam1")
+
+
+def _lines(path: Path) -> list[str]:
+    return [
+        line
+        for base in segment_bases(path.parent, path.stem)
+        for line in base.parent.joinpath(base.name + ".ndjson").read_text().splitlines()
+    ]
+
+
+def test_lines_are_committed_in_groups(tmp_path: Path) -> None:
+    path = tmp_path / "log" / "alerts.ndjson"
+    echo = io.StringIO()
+
+    async def run() -> AlertLogWriter:
+        writer = AlertLogWriter(SegmentedLog(path), group_size=4, group_ms=1000.0, echo=echo)
+        await writer.start()
+        for i in range(8):
+            await writer.write(f'{{"n":{i}}}', ENTRY)
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(run())
+    lines = _lines(path)
+    assert lines == [f'{{"n":{i}}}' for i in range(8)]
+    assert echo.getvalue().splitlines() == lines
+    assert writer.lines == 8
+    assert writer.commits == 2
+
+
+def test_sync_write_returns_after_the_line_is_on_disk(tmp_path: Path) -> None:
+    path = tmp_path / "alerts.ndjson"
+    critical = IndexEntry(ts=ENTRY.ts, severity="critical")
+
+    async def run() -> list[str]:
+        # A long group window: only the sync write can close the group early.
+        writer = AlertLogWriter(SegmentedLog(path), group_size=100, group_ms=60_000.0, echo=None)
+        await writer.start()
+        await writer.write('{"severity":"info"}', ENTRY)
+        await writer.write('{"severity":"critical"}', critical, sync=True)
+        seen = _lines(path)
+        await writer.close()
+        return seen
+
+    seen = asyncio.run(asyncio.wait_for(run(), 5.0))
+    assert seen == ['{"severity":"info"}', '{"severity":"critical"}']
+
+
+def test_close_commits_a_partial_group(tmp_path: Path) -> None:
+    path = tmp_path / "alerts.ndjson"
+
+    async def run() -> None:
+        writer = AlertLogWriter(SegmentedLog(path), group_size=100, group_ms=60_000.0, echo=None)
+        await writer.start()
+        await writer.write('{"n":1}', ENTRY)
+        await writer.close()
+
+    asyncio.run(asyncio.wait_for(run(), 5.0))
+    assert _lines(path) == ['{"n":1}']
+
+
+def test_a_failed_commit_fails_its_waiters_and_the_writer_keeps_going(tmp_path: Path) -> None:
+    path = tmp_path / "alerts.ndjson"
+    critical = IndexEntry(ts=ENTRY.ts, severity="critical")
+
+    class BrokenOnce(io.StringIO):
+        broken = True
+
+        def write(self, s: str) -> int:
+            if self.broken:
+                self.broken = False
+                raise ValueError("I/O operation on closed file")
+            return super().write(s)
+
+    async def run() -> AlertLogWriter:
+        writer = AlertLogWriter(SegmentedLog(path), echo=BrokenOnce())
+        await writer.start()
+        with pytest.raises(ValueError):
+            await writer.write('{"n":1}', critical, sync=True)
+        await writer.write('{"n":2}', critical, sync=True)
+        await writer.close()
+        return writer
+
+    writer = asyncio.run(asyncio.wait_for(run(), 5.0))
+    assert writer.errors == 1
+    assert _lines(path)[-1] == '{"n":2}'
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import pytest
+
+from hoistwaywatch.bus.codecs import (
+    CODEC_NAMES,
+    CONTENT_TYPE,
+    JSON,
+    MSGPACK,
+    CodecRegistry,
+    get_codec,
+)
+from hoistwaywatch.contracts.decode import decode_event
+
+EVENT = {
+    "schema_version": 1,
+    "event_id": "evt_1",
+    "type": "vision.motion_in_zone.v1",
+    "ts": "2026-01-01T00:00:00+00:00",
+    "camera_id": "cam1",
+    "source": {"service": "vision", "instance_id": "v1"},
+    "payload": {"zone_id": "car_path", "motion_score": 0.25, "note": "ünïcode"},
+}
+
+
+@pytest.mark.parametrize("name", CODEC_NAMES)
+def test_codecs_round_trip_events(name) -> None:
+    if name != "json":
+        pytest.importorskip(name)
+    codec = get_codec(name)
+    assert codec.decode(codec.encode(EVENT)) == EVENT
+
+
+def test_subscribers_pick_the_decoder_from_the_header() -> None:
+    pytest.importorskip("msgpack")
+    registry = CodecRegistry(get_codec("json"))
+    packed = get_codec("msgpack").encode(EVENT)
+    codec = registry.for_headers({CONTENT_TYPE: MSGPACK})
+    assert decode_event(codec.decode(packed)).event_id == "evt_1"
+    # Publishers from before codecs send no headers at all.
+    assert registry.for_headers(None).content_type == JSON
+
+
+def test_unknown_codecs_are_rejected() -> None:
+    with pytest.raises(ValueError, match="unknown codec"):
+        get_codec("cbor")
+    with pytest.raises(ValueError, match="content type"):
+        CodecRegistry(get_codec("json")).for_headers({CONTENT_TYPE: "application/cbor"})
@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from typing import Any
+
+import nats.errors
+import pytest
+
+from hoistwaywatch.bus.nats_bus import NatsBus
+from hoistwaywatch.observability.metrics import Registry
+
+
+class _Msg:
+    def __init__(self, seq: int, *, fail_ack: bool = False) -> None:
+        self.data = b'{"n":%d}' % seq
+        self.headers = None
+        self.metadata = SimpleNamespace(sequence=SimpleNamespace(stream=seq))
+        self.acked = self.naked = False
+        self._fail_ack = fail_ack
+
+    async def ack(self) -> None:
+        if self._fail_ack:
+            raise nats.errors.ConnectionReconnectingError()
+        self.acked = True
+
+    async def nak(self) -> None:
+        self.naked = True
+
+
+class _PullSub:
+    """Hands out the queued batches, then times out like an idle consumer."""
+
+    def __init__(self, batches: list[list[_Msg]]) -> None:
+        self._batches = list(batches)
+        self.drained = asyncio.Event()
+        self.unsubscribed = False
+
+    async def fetch(self, batch: int, timeout: float) -> list[_Msg]:
+        if self._batches:
+            return self._batches.pop(0)
+        self.drained.set()
+        await asyncio.sleep(0.01)
+        raise nats.errors.TimeoutError()
+
+    async def unsubscribe(self) -> None:
+        self.unsubscribed = True
+
+
+class _JetStream:
+    def __init__(self, psub: _PullSub, *, messages: int = 0, last_seq: int = 0) -> None:
+        self._psub = psub
+        self._state = SimpleNamespace(messages=messages, last_seq=last_seq)
+
+    async def pull_subscribe(self, subject: str, **kwargs: Any) -> _PullSub:
+        return self._psub
+
+    async def stream_info(self, stream: str) -> Any:
+        return SimpleNamespace(
+            state=self._state, config=SimpleNamespace(subjects=["hw.alerts.v1"])
+        )
+
+
+def _bus(js: _JetStream) -> NatsBus:
+    bus = NatsBus("nats://fake", registry=Registry())
+    bus._nc = SimpleNamespace(jetstream=lambda: js)  # type: ignore[assignment]
+    return bus
+
+
+def _consume(batches: list[list[_Msg]], handler: Any) -> NatsBus:
+    psub = _PullSub(batches)
+
+    async def run() -> NatsBus:
+        bus = _bus(_JetStream(psub))
+        await bus.consume_durable("hw.events.>", handler, durable="test")
+        await asyncio.wait_for(psub.drained.wait(), 2.0)
+        task = bus._consumers[0]
+        assert not task.done()
+        task.cancel()
+        return bus
+
+    return asyncio.run(run())
+
+
+def test_handled_batches_are_acked_and_failed_ones_nakked() -> None:
+    good, bad = [_Msg(1), _Msg(2)], [_Msg(3)]
+    seen: list[list[Any]] = []
+
+    async def handler(batch: list[Any]) -> None:
+        seen.append(batch)
+        if len(seen) == 2:
+            raise RuntimeError("publish failed")
+
+    _consume([good, bad], handler)
+    assert [m.acked for m in good] == [True, True]
+    assert bad[0].naked and not bad[0].acked
+    assert seen == [[b'{"n":1}', b'{"n":2}'], [b'{"n":3}']]
+
+
+def test_failed_acks_are_counted_and_do_not_stop_the_consumer() -> None:
+    async def handler(batch: list[Any]) -> None:
+        pass
+
+    later = [_Msg(2)]
+    bus = _consume([[_Msg(1, fail_ack=True)], later], handler)
+    assert bus.ack_errors == 1
+    assert later[0].acked
+
+
+def test_a_handler_cancelling_itself_is_a_failed_batch_not_a_stopped_consumer() -> None:
+    async def handler(batch: list[Any]) -> None:
+        raise asyncio.CancelledError()
+
+    msgs = [_Msg(1)]
+    _consume([msgs], handler)
+    assert msgs[0].naked
+
+
+def test_read_stream_ends_at_the_last_sequence() -> None:
+    psub = _PullSub([[_Msg(1), _Msg(2)], [_Msg(3)], [_Msg(4)]])
+
+    async def run() -> list[Any]:
+        bus = _bus(_JetStream(psub, messages=3, last_seq=3))
+        return [body async for batch in bus.read_stream("HW_ALERTS") for body in batch]
+
+    assert asyncio.run(run()) == [b'{"n":1}', b'{"n":2}', b'{"n":3}']
+    assert psub.unsubscribed
+
+
+def test_read_stream_that_stalls_before_the_end_raises() -> None:
+    psub = _PullSub([[_Msg(1)]])
+
+    async def run() -> None:
+        bus = _bus(_JetStream(psub, messages=3, last_seq=3))
+        async for _ in bus.read_stream("HW_ALERTS"):
+            pass
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(run())
+    assert psub.unsubscribed
+
+
+def test_empty_stream_reads_nothing() -> None:
+    async def run() -> list[Any]:
+        bus = _bus(_JetStream(_PullSub([]), messages=0, last_seq=0))
+        return [batch async for batch in bus.read_stream("HW_ALERTS")]
+
+    assert asyncio.run(run()) == []
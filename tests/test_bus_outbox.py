@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from hoistwaywatch.bus.nats_bus import NatsBus
+from hoistwaywatch.bus.outbox import Outbox
+from hoistwaywatch.observability.metrics import Registry
+
+
+def _evt(type_: str, zone: str | None = None, n: int = 0) -> dict[str, Any]:
+    payload: dict[str, Any] = {"n": n}
+    if zone is not None:
+        payload["zone_id"] = zone
+    return {"type": type_, "camera_id": "cam1", "payload": payload}
+
+
+MOTION = "vision.motion_in_zone.v1"
+TAMPER = "vision.tamper_or_occlusion.v1"
+
+
+def test_motion_coalesces_to_latest_per_zone() -> None:
+    box = Outbox()
+    for n in range(50):
+        box.put("hw.events.vision", _evt(MOTION, "car_path", n))
+        box.put("hw.events.vision", _evt(MOTION, "pit", n))
+    taken = box.take()
+    assert [(m["payload"]["zone_id"], m["payload"]["n"]) for _, m in taken] == [
+        ("car_path", 49),
+        ("pit", 49),
+    ]
+    assert box.stats() == {"queued": 0, "enqueued": 100, "coalesced": 98, "dropped": 0}
+
+
+def test_full_outbox_drops_oldest_but_never_tamper_or_alerts() -> None:
+    box = Outbox(max_pending=3)
+    box.put("hw.events.vision", _evt(TAMPER, n=-1))
+    for n in range(10):
+        box.put("hw.events.capture", _evt("vision.person_in_zone.v1", n=n))
+    box.put("hw.alerts.v1", {"alert_id": "al_1"})
+    taken = box.take()
+    # Never-drop messages first, then the newest droppable ones in order.
+    assert [m.get("alert_id") or m["payload"]["n"] for _, m in taken] == [-1, "al_1", 7, 8, 9]
+    assert box.dropped == 7
+
+
+def test_requeue_does_not_overwrite_newer_coalesced_message() -> None:
+    box = Outbox()
+    box.put("hw.events.vision", _evt(MOTION, "car_path", 1))
+    failed = box.take()
+    box.put("hw.events.vision", _evt(MOTION, "car_path", 2))
+    box.requeue(failed)
+    assert [m["payload"]["n"] for _, m in box.take()] == [2]
+    assert box.enqueued == 2
+
+
+def test_a_failed_flush_puts_the_whole_batch_back() -> None:
+    class FlakyClient:
+        def __init__(self) -> None:
+            self.sent: list[bytes] = []
+            self.flushes = 0
+
+        async def publish(self, subject: str, data: bytes, headers: Any = None) -> None:
+            self.sent.append(data)
+
+        async def flush(self) -> None:
+            self.flushes += 1
+            if self.flushes == 1:
+                raise TimeoutError("nats: flush timeout")
+
+    box = Outbox()
+    bus = NatsBus("nats://fake", outbox=box, registry=Registry())
+    client = FlakyClient()
+    bus._nc = client  # type: ignore[assignment]
+    box.put("hw.events.vision", _evt(TAMPER, n=1))
+    box.put("hw.events.vision", _evt(MOTION, "pit", 2))
+
+    asyncio.run(bus._flush_outbox())
+    assert len(box) == 2
+    assert (bus.published, bus.requeued, bus.publish_errors) == (0, 2, 1)
+
+    asyncio.run(bus._flush_outbox())
+    assert len(box) == 0
+    assert bus.published == 2
+    assert len(client.sent) == 4  # the first batch may have reached the server: sent again
+
+
+class _Client:
+    """nats client stand-in whose first flush fails (`fail`) or hangs until cancelled."""
+
+    is_connected = True
+
+    def __init__(self, first_flush: str) -> None:
+        self.first_flush = first_flush
+        self.sent: list[bytes] = []
+        self.flushes = 0
+        self.flushing = asyncio.Event()
+
+    async def publish(self, subject: str, data: bytes, headers: Any = None) -> None:
+        self.sent.append(data)
+
+    async def flush(self) -> None:
+        self.flushes += 1
+        if self.flushes == 1:
+            self.flushing.set()
+            if self.first_flush == "fail":
+                raise TimeoutError("nats: flush timeout")
+            await asyncio.Event().wait()
+
+    async def drain(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+def _bus(client: _Client) -> tuple[NatsBus, Outbox]:
+    box = Outbox()
+    bus = NatsBus("nats://fake", outbox=box, flush_interval_ms=1.0, registry=Registry())
+    bus._nc = client  # type: ignore[assignment]
+    return bus, box
+
+
+def test_a_requeued_batch_is_retried_without_further_publishes() -> None:
+    async def run() -> NatsBus:
+        bus, _ = _bus(_Client("fail"))
+        flusher = asyncio.create_task(bus._flush_loop())
+        await bus.publish_json("hw.alerts.v1", {"alert_id": "al_1"})
+        for _ in range(100):
+            if bus.published:
+                break
+            await asyncio.sleep(0.01)
+        flusher.cancel()
+        return bus
+
+    bus = asyncio.run(run())
+    assert (bus.requeued, bus.published) == (1, 1)
+
+
+def test_close_keeps_a_batch_cancelled_mid_flush() -> None:
+    async def run() -> tuple[_Client, NatsBus]:
+        client = _Client("hang")
+        bus, box = _bus(client)
+        bus._flusher = asyncio.create_task(bus._flush_loop())
+        await bus.publish_json("hw.alerts.v1", {"alert_id": "al_1"})
+        await asyncio.wait_for(client.flushing.wait(), 1.0)
+        await bus.close()
+        assert len(box) == 0
+        return client, bus
+
+    client, bus = asyncio.run(run())
+    assert client.flushes == 2
+    assert bus.published == 1
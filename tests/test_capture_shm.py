@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import time
+import uuid
+
+import numpy as np
+
+from hoistwaywatch.capture.shm import FrameRingReader, FrameRingWriter
+
+
+def test_reader_sees_newest_frame_zero_copy_and_detects_overwrite() -> None:
+    name = f"hw_test_{uuid.uuid4().hex[:8]}"
+    writer = FrameRingWriter(name, slots=2)
+    reader = FrameRingReader(name)
+    try:
+        for i in range(3):
+            img = np.full((4, 6, 3), i, dtype=np.uint8)
+            assert writer.write(img, captured_at=time.time(), captured_mono=time.monotonic())
+
+        reader.start()
+        assert reader.is_opened
+        frame = reader.latest(timeout=1.0)
+        assert frame is not None
+        assert frame.index == 2
+        assert frame.image.shape == (4, 6, 3)
+        assert int(frame.image[0, 0, 0]) == 2
+        assert frame.image.base is not None  # view into shared memory, not a copy
+        assert not reader.overwritten(frame)
+
+        assert reader.latest(after=frame.index, timeout=0.01) is None
+
+        # Two more writes wrap the 2-slot ring back onto the frame we hold.
+        for i in (3, 4):
+            writer.write(np.full((4, 6, 3), i, dtype=np.uint8), captured_at=0.0, captured_mono=0.0)
+        assert reader.overwritten(frame)
+        newest = reader.latest(after=frame.index, timeout=1.0)
+        assert newest is not None and newest.index == 4
+        assert reader.stats.dropped == 1
+        del frame, newest
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_reattaching_to_a_stalled_writer_does_not_repeat_its_last_frame() -> None:
+    name = f"hw_test_{uuid.uuid4().hex[:8]}"
+    writer = FrameRingWriter(name, slots=2)
+    reader = FrameRingReader(name, poll_sec=0.001, reattach_after_sec=0.02)
+    try:
+        for i in range(5):
+            writer.write(np.full((2, 2), i, dtype=np.uint8), captured_at=0.0, captured_mono=0.0)
+        reader.start()
+        frame = reader.latest(timeout=1.0)
+        assert frame is not None and frame.index == 4
+        # The writer stalls: several re-attaches later, nothing new has been handed out.
+        assert reader.latest(after=frame.index, timeout=0.5) is None
+        assert reader.stats.reopens >= 2
+        assert (reader.stats.frames, reader.stats.dropped) == (1, 0)
+
+        writer.write(np.full((2, 2), 5, dtype=np.uint8), captured_at=0.0, captured_mono=0.0)
+        newest = reader.latest(after=frame.index, timeout=1.0)
+        assert newest is not None and newest.index == 5
+        assert reader.stats.dropped == 0
+        del frame, newest
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_restarted_writer_continues_the_frame_indexes() -> None:
+    name = f"hw_test_{uuid.uuid4().hex[:8]}"
+    writer = FrameRingWriter(name, slots=2)
+    reader = FrameRingReader(name, poll_sec=0.001, reattach_after_sec=0.02)
+    try:
+        for i in range(3):
+            writer.write(np.full((2, 2), i, dtype=np.uint8), captured_at=0.0, captured_mono=0.0)
+        reader.start()
+        frame = reader.latest(timeout=1.0)
+        assert frame is not None and frame.index == 2
+        writer.close()
+        writer = FrameRingWriter(name, slots=2)
+        writer.write(np.full((2, 2), 9, dtype=np.uint8), captured_at=0.0, captured_mono=0.0)
+        newest = reader.latest(after=frame.index, timeout=1.0)
+        assert newest is not None and newest.index == 3
+        assert int(newest.image[0, 0]) == 9
+        del frame, newest
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_oversized_frame_is_rejected() -> None:
+    writer = FrameRingWriter(f"hw_test_{uuid.uuid4().hex[:8]}", slots=2)
+    try:
+        assert writer.write(np.zeros((2, 2), dtype=np.uint8), captured_at=0.0, captured_mono=0.0)
+        assert not writer.write(
+            np.zeros((4, 4), dtype=np.uint8), captured_at=0.0, captured_mono=0.0
+        )
+    finally:
+        writer.close()
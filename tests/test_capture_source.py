@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import threading
+
+import numpy as np
+
+from hoistwaywatch.capture.source import LatestFrameReader
+
+
+class _FakeCapture:
+    """Yields numbered frames; blocks after `n` until released."""
+
+    def __init__(self, n: int) -> None:
+        self._n = n
+        self._i = 0
+        self.retrieved = 0
+        self.done = threading.Event()
+        self.release_gate = threading.Event()
+
+    def isOpened(self) -> bool:  # noqa: N802 - OpenCV API
+        return True
+
+    def grab(self) -> bool:
+        if self._i >= self._n:
+            self.done.set()
+            self.release_gate.wait(0.05)
+            return False
+        self._i += 1
+        return True
+
+    def retrieve(self):
+        self.retrieved += 1
+        return True, np.full((2, 2), self._i, dtype=np.uint8)
+
+    def release(self) -> None:
+        self.release_gate.set()
+
+
+def test_slow_consumer_gets_newest_frame_and_drops_are_counted() -> None:
+    cap = _FakeCapture(5)
+    reader = LatestFrameReader("fake", opener=lambda _src: cap)
+    reader.start()
+    try:
+        assert cap.done.wait(2.0)
+        frame = reader.latest(timeout=1.0)
+        assert frame is not None
+        assert frame.index == 4
+        assert int(frame.image[0, 0]) == 5
+        assert frame.age_sec() >= 0.0
+        assert reader.stats.frames == 5
+        assert reader.stats.dropped == 4
+        # Nothing newer: times out instead of re-delivering the same frame.
+        assert reader.latest(after=frame.index, timeout=0.05) is None
+    finally:
+        reader.close()
+
+
+def test_stride_grabs_every_frame_but_retrieves_every_nth() -> None:
+    cap = _FakeCapture(10)
+    reader = LatestFrameReader("fake", stride=3, opener=lambda _src: cap)
+    reader.start()
+    try:
+        assert cap.done.wait(2.0)
+        frame = reader.latest(timeout=1.0)
+        assert frame is not None
+        # Indexes are source frame numbers: frames 0, 3, 6 and 9 were decoded.
+        assert frame.index == 9
+        assert int(frame.image[0, 0]) == 10
+        assert cap.retrieved == 4
+        assert reader.stats.grabbed == 10
+        assert reader.stats.frames == 4
+        assert reader.stats.dropped == 3
+    finally:
+        reader.close()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import json
+from datetime import UTC, datetime
+
+import pytest
+
+from hoistwaywatch.contracts.alerts import HwAlertPacketV1
+from hoistwaywatch.contracts.decode import decode_alert, decode_event
+from hoistwaywatch.contracts.events import HwEventV1
+
+EVENT = HwEventV1(
+    event_id="evt_1",
+    type="vision.motion_in_zone.v1",
+    ts=datetime(2026, 1, 1, tzinfo=UTC),
+    site_id="site",
+    camera_id="cam1",
+    source={"service": "vision", "instance_id": "v1"},
+    payload={"zone_id": "car_path", "motion_score": 0.2},
+    trace={"captured_at": 1767225600.0, "published_at": 1767225600.004},
+).model_dump_json()
+
+
+@pytest.mark.parametrize("mode", ["strict", "fast"])
+def test_modes_agree_on_the_fields_the_engine_reads(mode) -> None:
+    event = decode_event(EVENT.encode("utf-8"), mode=mode)
+    assert event.event_id == "evt_1"
+    assert event.type == "vision.motion_in_zone.v1"
+    assert event.ts == datetime(2026, 1, 1, tzinfo=UTC)
+    assert event.camera_id == "cam1"
+    assert event.payload == {"zone_id": "car_path", "motion_score": 0.2}
+    assert event.trace == {"captured_at": 1767225600.0, "published_at": 1767225600.004}
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        {"type": "vision.motion.v1"},
+        {"ts": "yesterday"},
+        {"ts": "2026-01-01T00:00:00"},
+        {"camera_id": 7},
+        {"payload": []},
+        {"schema_version": 2},
+        {"trace": {"captured_at": "now"}},
+    ],
+)
+@pytest.mark.parametrize("mode", ["strict", "fast"])
+def test_both_modes_reject_bad_envelopes(mode, change) -> None:
+    data = json.dumps({**json.loads(EVENT), **change})
+    with pytest.raises(ValueError):
+        decode_event(data, mode=mode)
+
+
+def test_fast_alert_decode_checks_severity_and_score() -> None:
+    alert = HwAlertPacketV1(
+        alert_id="al_1",
+        ts=datetime(2026, 1, 1, tzinfo=UTC),
+        severity="critical",
+        hazard_score=90,
+        summary="Motion detected in car path",
+        explanation={"rule_id": "R001", "why": "matched R001"},
+        trigger={"event_ids": ["evt_1"]},
+    ).model_dump()
+    alert["ts"] = alert["ts"].isoformat()
+    decoded = decode_alert(json.dumps(alert), mode="fast")
+    assert (decoded.alert_id, decoded.severity, decoded.hazard_score) == ("al_1", "critical", 90)
+    assert decoded.rule_id == "R001"
+    with pytest.raises(ValueError):
+        decode_alert(json.dumps({**alert, "hazard_score": 120}), mode="fast")
+    with pytest.raises(ValueError):
+        decode_alert(json.dumps({**alert, "severity": "panic"}), mode="fast")
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import socket
+from typing import Any
+
+import pytest
+
+from hoistwaywatch.observability.metrics import MetricsExporter, Registry
+
+
+def test_prometheus_text_for_counters_gauges_and_histograms() -> None:
+    reg = Registry()
+    reg.counter("hw_events_total", "Events", ["type"]).labels("motion").inc(3)
+    reg.gauge("hw_queue", "Queued").set(2.5)
+    hist = reg.histogram("hw_latency_seconds", "Latency", buckets=(0.01, 0.1, 1.0))
+    for v in (0.005, 0.05, 0.05, 2.0):
+        hist.observe(v)
+
+    text = reg.render()
+    assert "# TYPE hw_events_total counter" in text
+    assert 'hw_events_total{type="motion"} 3' in text
+    assert "hw_queue 2.5" in text
+    assert 'hw_latency_seconds_bucket{le="0.01"} 1' in text
+    assert 'hw_latency_seconds_bucket{le="0.1"} 3' in text
+    assert 'hw_latency_seconds_bucket{le="+Inf"} 4' in text
+    assert "hw_latency_seconds_count 4" in text
+
+
+def test_registry_returns_existing_metrics_and_rejects_kind_changes() -> None:
+    reg = Registry()
+    assert reg.counter("c", "C") is reg.counter("c", "C")
+    with pytest.raises(ValueError):
+        reg.gauge("c", "C")
+    with pytest.raises(ValueError):
+        reg.counter("l", "L", ["a", "b"]).labels("only-one")
+
+
+def test_function_backed_values_and_quantiles_in_snapshot() -> None:
+    reg = Registry()
+    state = {"n": 0}
+    reg.counter("hw_published_total", "Published").set_function(lambda: state["n"])
+    hist = reg.histogram("hw_t_seconds", "T", buckets=(1.0, 2.0, 3.0, 4.0))
+    for v in (0.5, 1.5, 2.5, 3.5):
+        hist.observe(v)
+    state["n"] = 7
+
+    snap = reg.snapshot()
+    assert snap["hw_published_total"] == 7
+    assert snap["hw_t_seconds"]["count"] == 4
+    assert snap["hw_t_seconds"]["p50"] == pytest.approx(2.0)
+    assert 3.0 <= snap["hw_t_seconds"]["p99"] <= 4.0
+
+
+class _Bus:
+    def __init__(self) -> None:
+        self.published: list[tuple[str, dict[str, Any]]] = []
+
+    async def publish_json(self, subject: str, payload: dict) -> None:
+        self.published.append((subject, payload))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_exporter_serves_metrics_and_publishes_snapshots() -> None:
+    reg = Registry()
+    reg.counter("hw_x_total", "X").inc()
+    bus = _Bus()
+    port = _free_port()
+
+    async def run() -> tuple[bytes, bytes]:
+        exporter = MetricsExporter(
+            service="rules", port=port, interval_sec=0.01, bus=bus, registry=reg
+        )
+        await exporter.start()
+        responses = []
+        for path in (b"/metrics", b"/nope"):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET " + path + b" HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            responses.append(await reader.read())
+            writer.close()
+        await asyncio.sleep(0.05)
+        await exporter.close()
+        return responses[0], responses[1]
+
+    ok, missing = asyncio.run(asyncio.wait_for(run(), 5.0))
+    assert ok.startswith(b"HTTP/1.1 200 OK")
+    assert b"hw_x_total 1" in ok
+    assert missing.startswith(b"HTTP/1.1 404")
+    subject, payload = bus.published[0]
+    assert subject == "hw.metrics.rules"
+    assert payload["service"] == "rules" and payload["hw_x_total"] == 1
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from hoistwaywatch.alerts.actuator import ActuatorDispatcher, CallableActuator
+from hoistwaywatch.capture.source import Frame
+from hoistwaywatch.contracts.decode import decode_alert, decode_event
+from hoistwaywatch.observability.metrics import Registry
+from hoistwaywatch.observability.tracing import STAGES, TraceRecorder, spans, stamp
+from hoistwaywatch.rules.engine import RulesEngine
+from hoistwaywatch.vision.pipeline import MotionPipeline, PipelineConfig
+from hoistwaywatch.vision.zones import load_zones
+
+CONFIGS = Path(__file__).resolve().parents[1] / "configs"
+
+# Generous for shared CI runners: an in-process hop is well under a millisecond and a frame
+# at 320 px takes a few; anything near this bound means a stage started blocking.
+END_TO_END_BOUND_SEC = 0.25
+
+
+def test_spans_cover_consecutive_stamped_stages() -> None:
+    trace = {"captured_at": 10.0, "published_at": 10.02, "received_at": 10.05}
+    out = spans(trace)
+    assert out["captured_to_published"] == pytest.approx(0.02)
+    assert out["published_to_received"] == pytest.approx(0.03)  # evaluated_at missing
+    assert out["end_to_end"] == pytest.approx(0.05)
+    assert spans({"captured_at": 1.0}) == {}
+    # Clock skew between hosts never yields negative latency.
+    assert spans({"captured_at": 2.0, "published_at": 1.5})["captured_to_published"] == 0.0
+
+
+def test_stamp_only_touches_traced_messages() -> None:
+    traced, untraced = {"trace": {"captured_at": 1.0}}, {"type": "x"}
+    stamp(traced, "published_at", 2.0)
+    stamp(untraced, "published_at", 2.0)
+    assert traced["trace"] == {"captured_at": 1.0, "published_at": 2.0}
+    assert untraced == {"type": "x"}
+
+
+def _frames(n: int = 40, size: tuple[int, int] = (270, 480)) -> list[np.ndarray]:
+    rng = np.random.default_rng(5)
+    h, w = size
+    # Well lit (vision only reports motion with confidence >= 0.5), a dark blob jumping around.
+    bg = cv2.GaussianBlur(rng.integers(140, 255, (h, w, 3), dtype=np.uint8), (0, 0), 3)
+    images = []
+    for i in range(n):
+        img = bg.copy()
+        cx, cy = int(w * (0.1 + 0.8 * (i * 7 % n) / n)), int(h * (0.5 + 0.3 * (i % 2)))
+        cv2.circle(img, (cx, cy), h // 4, (20,) * 3, -1)
+        images.append(img)
+    return images
+
+
+@pytest.mark.parametrize("mode", ["strict", "fast"])
+def test_local_pipeline_frame_to_actuator_latency_is_bounded(mode: str) -> None:
+    """Frame -> vision -> rules -> alerts -> actuator in one process, wire encoding included."""
+    pipeline = MotionPipeline(
+        PipelineConfig(
+            site_id="s", camera_id="cam1", instance_id="t", process_width=320, roi=True,
+            publish_interval_ms=0,
+        ),
+        load_zones(str(CONFIGS / "example-zones.json")),
+    )  # fmt: skip
+    engine = RulesEngine.load_yaml(str(CONFIGS / "rules.yaml"))
+    tracer = TraceRecorder(registry=Registry())
+    actuated: list[str] = []
+
+    async def run() -> None:
+        dispatcher = ActuatorDispatcher(
+            CallableActuator(lambda alert: actuated.append(alert.alert_id)),
+            dedupe=False,
+            registry=Registry(),
+            tracer=tracer,
+        )
+        await dispatcher.start()
+        for i, image in enumerate(_frames()):
+            frame = Frame(image, i, captured_at=time.time(), captured_mono=time.monotonic())
+            for evt in pipeline.process(frame):
+                stamp(evt, "published_at")
+                event = decode_event(json.dumps(evt).encode(), mode=mode)  # type: ignore[arg-type]
+                for alert in engine.evaluate(event):
+                    wire = json.dumps(alert.model_dump(mode="json")).encode()
+                    received = decode_alert(wire, mode=mode)  # type: ignore[arg-type]
+                    assert received.trace is not None
+                    trace = {**received.trace, "received_at": time.time()}
+                    dispatcher.dispatch(received, received=time.monotonic(), trace=trace)
+            await asyncio.sleep(0)
+        await dispatcher.close()
+
+    asyncio.run(asyncio.wait_for(run(), 30.0))
+
+    assert actuated, "the clip should raise at least one alert"
+    report = tracer.report()
+    assert set(report) == {
+        f"{a[:-3]}_to_{b[:-3]}" for a, b in zip(STAGES, STAGES[1:], strict=False)
+    } | {"end_to_end"}
+    assert report["end_to_end"]["count"] == len(actuated)
+    assert report["end_to_end"]["p99_ms"] < END_TO_END_BOUND_SEC * 1000.0
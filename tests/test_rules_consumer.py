@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from datetime import UTC, datetime
+from typing import Any
+
+from hoistwaywatch.rules.consumer import BatchedEvaluator
+from hoistwaywatch.rules.engine import RulesEngine
+
+RULES = {
+    "rules": [
+        {
+            "id": "R001.motion_in_car_path",
+            "when": {"event_type": "vision.motion_in_zone.v1", "zone_id": "car_path"},
+            "then": {"severity": "critical"},
+        }
+    ]
+}
+
+
+def _event(i: int, zone: str) -> bytes:
+    evt = {
+        "event_id": f"evt_{i}",
+        "type": "vision.motion_in_zone.v1",
+        "ts": datetime.now(UTC).isoformat(),
+        "camera_id": "cam1",
+        "source": {"service": "vision", "instance_id": "v1"},
+        "payload": {"zone_id": zone, "motion_score": 0.5},
+    }
+    return json.dumps(evt).encode("utf-8")
+
+
+def test_queued_events_are_evaluated_and_published_as_one_batch() -> None:
+    calls: list[tuple[str, list[dict[str, Any]]]] = []
+
+    async def publish_many(subject: str, payloads: list[dict[str, Any]]) -> int:
+        calls.append((subject, payloads))
+        return len(payloads)
+
+    async def scenario() -> BatchedEvaluator:
+        evaluator = BatchedEvaluator(RulesEngine(RULES), publish_many, subject="hw.alerts.v1")
+        for i, zone in enumerate(["car_path", "pit", "car_path"]):
+            await evaluator.submit(_event(i, zone))
+        await evaluator.submit(b'{"type": "not-an-event"}')
+        worker = asyncio.create_task(evaluator.run())
+        while evaluator.batches == 0:
+            await asyncio.sleep(0)
+        worker.cancel()
+        return evaluator
+
+    evaluator = asyncio.run(scenario())
+    assert len(calls) == 1
+    subject, alerts = calls[0]
+    assert subject == "hw.alerts.v1"
+    assert [a["trigger"]["event_ids"] for a in alerts] == [["evt_0"], ["evt_2"]]
+    assert evaluator.stats() == {
+        "batches": 1,
+        "events": 3,
+        "invalid": 1,
+        "alerts": 2,
+        "failed_batches": 0,
+        "queued": 0,
+    }
+
+
+def test_a_failed_publish_does_not_stop_the_evaluator() -> None:
+    published: list[str] = []
+
+    async def publish_many(subject: str, payloads: list[dict[str, Any]]) -> int:
+        if not published:
+            published.append("failed")
+            raise TimeoutError("nats: flush timeout")
+        published.extend(a["trigger"]["event_ids"][0] for a in payloads)
+        return len(payloads)
+
+    async def scenario() -> BatchedEvaluator:
+        evaluator = BatchedEvaluator(
+            RulesEngine(RULES), publish_many, subject="hw.alerts.v1", max_batch=1
+        )
+        worker = asyncio.create_task(evaluator.run())
+        for i in range(3):
+            await evaluator.submit(_event(i, "car_path"))
+        await asyncio.wait_for(evaluator.drain(), 1.0)
+        assert not worker.done()
+        worker.cancel()
+        return evaluator
+
+    evaluator = asyncio.run(scenario())
+    assert published == ["failed", "evt_1", "evt_2"]
+    assert evaluator.stats()["failed_batches"] == 1
+    assert evaluator.stats()["queued"] == 0
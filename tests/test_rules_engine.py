@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
+
+import pytest
+import yaml
 
 from hoistwaywatch.contracts.events import HwEventV1
+from hoistwaywatch.rules.compiler import RuleError
 from hoistwaywatch.rules.engine import RulesEngine
 
 
@@ -95,3 +99,158 @@ rules:
     assert len(alerts) == 1
     assert alerts[0].hazard_score == 100
 
+
+def test_indexed_rules_keep_rulebook_order_across_zone_and_wildcard_rules(tmp_path) -> None:
+    rules = tmp_path / "rules.yaml"
+    rules.write_text(
+        """\
+version: 1
+rules:
+  - id: "R1.any_zone"
+    when:
+      event_type: "vision.motion_in_zone.v1"
+      motion_score_gte: 0.15
+    then: {severity: "info", hazard_score: 10, summary: "any zone"}
+  - id: "R2.pit"
+    when:
+      event_type: "vision.motion_in_zone.v1"
+      zone_id: "pit"
+    then: {severity: "warning", hazard_score: 50, summary: "pit"}
+  - id: "R3.car_path"
+    when:
+      event_type: "vision.motion_in_zone.v1"
+      zone_id: "car_path"
+    then: {severity: "critical", hazard_score: 90, summary: "car path"}
+  - id: "R4.any_zone_again"
+    when:
+      event_type: "vision.motion_in_zone.v1"
+    then: {severity: "info", hazard_score: 5, summary: "any zone again"}
+  - id: "R5.health"
+    when:
+      event_type: "capture.camera_health.v1"
+    then: {severity: "warning", hazard_score: 65, summary: "health"}
+""",
+        encoding="utf-8",
+    )
+
+    engine = RulesEngine.load_yaml(str(rules))
+    event = HwEventV1(
+        event_id="evt_1",
+        type="vision.motion_in_zone.v1",
+        ts=datetime.now(UTC),
+        camera_id="cam1",
+        source={"service": "vision", "instance_id": "v1"},
+        payload={"zone_id": "car_path", "motion_score": 0.2, "confidence": 0.8},
+    )
+    ids = [a.explanation.rule_id for a in engine.evaluate(event)]
+    assert ids == ["R1.any_zone", "R3.car_path", "R4.any_zone_again"]
+
+
+@pytest.mark.parametrize(
+    ("when", "message"),
+    [
+        ({"event_type": "vision.motion_in_zone.v1", "motion_score_gte": "high"}, "number"),
+        ({"event_type": "vision.motion_in_zon.v1"}, "unknown event_type"),
+        ({"event_type": "vision.motion_in_zone.v1", "zone": "pit"}, "unknown when key"),
+        ({"event_type": "vision.motion_in_zone.v1", "and_recent": ["person"]}, "mapping"),
+        (
+            {
+                "event_type": "vision.motion_in_zone.v1",
+                "and_recent": [{"event_type": "vision.person_in_zone.v1", "min_count": 0}],
+            },
+            "min_count",
+        ),
+        ({"event_type": "vision.motion_in_zone.v1", "zone_id": ["pit"]}, "when.zone_id"),
+        ({"event_type": "vision.motion_in_zone.v1", "zone_id": 1}, "when.zone_id"),
+        (
+            {
+                "event_type": "vision.motion_in_zone.v1",
+                "and_recent": [{"event_type": "vision.person_in_zone.v1", "zone_id": 1}],
+            },
+            "zone_id",
+        ),
+    ],
+)
+def test_malformed_rules_are_rejected_at_load(tmp_path, when, message) -> None:
+    rules = tmp_path / "rules.yaml"
+    rules.write_text(
+        yaml.safe_dump({"version": 1, "rules": [{"id": "R1", "when": when, "then": {}}]}),
+        encoding="utf-8",
+    )
+    with pytest.raises(RuleError, match=message):
+        RulesEngine.load_yaml(str(rules))
+
+
+def _motion(event_id: str, ts: datetime, camera_id: str = "cam1") -> HwEventV1:
+    return HwEventV1(
+        event_id=event_id,
+        type="vision.motion_in_zone.v1",
+        ts=ts,
+        site_id="site",
+        camera_id=camera_id,
+        source={"service": "vision", "instance_id": "v1"},
+        payload={"zone_id": "pit", "motion_score": 0.5, "confidence": 0.9},
+    )
+
+
+def test_min_count_within_window_is_evaluated_in_event_time() -> None:
+    engine = RulesEngine(
+        {
+            "rules": [
+                {
+                    "id": "R200.repeated_pit_motion",
+                    "when": {
+                        "event_type": "vision.motion_in_zone.v1",
+                        "zone_id": "pit",
+                        "and_recent": [
+                            {
+                                "event_type": "vision.motion_in_zone.v1",
+                                "zone_id": "pit",
+                                "within_sec": 10.0,
+                                "min_count": 3,
+                            }
+                        ],
+                    },
+                    "then": {"severity": "warning"},
+                }
+            ]
+        }
+    )
+    # A replayed burst: wall-clock arrival is instant, event time spans a minute.
+    base = datetime(2026, 1, 1, tzinfo=UTC).timestamp()
+    fired = [
+        bool(engine.evaluate(_motion(f"evt_{i}", datetime.fromtimestamp(base + t, UTC))))
+        for i, t in enumerate((0, 20, 40, 45, 48))
+    ]
+    assert fired == [False, False, False, False, True]
+
+
+def test_a_camera_clock_running_ahead_does_not_stall_correlation_for_others() -> None:
+    engine = RulesEngine(
+        {
+            "rules": [
+                {
+                    "id": "R201.pit_motion_twice",
+                    "when": {
+                        "event_type": "vision.motion_in_zone.v1",
+                        "zone_id": "pit",
+                        "and_recent": [
+                            {
+                                "event_type": "vision.motion_in_zone.v1",
+                                "zone_id": "pit",
+                                "within_sec": 10.0,
+                                "min_count": 2,
+                            }
+                        ],
+                    },
+                    "then": {"severity": "warning"},
+                }
+            ]
+        }
+    )
+    now = datetime.now(UTC)
+    # cam2's clock is an hour ahead of everyone else's.
+    assert not engine.evaluate(_motion("evt_0", now + timedelta(hours=1), "cam2"))
+    assert not engine.evaluate(_motion("evt_1", now, "cam1"))
+    assert engine.evaluate(_motion("evt_2", now + timedelta(seconds=1), "cam1"))
+    assert engine.stats()["state_late_dropped"] == 0
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+from datetime import UTC, datetime, timedelta
+
+import pytest
+import yaml
+
+from hoistwaywatch.contracts.events import HwEventV1
+from hoistwaywatch.rules.cli import main
+
+
+def test_replay_uses_event_time_for_cooldowns(tmp_path, capsys) -> None:
+    rules = tmp_path / "rules.yaml"
+    rules.write_text(
+        yaml.safe_dump(
+            {
+                "version": 1,
+                "rules": [
+                    {
+                        "id": "R001.motion_in_car_path",
+                        "when": {"event_type": "vision.motion_in_zone.v1", "zone_id": "car_path"},
+                        "then": {"severity": "critical", "cooldown_sec": 10},
+                    }
+                ],
+            }
+        ),
+        encoding="utf-8",
+    )
+    # One motion event per second for a minute of recorded time, replayed instantly.
+    base = datetime(2026, 1, 1, tzinfo=UTC)
+    events = tmp_path / "events.ndjson"
+    with events.open("w", encoding="utf-8") as f:
+        for i in range(60):
+            evt = HwEventV1(
+                event_id=f"evt_{i}",
+                type="vision.motion_in_zone.v1",
+                ts=base + timedelta(seconds=i),
+                site_id="site",
+                camera_id="cam1",
+                source={"service": "vision", "instance_id": "v1"},
+                payload={"zone_id": "car_path", "motion_score": 0.4},
+            )
+            f.write(evt.model_dump_json() + "\n")
+        f.write("not json\n")
+    out = tmp_path / "alerts.ndjson"
+
+    with pytest.raises(SystemExit) as exit_info:
+        main(["replay", str(events), "--rules", str(rules), "--out", str(out)])
+    assert exit_info.value.code == 0
+    report = json.loads(capsys.readouterr().out)
+
+    assert report["events"] == 60
+    assert report["invalid"] == 1
+    assert report["rule_hits"] == {"R001.motion_in_car_path": 6}
+    alerts = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert [a["ts"][:19] for a in alerts][:2] == ["2026-01-01T00:00:00", "2026-01-01T00:00:10"]
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import time
+
+from hoistwaywatch.rules.state import TTLState
+
+
+def test_least_recently_updated_keys_are_evicted_at_capacity() -> None:
+    state = TTLState(max_entries=2)
+    now = time.time()
+    state.set("a", {"n": 1}, ts=now)
+    state.set("b", {"n": 2}, ts=now)
+    state.set("a", {"n": 3}, ts=now + 0.1)  # refresh: "b" is now the oldest
+    state.set("c", {"n": 4}, ts=now + 0.2)
+    assert state.get_if_fresh("b", within_sec=10) is None
+    assert state.get_if_fresh("a", within_sec=10) == {"n": 3}
+    assert state.stats() == {
+        "size": 2,
+        "max_entries": 2,
+        "evictions": 1,
+        "expirations": 0,
+        "late_dropped": 0,
+    }
+
+
+def test_entries_past_the_longest_rule_window_are_purged() -> None:
+    state = TTLState(ttl_sec=2.0, allowed_lateness_sec=60.0)
+    now = time.time()
+    for i in range(100):
+        state.set(f"junk-zone-{i}", {}, ts=now - 10.0)
+    state.set("fresh", {"ok": True}, ts=now)
+    assert len(state) == 1
+    assert state.stats()["expirations"] == 100
+    assert state.get_if_fresh("fresh", within_sec=1.0) == {"ok": True}
+
+
+def test_evicted_keys_do_not_keep_expiry_records() -> None:
+    state = TTLState(ttl_sec=60.0, max_entries=10)
+    for i in range(10_000):
+        state.set(f"zone-{i}", {}, ts=1000.0 + i * 0.001)
+    assert len(state) == 10
+    assert len(state._armed) == 10
+    assert len(state._expiry) <= 2 * 10 + 64
+    # An evicted key that comes back is armed afresh and still expires.
+    state.set("zone-0", {}, ts=1010.0)
+    state.set("late", {}, ts=1100.0)
+    assert state.count("zone-0", start=0.0, end=2000.0) == 0
+
+
+def test_windows_are_in_event_time_and_tolerate_reordering() -> None:
+    state = TTLState(history=8, allowed_lateness_sec=5.0)
+    for ts in (100.0, 104.0, 101.0, 103.0):  # delivered out of order
+        state.set("k", {"ts": ts}, ts=ts)
+    assert state.count("k", start=100.5, end=103.5) == 2
+    assert state.latest("k", start=100.5, end=103.5) == {"ts": 103.0}
+    assert state.latest("k", start=105.0, end=110.0) is None
+
+    # Behind the watermark (newest 104 - 5s lateness): rejected, not reordered in.
+    assert state.set("k", {"ts": 98.0}, ts=98.0) is False
+    assert state.count("k", start=0.0, end=200.0) == 4
+    assert state.stats()["late_dropped"] == 1
+
+
+def test_history_is_a_ring_buffer() -> None:
+    state = TTLState(history=3)
+    for ts in range(10):
+        state.set("k", {"ts": ts}, ts=float(ts))
+    assert state.count("k", start=0.0, end=10.0) == 3
+    assert state.latest("k", start=0.0, end=6.5) is None
+
+
+def test_each_clock_domain_has_its_own_watermark_and_expiry() -> None:
+    state = TTLState(ttl_sec=10.0, allowed_lateness_sec=5.0)
+    state.set("cam2|k", {}, ts=5000.0, clock="cam2")
+    # cam1 is far behind cam2 but on time on its own clock: kept, and not expired by cam2's.
+    assert state.set("cam1|k", {"n": 1}, ts=1000.0, clock="cam1")
+    state.set("cam2|k", {}, ts=5100.0, clock="cam2")
+    assert state.get_if_fresh("cam1|k", within_sec=1.0, clock="cam1") == {"n": 1}
+    # It expires once cam1's own clock has moved past its TTL.
+    state.set("cam1|other", {}, ts=1020.0, clock="cam1")
+    state.set("cam2|k", {}, ts=5120.0, clock="cam2")
+    assert state.count("cam1|k", start=0.0, end=2000.0) == 0
+    assert state.stats()["late_dropped"] == 0
+
+
+def test_clock_running_ahead_of_the_wall_clock_is_clamped() -> None:
+    state = TTLState(allowed_lateness_sec=5.0, max_skew_sec=60.0, wall_clock=lambda: 1000.0)
+    state.set("k", {}, ts=4600.0, clock="cam1")  # an hour ahead
+    assert state.clock("cam1") == 1060.0
+    # Only the skew allowance, not the hour, is held against its later events.
+    assert state.set("k", {}, ts=1056.0, clock="cam1")
+    assert state.stats()["late_dropped"] == 0
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from hoistwaywatch.vision.multicam import CameraSpec, assign_cameras, load_site_cameras
+
+
+def test_site_cameras_resolve_sources_and_default_zones(tmp_path) -> None:
+    site = tmp_path / "site.yaml"
+    site.write_text(
+        """\
+cameras:
+  - id: "cam1"
+    type: "rtsp"
+    rtsp_url: "rtsp://10.0.0.5/stream1"
+  - id: "cam2"
+    type: "uvc"
+    device: 1
+    zones: "zones-cam2.json"
+    analysis_stride: 1
+""",
+        encoding="utf-8",
+    )
+    cams = load_site_cameras(str(site), default_zones="zones.json", default_stride=2)
+    assert cams == [
+        CameraSpec("cam1", "rtsp://10.0.0.5/stream1", "zones.json", analysis_stride=2),
+        CameraSpec("cam2", "1", "zones-cam2.json", analysis_stride=1),
+    ]
+
+
+def test_cameras_are_spread_over_at_most_one_worker_each() -> None:
+    cams = [CameraSpec(f"cam{i}", str(i), "z.json") for i in range(5)]
+    groups = assign_cameras(cams, 2)
+    assert [[c.camera_id for c in g] for g in groups] == [
+        ["cam0", "cam2", "cam4"],
+        ["cam1", "cam3"],
+    ]
+    assert len(assign_cameras(cams[:2], 8)) == 2
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from hoistwaywatch.capture.source import Frame
+from hoistwaywatch.vision.pipeline import MotionPipeline, PipelineConfig
+from hoistwaywatch.vision.zones import load_zones
+
+CONFIGS = Path(__file__).resolve().parents[1] / "configs"
+ZONES = load_zones(str(CONFIGS / "example-zones.json"))
+
+
+def _clip(n: int = 60, size: tuple[int, int] = (540, 960)) -> list[Frame]:
+    # Textured static background with a bright blob sweeping through car_path and pit.
+    rng = np.random.default_rng(3)
+    h, w = size
+    bg = cv2.GaussianBlur(rng.integers(60, 200, (h, w, 3), dtype=np.uint8), (0, 0), 3)
+    frames = []
+    for i in range(n):
+        img = bg.copy()
+        cx = int(w * (0.1 + 0.8 * i / n))
+        cy = int(h * (0.6 + 0.25 * np.sin(i / 8)))
+        cv2.circle(img, (cx, cy), h // 4, (240, 240, 240), -1)
+        frames.append(Frame(image=img, index=i, captured_at=float(i), captured_mono=float(i)))
+    return frames
+
+
+def _scores(config: PipelineConfig, frames: list[Frame]) -> list[dict[str, float]]:
+    pipeline = MotionPipeline(config, ZONES)
+    out = []
+    for f in frames:
+        pipeline.process(f, now=f.captured_at)
+        out.append(dict(pipeline.last_scores))
+    return out
+
+
+def test_downscaled_roi_motion_scores_track_full_resolution() -> None:
+    frames = _clip()
+    base = PipelineConfig(site_id="s", camera_id="cam1", instance_id="t")
+    full = _scores(base, frames)
+    fast = _scores(PipelineConfig(**{**base.__dict__, "process_width": 320, "roi": True}), frames)
+
+    warm = 15  # MOG2 is still learning the background
+    errors = [abs(a[z] - b[z]) for a, b in zip(full[warm:], fast[warm:], strict=True) for z in a]
+    assert max(max(s.values()) for s in full[warm:]) > 0.15  # the clip does trigger motion
+    assert float(np.mean(errors)) < 0.01
+    assert max(errors) < 0.03
+
+
+def test_roi_crop_alone_is_exact() -> None:
+    frames = _clip(n=30, size=(240, 320))
+    base = PipelineConfig(site_id="s", camera_id="cam1", instance_id="t")
+    assert _scores(base, frames) == _scores(
+        PipelineConfig(**{**base.__dict__, "roi": True}), frames
+    )
+
+
+def test_stage_timings_cover_every_stage() -> None:
+    pipeline = MotionPipeline(PipelineConfig(site_id="s", camera_id="cam1", instance_id="t"), ZONES)
+    frames = _clip(n=3, size=(120, 160))
+    pipeline.process(frames[0], now=0.0)
+    assert set(pipeline.last_stage_sec) == {"resize", "mog2", "lighting", "tamper", "zone_scoring"}
+    assert pipeline.last_stage_sec["lighting"] > 0  # first frame refreshes the thumbnail
+    pipeline.process(frames[1], now=0.01)
+    assert pipeline.last_stage_sec["lighting"] == pipeline.last_stage_sec["tamper"] == 0.0
+    assert pipeline.last_stage_sec["zone_scoring"] == pipeline.last_score_sec
+
+
+def test_torn_frames_are_not_learned_into_the_background() -> None:
+    frames = _clip()
+    config = PipelineConfig(site_id="s", camera_id="cam1", instance_id="t")
+    torn = {20, 21, 22}
+    expected = _scores(config, [f for f in frames if f.index not in torn])
+
+    pipeline = MotionPipeline(config, ZONES)
+    got = []
+    for f in frames:
+        events = pipeline.process(f, now=f.captured_at, overwritten=lambda f: f.index in torn)
+        if f.index in torn:
+            assert events == []
+        else:
+            got.append(dict(pipeline.last_scores))
+    assert pipeline.torn_frames == 3
+    assert got == expected
+
+
+def test_lighting_and_tamper_signals_are_refreshed_on_their_cadence() -> None:
+    config = PipelineConfig(site_id="s", camera_id="cam1", instance_id="t", quality_interval_ms=200)
+    pipeline = MotionPipeline(config, ZONES)
+    refreshed: list[float] = []
+    thumbnail = pipeline._thumbnail
+
+    def spy(image: np.ndarray) -> np.ndarray:
+        refreshed.append(now)
+        return thumbnail(image)
+
+    pipeline._thumbnail = spy  # type: ignore[method-assign]
+    bright = _clip(1)[0].image
+    dark = np.full_like(bright, 5)
+    qualities = []
+    for ms in range(0, 550, 50):  # a fake clock: 20 fps for 0.5 s, lights out at 250 ms
+        now = ms / 1000.0
+        image = bright if ms < 250 else dark
+        pipeline.process(Frame(image, ms, now, now), now=now)
+        qualities.append(pipeline.last_quality)
+
+    assert refreshed == [0.0, 0.2, 0.4]
+    # Between refreshes the last quality is reused, even though the frame went dark at 250 ms.
+    assert qualities[:8] == [qualities[0]] * 8
+    assert qualities[8] < qualities[0]
+    assert qualities[8:] == [qualities[8]] * 3
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+from hoistwaywatch.vision.scheduler import AnalysisScheduler, SchedulerConfig
+
+
+def _quiet(s: AnalysisScheduler, t: float) -> None:
+    s.record(started=t, elapsed=0.01, max_score=0.0, quality=0.6)
+
+
+def test_idle_scene_slows_down_and_motion_restores_full_rate() -> None:
+    cfg = SchedulerConfig(max_fps=0.0, idle_fps=2.0, idle_after_sec=5.0)
+    s = AnalysisScheduler(cfg, motion_threshold=0.15)
+    t = 0.0
+    _quiet(s, t)
+    assert s.next_delay(t + 0.01) == 0.0  # recently active (first frame): full rate
+
+    t = 6.0
+    _quiet(s, t)
+    assert abs(s.next_delay(t + 0.01) - 0.49) < 1e-9  # quiet for > 5 s: 2 fps
+
+    # A score above half the motion threshold wakes the camera on the next analysis.
+    t += 0.5
+    s.record(started=t, elapsed=0.01, max_score=0.08, quality=0.6)
+    assert s.next_delay(t + 0.01) == 0.0
+
+
+def test_cpu_budget_caps_rate_and_worst_case_latency_is_reported() -> None:
+    cfg = SchedulerConfig(max_fps=0.0, idle_fps=0.0, cpu_budget=0.25)
+    s = AnalysisScheduler(cfg, motion_threshold=0.15)
+    s.record(started=0.0, elapsed=0.05, max_score=0.5, quality=0.6)
+    # 50 ms of work at a 25% budget: next analysis no sooner than 200 ms after the last.
+    assert abs(s.next_delay(0.05) - 0.15) < 1e-9
+
+    s.record(started=0.2, elapsed=0.05, max_score=0.5, quality=0.6)
+    snap = s.snapshot(0.4)
+    assert snap["mode"] == "active"
+    assert snap["analysis_fps"] == 5.0
+    assert snap["worst_detection_latency_ms"] == 250.0
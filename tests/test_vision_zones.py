@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import cv2
+import numpy as np
+
+from hoistwaywatch.vision.zones import Zone, ZoneScorer, zone_mask
+
+
+def _legacy_scores(fg: np.ndarray, zones: list[Zone]) -> dict[str, float]:
+    out: dict[str, float] = {}
+    for z in zones:
+        mask = zone_mask(fg.shape[:2], z)
+        zone_pixels = int(np.count_nonzero(mask))
+        if zone_pixels == 0:
+            continue
+        out[z.zone_id] = int(np.count_nonzero(cv2.bitwise_and(fg, fg, mask=mask))) / zone_pixels
+    return out
+
+
+def test_scores_match_per_zone_masks_with_overlaps() -> None:
+    zones = [
+        Zone("car_path", [(0.35, 0.05), (0.65, 0.05), (0.70, 0.95), (0.30, 0.95)]),
+        Zone("pit", [(0.05, 0.80), (0.95, 0.80), (0.95, 0.98), (0.05, 0.98)]),
+        Zone("left", [(0.0, 0.0), (0.5, 0.0), (0.5, 1.0), (0.0, 1.0)]),
+    ]
+    rng = np.random.default_rng(7)
+    fg = (rng.random((240, 320)) < 0.2).astype(np.uint8) * 255
+
+    scorer = ZoneScorer((240, 320), zones)
+    got = dict(zip(scorer.zone_ids, scorer.scores(fg), strict=True))
+    want = _legacy_scores(fg, zones)
+
+    assert set(got) == set(want)
+    for zid, score in want.items():
+        assert abs(got[zid] - score) < 1e-12
+
+
+def test_motion_outside_zone_is_not_counted() -> None:
+    zones = [Zone("a", [(0.5, 0.5), (1.0, 0.5), (1.0, 1.0), (0.5, 1.0)])]
+    scorer = ZoneScorer((100, 100), zones)
+    fg = np.zeros((100, 100), dtype=np.uint8)
+    fg[:40, :40] = 255
+    assert scorer.scores(fg).tolist() == [0.0]
+    fg[60:80, 60:80] = 255
+    assert scorer.motion_pixels(fg).tolist() == [400]